@@ -0,0 +1,99 @@
+# api/compression.py
+"""
+Response compression: brotli when the client accepts it and the `brotli`
+package is installed, else gzip, else identity.
+
+Built on Starlette's GZip responders, so the same rules apply: bodies under
+`minimum_size` go out as-is, already-encoded responses and SSE streams
+(/ai/prompt/stream) are passed through untouched, and streamed bodies are
+compressed chunk by chunk.
+
+Env knobs:
+    HTTP_COMPRESS_MIN_BYTES   smallest body worth compressing (default 1024)
+    HTTP_GZIP_LEVEL           1-9 (default 6)
+    HTTP_BROTLI_QUALITY       0-11 (default 4; higher costs a lot more CPU)
+"""
+
+from __future__ import annotations
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "4"))
+
+
+def accepts(accept_encoding: str, coding: str) -> bool:
+    """True if `coding` is listed in Accept-Encoding without q=0."""
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip() != coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = BROTLI_QUALITY):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        out = self.compressor.process(body)
+        # flush per chunk so streamed responses are not held back
+        return out + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = MIN_BYTES,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, accept_encoding: str) -> Optional[str]:
+        if brotli is not None and accepts(accept_encoding, "br"):
+            return "br"
+        if accepts(accept_encoding, "gzip"):
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder: ASGIApp = BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality
+            )
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.gzip_level
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,26 +1,49 @@
+import os
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from security.tokens import decode_token
+from services.executors import run_db
 from services.user_service import UserService
 from dao.user_dao import UserDAO
+from dao.user_cache import user_cache
 
 bearer = HTTPBearer()
 
+# Operators allowed to see process-wide stats and load/evict models, by user
+# id (usernames can be registered or changed by anyone); with nothing
+# configured those endpoints are closed to everyone.
+ADMIN_USER_IDS = frozenset(
+    int(n) for n in os.getenv("ADMIN_USER_IDS", "").split(",") if n.strip()
+)
 
-def get_user_service():
+
+async def get_user_service():
     return UserService(UserDAO())
 
 
-def get_current_user(
+async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
     user_svc: UserService = Depends(get_user_service),
 ):
+    # async so every authenticated route resolves the user on the db
+    # executor rather than FastAPI's shared threadpool; usually it is cached
     try:
         claims = decode_token(creds.credentials)
         user_id = int(claims["sub"])
-        user = user_svc.get_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation()
+        user = await run_db(user_svc.get_by_id, user_id)
+        user_cache.put(user, generation)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user
+
+
+async def require_admin(current=Depends(get_current_user)):
+    """For endpoints that act on or expose the whole process, not one user."""
+    if current.id not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return current
@@ -0,0 +1,71 @@
+# api/etag.py
+"""
+Conditional GET for per-user data.
+
+ETags are derived from the user's change counters (dao.version_dao, kept by
+triggers) plus whatever else shapes the response (route, path/query params),
+never from the body, so checking If-None-Match costs one primary-key read
+and a hash; the listing itself only runs when something changed.
+
+    not_modified = await conditional_get(request, response, current.id, "entries", ...)
+    if not_modified:
+        return not_modified
+
+ETags are weak: the same data may go out gzip / br / identity encoded.
+"""
+
+from __future__ import annotations
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from dao.version_dao import VersionDAO
+from services.executors import run_db
+
+# bump when a response shape changes, so clients drop cached bodies
+ETAG_SCHEMA = "1"
+
+# browsers must revalidate before reusing a cached body
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    raw = "\x1f".join(str(p) for p in (ETAG_SCHEMA, *parts))
+    return 'W/"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (list or *)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    user_id: int,
+    *parts: Any,
+    insights: bool = False,
+) -> Optional[Response]:
+    """
+    Set ETag / Cache-Control on `response` and return a 304 to send instead
+    if the client already has this version. The entries counter always takes
+    part (deleting an entry cascades to its insight without a trigger seeing
+    the owner); insights=True adds the insights counter.
+    """
+    entries_v, insights_v = await run_db(VersionDAO().get, user_id)
+    etag = make_etag(
+        user_id, entries_v, insights_v if insights else "-", request.url.path, *parts
+    )
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
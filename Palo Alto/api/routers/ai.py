@@ -1,27 +1,40 @@
 # api/routers/ai.py
 from __future__ import annotations
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, List, Optional
-from datetime import datetime
+import asyncio
+import json
+import logging
+import threading
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from datetime import date
 
-from api.deps import get_current_user
+from api.deps import get_current_user, require_admin
+from api.etag import conditional_get
 from api.schemas.insight import PromptRequest, PromptResponse, WeeklySummary
-from services.ai_sentiment import AISentiment
-from services.ai_prompts import AIPrompts  # <-- uses new FLAN-T5 prompt generator
+from services.ai_sentiment import AISentiment, batcher_stats
+from services.ai_prompts import AIPrompts
 from services.ai_summary import AISummary
+from services import backfill_service as backfill
+from services.entry_service import EntryService
+from services.executors import run_ai, run_db
+from services.inference_server import get_client
+from services.model_registry import registry
+from services.prompt_cache import prompt_cache
 from dao.insight_dao import InsightDAO
 from dao.entry_dao import EntryDAO
-from models.insights import Insight
+
+log = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+# These are cheap facades; the models themselves live in the shared registry.
 _ai = AISentiment()
 _insights = InsightDAO()
 _entries = EntryDAO()
-
-# CHANGED: new AIPrompts signature takes an EntryDAO (optional), not AISentiment/InsightDAO
 _prompter = AIPrompts(entry_dao=_entries)
 _summarizer = AISummary(_insights)
+_entry_service = EntryService(_entries, insight_dao=_insights, ai=_ai)
 
 
 def _get_field(obj: Any, key: str, default: Any = None) -> Any:
@@ -52,9 +65,10 @@ def _fetch_entry(entry_id: int) -> Optional[Any]:
 
 
 @router.post("/prompt", response_model=PromptResponse)
-def make_prompts(body: PromptRequest, current=Depends(get_current_user)):
+async def make_prompts(body: PromptRequest, current=Depends(get_current_user)):
     """
-    Generate K short, varied reflection prompts using the FLAN-T5 prompter.
+    K short, varied reflection prompts from the user's pre-generated pool
+    (services.prompt_cache); FLAN-T5 refills it in the background.
     - body.goal       -> goal_hint
     - body.k_context  -> k (how many prompts to return)
     """
@@ -62,18 +76,95 @@ def make_prompts(body: PromptRequest, current=Depends(get_current_user)):
     # keep prompts between 3 and 7 so they read well
     k = max(3, min(7, k))
 
-    prompts = _prompter.suggest(
-        user_id=current.id,
-        k=k,
-        goal_hint=body.goal or None,
-    )
+    # a warm pool answers at once, on the loop; only a cold one generates,
+    # on the ai executor
+    goal = body.goal or None
+    prompts = prompt_cache.try_take(current.id, k=k, goal_hint=goal)
+    if prompts is None:
+        prompts = await run_ai(prompt_cache.fill, current.id, k=k, goal_hint=goal)
     # New prompter doesn’t return context IDs; UI doesn’t use them, so return empty list.
     return PromptResponse(prompts=prompts, context_entry_ids=[])
 
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _prompt_events(user_id: int, k: int, goal: Optional[str]) -> Iterator[str]:
+    count = 0
+    try:
+        for text in _prompter.stream(user_id=user_id, k=k, goal_hint=goal):
+            yield _sse("prompt", {"index": count, "text": text})
+            count += 1
+    except Exception:
+        log.exception("prompt stream failed for user %s", user_id)
+        yield _sse("error", {"detail": "prompt generation failed"})
+        return
+    yield _sse("done", {"count": count})
+
+
+def _on_ai_executor(events: Iterator[str]) -> AsyncIterator[str]:
+    """
+    Drive a blocking event iterator on the ai executor (one slot for the whole
+    stream) and hand its items to the event loop. The slot is claimed now, so
+    a saturated executor surfaces as 503 before the response starts.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    end = object()
+
+    def pump():
+        try:
+            for item in events:
+                if stop.is_set():
+                    break  # client went away
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            close = getattr(events, "close", None)
+            if close is not None:
+                close()
+            loop.call_soon_threadsafe(queue.put_nowait, end)
+
+    task = run_ai(pump)
+
+    async def relay():
+        try:
+            while (item := await queue.get()) is not end:
+                yield item
+            await task
+        finally:
+            stop.set()
+
+    return relay()
+
+
+@router.post("/prompt/stream")
+async def stream_prompts(body: PromptRequest, current=Depends(get_current_user)):
+    """
+    Fresh prompts as Server-Sent Events: one `prompt` event per question as
+    soon as the model finishes it, then `done` (or `error`). POST so the
+    bearer token can be sent; read it with fetch() + a stream reader.
+    """
+    k = max(3, min(7, body.k_context or 5))
+    return StreamingResponse(
+        _on_ai_executor(_prompt_events(current.id, k, body.goal or None)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/summary/weekly", response_model=WeeklySummary)
-def weekly_summary(current=Depends(get_current_user)):
-    data = _summarizer.weekly(current.id)
+async def weekly_summary(
+    request: Request, response: Response, current=Depends(get_current_user)
+):
+    # the summary covers the current week, so the day is part of the ETag
+    not_modified = await conditional_get(
+        request, response, current.id, date.today().isoformat(), insights=True
+    )
+    if not_modified:
+        return not_modified
+    data = await run_db(_summarizer.weekly, current.id)
     return WeeklySummary(
         week_start=data.get("week_start"),
         summary=data["summary"],
@@ -82,8 +173,15 @@ def weekly_summary(current=Depends(get_current_user)):
 
 
 @router.post("/entries/{entry_id}/analyze")
-def analyze_entry(entry_id: int, current=Depends(get_current_user)):
-    row = _fetch_entry(entry_id)
+async def analyze_entry(
+    entry_id: int, force: bool = False, current=Depends(get_current_user)
+):
+    """
+    Returns the entry's insight, running the models only if the stored one
+    was computed from other text or models (content hash); force=true always
+    re-runs them.
+    """
+    row = await run_db(_fetch_entry, entry_id)
     if not row:
         raise HTTPException(status_code=404, detail="Entry not found")
 
@@ -96,56 +194,97 @@ def analyze_entry(entry_id: int, current=Depends(get_current_user)):
     if not text:
         raise HTTPException(status_code=400, detail="Entry has no text to analyze")
 
-    # Run AI
-    sentiment, themes = _ai.analyze_entry(text)
-    emb = _ai.embed_entries([text])[0]
-
-    insight = Insight(
-        id=None,
-        entry_id=entry_id,
-        sentiment=float(sentiment),
-        themes=list(themes or []),
-        embedding=list(emb or []),
-        created_at=datetime.utcnow(),
-    )
-    _insights.upsert_for_entry(insight)
+    # an up-to-date insight is read on the db executor, not an AI worker
+    cached = not force and await run_db(_entry_service.is_analysis_current, row)
+    if cached:
+        insight = await run_db(_insights.find_by_entry, entry_id)
+    else:
+        # sentiment + embedding are micro-batched with concurrent requests
+        insight = await run_ai(_entry_service.reanalyze, entry_id, force=force)
+    if insight is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
 
-    return {"entry_id": entry_id, "sentiment": sentiment, "themes": themes}
+    return {
+        "entry_id": entry_id,
+        "sentiment": insight.sentiment,
+        "themes": insight.themes,
+        "cached": bool(cached),
+    }
 
 
 @router.post("/backfill")
-def backfill_current_user(current=Depends(get_current_user)):
+async def backfill_current_user(
+    background: bool = False, force: bool = False, current=Depends(get_current_user)
+):
     """
-    Analyze all existing entries for this user (creates insights for each).
+    Analyze this user's entries that have no insight yet (force=true: all).
+    background=true returns at once; poll GET /ai/backfill for progress.
     """
-    rows: List[Any] = []
-    if hasattr(_entries, "list_recent_by_user"):
-        rows = _entries.list_recent_by_user(user_id=current.id, limit=2000)  # type: ignore[attr-defined]
-    elif hasattr(_entries, "list_by_user"):
-        rows = _entries.list_by_user(user_id=current.id)  # type: ignore[attr-defined]
-    else:
-        if hasattr(_entries, "list_recent"):
-            rows = _entries.list_recent(limit=2000)  # type: ignore[attr-defined]
-            rows = [r for r in rows if _get_field(r, "user_id") == current.id]
+    if background:
+        prog = await run_db(backfill.start_background, current.id, force=force)
+        return prog.as_dict()
+    prog = await run_ai(backfill.BackfillService().run, current.id, force=force)
+    if prog.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Backfill failed: {prog.error}")
+    return {"ok": True, **prog.as_dict()}
 
-    count = 0
-    for r in rows:
-        text = _get_field(r, "text", "")
-        entry_id = _get_field(r, "id")
-        if not text or entry_id is None:
-            continue
-
-        sentiment, themes = _ai.analyze_entry(text)
-        emb = _ai.embed_entries([text])[0]
-        insight = Insight(
-            id=None,
-            entry_id=int(entry_id),
-            sentiment=float(sentiment),
-            themes=list(themes or []),
-            embedding=list(emb or []),
-            created_at=datetime.utcnow(),
-        )
-        _insights.upsert_for_entry(insight)
-        count += 1
-
-    return {"ok": True, "analyzed": count}
+
+@router.get("/backfill")
+async def backfill_status(current=Depends(get_current_user)):
+    prog = backfill.progress_for(current.id)
+    if prog is None:
+        return {"user_id": current.id, "status": "idle"}
+    return prog.as_dict()
+
+
+# With AI_INFERENCE_SOCKET set the models live in the inference server, so the
+# model endpoints report on / act on that process instead of this worker.
+# They affect every user's latency, hence admin only (ADMIN_USER_IDS).
+
+
+@router.get("/models")
+async def models_status(current=Depends(require_admin)):
+    """What is loaded, how much parameter memory it holds, and the eviction policy."""
+    client = get_client()
+    if client is not None:
+        return await run_ai(client.call, "models")
+    return registry.memory_report()
+
+
+@router.get("/batching")
+async def batching_stats(current=Depends(require_admin)):
+    """Micro-batcher counters (batches run, items served, average batch size)."""
+    client = get_client()
+    if client is not None:
+        server = await run_ai(client.call, "batching")
+        return {"local": batcher_stats(), "server": server}
+    return batcher_stats()
+
+
+@router.get("/prompt/cache")
+async def prompt_cache_stats(current=Depends(require_admin)):
+    """Prompt pool counters (hit rate, background refills, invalidations)."""
+    return prompt_cache.stats()
+
+
+@router.post("/models/warmup")
+async def models_warmup(names: Optional[List[str]] = None, current=Depends(require_admin)):
+    unknown = [n for n in names or [] if n not in registry.names()]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown model(s): {unknown}")
+    client = get_client()
+    if client is not None:
+        return await run_ai(client.call, "models", "warmup", names)
+    await run_ai(registry.warmup, names)
+    return registry.memory_report()
+
+
+@router.post("/models/{name}/unload")
+async def models_unload(name: str, current=Depends(require_admin)):
+    if name not in registry.names():
+        raise HTTPException(status_code=404, detail="Unknown model")
+    client = get_client()
+    if client is not None:
+        unloaded = await run_ai(client.call, "models", "unload", [name])
+        return {"name": name, "unloaded": unloaded[name]}
+    return {"name": name, "unloaded": await run_ai(registry.unload, name)}
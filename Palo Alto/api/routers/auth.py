@@ -9,12 +9,12 @@ from models.user import User
 router = APIRouter()
 
 
-def get_auth_service():
+async def get_auth_service():
     return AuthService(UserDAO())
 
 
 @router.post("/register", response_model=UserOut)
-def register(payload: UserCreate, svc: AuthService = Depends(get_auth_service)):
+async def register(payload: UserCreate, svc: AuthService = Depends(get_auth_service)):
     u = User(
         id=None,
         username=payload.username,
@@ -23,7 +23,7 @@ def register(payload: UserCreate, svc: AuthService = Depends(get_auth_service)):
         age=payload.age,
         gender=payload.gender,
     )
-    saved = svc.register(u)
+    saved = await svc.register_async(u)
     return UserOut(
         id=saved.id,
         username=saved.username,
@@ -34,8 +34,8 @@ def register(payload: UserCreate, svc: AuthService = Depends(get_auth_service)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, svc: AuthService = Depends(get_auth_service)):
-    token = svc.login(payload.email, payload.password)
+async def login(payload: LoginRequest, svc: AuthService = Depends(get_auth_service)):
+    token = await svc.login_async(payload.email, payload.password)
     if not token:
         raise HTTPException(status_code=401, detail="invalid credentials")
     return TokenResponse(access_token=token)
@@ -1,19 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from api.deps import get_current_user
-from api.schemas.entry import EntryCreate, EntryPatch, EntryOut
+from api.etag import conditional_get
+from api.schemas.entry import (
+    EntryCreate,
+    EntryPatch,
+    EntryOut,
+    EntrySummary,
+    EntrySearchHit,
+    EntryActivity,
+)
 from services.entry_service import EntryService
+from services.search_service import SearchService
+from services.analytics_service import AnalyticsService
 from dao.entry_dao import EntryDAO
 from models.entry import Entry
+from services.executors import run_ai, run_db
 
 router = APIRouter()
 
+MAX_PAGE = 500
+PREVIEW_CHARS = 240
+LIST_FIELDS = ("id", "user_id", "title", "created_at", "preview", "text")
+DEFAULT_LIST_FIELDS = "id,title,created_at,preview"
+
+
+def _list_fields(value: str) -> List[str]:
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown entry fields: {', '.join(unknown)}"
+        )
+    return fields
+
+
+def _preview(text: str, limit: int = PREVIEW_CHARS) -> tuple[str, bool]:
+    """(preview, truncated): cut at the last word boundary before `limit`."""
+    if len(text) <= limit:
+        return text, False
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip() + "…", True
+
 
-def get_entry_service():
+async def get_entry_service():
     return EntryService(EntryDAO())
 
 
+async def get_search_service():
+    return SearchService(EntryDAO())
+
+
+async def get_analytics_service():
+    return AnalyticsService()
+
+
+def _write_executor(svc: EntryService, analyzes: bool = True):
+    """Writes that run the models inline go to the ai executor, the rest to db."""
+    return run_ai if analyzes and not svc.async_analysis else run_db
+
+
 @router.post("", response_model=EntryOut)
-def create_entry(
+async def create_entry(
     payload: EntryCreate,
     svc: EntryService = Depends(get_entry_service),
     current=Depends(get_current_user),
@@ -22,14 +75,15 @@ def create_entry(
         raise HTTPException(
             status_code=403, detail="cannot create entry for another user"
         )
-    saved = svc.create(
+    saved = await _write_executor(svc)(
+        svc.create,
         Entry(
             id=None,
             user_id=payload.user_id,
             title=payload.title,
             text=payload.text,
             created_at=None,
-        )
+        ),
     )
     return EntryOut(
         id=saved.id,
@@ -41,14 +95,16 @@ def create_entry(
 
 
 @router.patch("/{entry_id}", response_model=EntryOut)
-def update_entry(
+async def update_entry(
     entry_id: int,
     patch: EntryPatch,
     svc: EntryService = Depends(get_entry_service),
     current=Depends(get_current_user),
 ):
-    updated = svc.update_partial(
-        entry_id, **{k: v for k, v in patch.dict().items() if v is not None}
+    updated = await _write_executor(svc, analyzes=patch.text is not None)(
+        svc.update_partial,
+        entry_id,
+        **{k: v for k, v in patch.dict().items() if v is not None},
     )
     if not updated:
         raise HTTPException(status_code=404, detail="entry not found")
@@ -63,30 +119,123 @@ def update_entry(
     )
 
 
-@router.get("", response_model=list[EntryOut])
-def list_my_entries(
-    svc: EntryService = Depends(get_entry_service), current=Depends(get_current_user)
+@router.get(
+    "", response_model=list[EntrySummary], response_model_exclude_unset=True
+)
+async def list_my_entries(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    fields: str = Query(DEFAULT_LIST_FIELDS, description="comma separated"),
+    svc: EntryService = Depends(get_entry_service),
+    current=Depends(get_current_user),
 ):
-    rows = svc.list_for_user(current.id, limit=100)
+    """
+    The caller's entries, newest first. When more exist, the X-Next-Cursor
+    response header holds the cursor for the next (older) page.
+
+    Items are previews by default (text truncated server side); add `text`
+    to `fields` for full bodies. Supports If-None-Match (ETag).
+    """
+    wanted = _list_fields(fields)
+    not_modified = await conditional_get(
+        request, response, current.id, limit, cursor, ",".join(wanted)
+    )
+    if not_modified:
+        return not_modified
+    full_text = "text" in wanted
+    try:
+        rows, next_cursor = await run_db(
+            svc.page_for_user,
+            current.id,
+            limit=limit,
+            cursor=cursor,
+            # one extra char tells whether the preview was cut
+            text_chars=None if full_text else PREVIEW_CHARS + 1,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    out = []
+    for r in rows:
+        item = {"id": r.id}
+        if "user_id" in wanted:
+            item["user_id"] = r.user_id
+        if "title" in wanted:
+            item["title"] = r.title
+        if "created_at" in wanted:
+            item["created_at"] = str(r.created_at)
+        if "preview" in wanted:
+            item["preview"], item["truncated"] = _preview(r.text or "")
+        if full_text:
+            item["text"] = r.text
+        out.append(EntrySummary(**item))
+    return out
+
+
+@router.get("/search", response_model=list[EntrySearchHit])
+async def search_entries(
+    q: str = Query(..., min_length=1, max_length=500),
+    k: int = Query(10, ge=1, le=100),
+    mode: str = Query("auto", pattern="^(auto|exact|approx|keyword)$"),
+    svc: SearchService = Depends(get_search_service),
+    current=Depends(get_current_user),
+):
+    """
+    Search the caller's entries.
+    mode: keyword (FTS5 + bm25, with snippets) | auto / exact / approx
+    (semantic: e5 embedding + cosine similarity, IVF for very large journals)
+    """
+    if mode == "keyword":
+        hits = await run_db(svc.keyword, current.id, q, k=k)
+    else:
+        # embeds the query with e5
+        semantic = await run_ai(svc.semantic, current.id, q, k=k, mode=mode)
+        hits = [(e, score, None) for e, score in semantic]
     return [
-        EntryOut(
-            id=r.id,
-            user_id=r.user_id,
-            title=r.title,
-            text=r.text,
-            created_at=str(r.created_at),
+        EntrySearchHit(
+            id=e.id,
+            user_id=e.user_id,
+            title=e.title,
+            text=e.text,
+            created_at=str(e.created_at),
+            score=score,
+            snippet=snippet,
         )
-        for r in rows
+        for e, score, snippet in hits
     ]
 
 
+@router.get("/activity", response_model=EntryActivity)
+async def entry_activity(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    svc: AnalyticsService = Depends(get_analytics_service),
+    current=Depends(get_current_user),
+):
+    """Entries per day/week over [start, end] (default: last 90 days)."""
+    try:
+        return await run_db(svc.activity, current.id, start, end, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 @router.get("/{entry_id}", response_model=EntryOut)
-def get_entry(
+async def get_entry(
     entry_id: int,
+    request: Request,
+    response: Response,
     svc: EntryService = Depends(get_entry_service),
     current=Depends(get_current_user),
 ):
-    e = svc.get(entry_id)
+    not_modified = await conditional_get(request, response, current.id)
+    if not_modified:
+        return not_modified
+    e = await run_db(svc.get, entry_id)
     if not e or e.user_id != current.id:
         raise HTTPException(status_code=404, detail="entry not found")
     return EntryOut(
@@ -98,14 +247,27 @@ def get_entry(
     )
 
 
+@router.get("/{entry_id}/analysis")
+async def get_entry_analysis_status(
+    entry_id: int,
+    svc: EntryService = Depends(get_entry_service),
+    current=Depends(get_current_user),
+):
+    """Background analysis state for an entry: pending / running / done / failed."""
+    e = await run_db(svc.get, entry_id)
+    if not e or e.user_id != current.id:
+        raise HTTPException(status_code=404, detail="entry not found")
+    return await run_db(svc.analysis_status, entry_id)
+
+
 @router.delete("/{entry_id}")
-def delete_entry(
+async def delete_entry(
     entry_id: int,
     svc: EntryService = Depends(get_entry_service),
     current=Depends(get_current_user),
 ):
-    e = svc.get(entry_id)
+    e = await run_db(svc.get, entry_id)
     if not e or e.user_id != current.id:
         raise HTTPException(status_code=404, detail="entry not found")
-    svc.remove(entry_id)
+    await run_db(svc.remove, entry_id)
     return {"ok": True}
@@ -1,23 +1,163 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from api.deps import get_current_user
-from api.schemas.insight import InsightPatch, InsightOut
+from api.etag import conditional_get
+from api.schemas.insight import (
+    InsightPatch,
+    InsightOut,
+    InsightRow,
+    InsightPage,
+    SentimentSeries,
+)
 from services.insight_service import InsightService
+from services.analytics_service import AnalyticsService
+from dao.entry_dao import EntryDAO
 from dao.insight_dao import InsightDAO
+from services.vector_index import vector_indexes
+from services.executors import run_db
 
 router = APIRouter()
 
 
-def get_insight_service():
+async def get_insight_service():
     return InsightService(InsightDAO())
 
 
-@router.get("/by-entry/{entry_id}", response_model=InsightOut)
-def get_insight(
+async def get_analytics_service():
+    return AnalyticsService()
+
+
+MAX_BATCH_IDS = 500
+DEFAULT_ROW_FIELDS = "entry_id,created_at,sentiment,themes"
+
+
+def _csv(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+async def _require_own_entry(entry_id: int, user_id: int) -> None:
+    """404 unless the entry exists and belongs to the caller."""
+    entry = await run_db(EntryDAO().find_by_id, entry_id)
+    if not entry or entry.user_id != user_id:
+        raise HTTPException(status_code=404, detail="entry not found")
+
+
+def _parse_ids(value: str) -> List[int]:
+    try:
+        ids = [int(v) for v in _csv(value)]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="entry_ids must be integers")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=422, detail=f"at most {MAX_BATCH_IDS} entry_ids per request"
+        )
+    return list(dict.fromkeys(ids))
+
+
+@router.get(
+    "/batch", response_model=list[InsightRow], response_model_exclude_unset=True
+)
+async def get_insights_batch(
+    entry_ids: str = Query(..., description="comma separated, e.g. 1,2,3"),
+    fields: str = Query(DEFAULT_ROW_FIELDS, description="comma separated"),
+    svc: InsightService = Depends(get_insight_service),
+    current=Depends(get_current_user),
+):
+    """
+    Insights for many entries in one request. Entries that are not the
+    caller's, or have no insight yet, are simply absent from the result.
+    """
+    ids = _parse_ids(entry_ids)
+    if not ids:
+        return []
+    try:
+        return await run_db(svc.batch_for_user, current.id, ids, fields=_csv(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/mine", response_model=InsightPage, response_model_exclude_unset=True)
+async def get_my_insights(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: str = Query(DEFAULT_ROW_FIELDS, description="comma separated"),
+    svc: InsightService = Depends(get_insight_service),
+    current=Depends(get_current_user),
+):
+    """
+    The caller's insights, newest entry first, one page at a time. Follow
+    next_cursor (keyset, constant cost per page); offset still works for
+    old clients but gets slower the deeper it goes.
+    """
+    try:
+        if offset and not cursor:
+            rows = await run_db(
+                svc.page_for_user,
+                current.id,
+                limit=limit + 1,
+                offset=offset,
+                fields=_csv(fields),
+            )
+            return InsightPage(
+                items=rows[:limit],
+                limit=limit,
+                offset=offset,
+                has_more=len(rows) > limit,
+            )
+        rows, next_cursor = await run_db(
+            svc.cursor_page_for_user,
+            current.id,
+            limit=limit,
+            cursor=cursor,
+            fields=_csv(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return InsightPage(
+        items=rows,
+        limit=limit,
+        offset=0,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/timeseries", response_model=SentimentSeries)
+async def get_sentiment_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    svc: AnalyticsService = Depends(get_analytics_service),
+    current=Depends(get_current_user),
+):
+    """Per-day/week sentiment count, mean, min and max (default: last 90 days)."""
+    try:
+        return await run_db(svc.sentiment_timeseries, current.id, start, end, bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get(
+    "/by-entry/{entry_id}", response_model=InsightOut, response_model_exclude_none=True
+)
+async def get_insight(
     entry_id: int,
+    request: Request,
+    response: Response,
+    include_embedding: bool = Query(False, description="add the 768-float vector"),
     svc: InsightService = Depends(get_insight_service),
     current=Depends(get_current_user),
 ):
-    ins = svc.get_for_entry(entry_id)
+    not_modified = await conditional_get(
+        request, response, current.id, include_embedding, insights=True
+    )
+    if not_modified:
+        return not_modified
+    await _require_own_entry(entry_id, current.id)
+    ins = await run_db(svc.get_for_entry, entry_id)
     if not ins:
         raise HTTPException(status_code=404, detail="insight not found")
     return InsightOut(
@@ -25,28 +165,36 @@ def get_insight(
         entry_id=ins.entry_id,
         sentiment=ins.sentiment,
         themes=ins.themes,
-        embedding=ins.embedding,
+        embedding=ins.embedding if include_embedding else None,
         created_at=str(ins.created_at),
     )
 
 
-@router.patch("/by-entry/{entry_id}", response_model=InsightOut)
-def patch_insight(
+@router.patch(
+    "/by-entry/{entry_id}", response_model=InsightOut, response_model_exclude_none=True
+)
+async def patch_insight(
     entry_id: int,
     patch: InsightPatch,
     svc: InsightService = Depends(get_insight_service),
     current=Depends(get_current_user),
 ):
-    updated = svc.update_partial(
-        entry_id, **{k: v for k, v in patch.dict().items() if v is not None}
+    await _require_own_entry(entry_id, current.id)
+    updated = await run_db(
+        svc.update_partial,
+        entry_id,
+        **{k: v for k, v in patch.dict().items() if v is not None},
     )
     if not updated:
         raise HTTPException(status_code=404, detail="insight not found")
+    if patch.embedding is not None:
+        vector_indexes.on_upsert(current.id, entry_id, updated.embedding)
     return InsightOut(
         id=updated.id,
         entry_id=updated.entry_id,
         sentiment=updated.sentiment,
         themes=updated.themes,
-        embedding=updated.embedding,
+        # echoed only when the caller sent one
+        embedding=updated.embedding if patch.embedding is not None else None,
         created_at=str(updated.created_at),
     )
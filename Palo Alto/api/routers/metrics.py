@@ -0,0 +1,27 @@
+# api/routers/metrics.py
+from fastapi import APIRouter, Depends, Request
+
+from api.deps import require_admin
+from connection import get_pool
+from dao.user_cache import user_cache
+from services.event_buffer import event_buffer
+from services.executors import executor_stats
+from services.model_registry import heavy_modules_loaded
+from services.vector_index import vector_indexes
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def metrics(request: Request, current=Depends(require_admin)):
+    """Process-level counters: DB pool, executors, caches, vector indexes, startup."""
+    startup = dict(getattr(request.app.state, "startup", {}))
+    startup["heavy_modules_loaded"] = heavy_modules_loaded()
+    return {
+        "db_pool": get_pool().stats(),
+        "executors": executor_stats(),
+        "user_cache": user_cache.stats(),
+        "events": event_buffer.stats(),
+        "vector_index": vector_indexes.stats(),
+        "startup": startup,
+    }
@@ -2,13 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException
 from api.deps import get_current_user
 from api.schemas.user import UserOut, UserUpdate
 from dao.user_dao import UserDAO
+from services.executors import run_db
 
 router = APIRouter()
 _users = UserDAO()
 
 
 @router.get("/me", response_model=UserOut)
-def me(current=Depends(get_current_user)):
+async def me(current=Depends(get_current_user)):
     return UserOut(
         id=current.id,
         username=current.username,
@@ -22,7 +23,7 @@ def me(current=Depends(get_current_user)):
 
 
 @router.get("/me/streak")
-def my_streak(current=Depends(get_current_user)):
+async def my_streak(current=Depends(get_current_user)):
     return {
         "last_entry_date": current.last_entry_date,
         "current_streak": current.current_streak,
@@ -31,7 +32,7 @@ def my_streak(current=Depends(get_current_user)):
 
 
 @router.patch("/me", response_model=UserOut)
-def patch_me(payload: UserUpdate, current=Depends(get_current_user)):
+async def patch_me(payload: UserUpdate, current=Depends(get_current_user)):
     fields = {}
 
     if payload.username is not None:
@@ -60,7 +61,7 @@ def patch_me(payload: UserUpdate, current=Depends(get_current_user)):
             longest_streak=current.longest_streak,
         )
 
-    updated = _users.update_partial(current.id, **fields)
+    updated = await run_db(_users.update_partial, current.id, **fields)
     if not updated:
         raise HTTPException(status_code=404, detail="User not found")
 
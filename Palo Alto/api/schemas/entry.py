@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class EntryCreate(BaseModel):
@@ -19,3 +19,35 @@ class EntryOut(BaseModel):
     title: str
     text: str
     created_at: str
+
+
+class EntrySummary(BaseModel):
+    """GET /entries item; only the requested fields are present."""
+
+    id: int
+    user_id: Optional[int] = None
+    title: Optional[str] = None
+    created_at: Optional[str] = None
+    preview: Optional[str] = None  # first ~240 chars, cut at a word boundary
+    truncated: Optional[bool] = None  # set with preview: text goes on
+    text: Optional[str] = None  # full text, only with fields=text
+
+
+class EntrySearchHit(BaseModel):
+    id: int
+    user_id: int
+    title: str
+    text: str
+    created_at: str
+    score: float
+    snippet: Optional[str] = None  # keyword mode: matches wrapped in <mark></mark>
+
+
+class EntryActivity(BaseModel):
+    """Columnar: count[i] entries were written in the bucket starting dates[i]."""
+
+    bucket: str
+    start: str
+    end: str
+    dates: List[str]
+    count: List[int]
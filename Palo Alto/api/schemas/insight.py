@@ -29,5 +29,40 @@ class InsightOut(BaseModel):
     entry_id: int
     sentiment: float
     themes: list[str]
-    embedding: list[float]
+    embedding: Optional[list[float]] = None  # 768 floats: opt-in only
     created_at: str
+
+
+class InsightRow(BaseModel):
+    """Entry + insight row; only the requested fields are present."""
+
+    entry_id: int
+    title: Optional[str] = None
+    text: Optional[str] = None
+    created_at: Optional[str] = None
+    insight_id: Optional[int] = None
+    sentiment: Optional[float] = None
+    themes: Optional[List[str]] = None
+    embedding: Optional[List[float]] = None
+    analyzed_at: Optional[str] = None
+
+
+class InsightPage(BaseModel):
+    items: List[InsightRow]
+    limit: int
+    offset: int
+    has_more: bool
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+
+class SentimentSeries(BaseModel):
+    """Columnar: index i of every list describes dates[i]."""
+
+    bucket: str
+    start: str
+    end: str
+    dates: List[str]
+    count: List[int]
+    mean: List[float]
+    min: List[float]
+    max: List[float]
@@ -1,13 +1,46 @@
 # db.py
-import sqlite3
+import os
+import threading
+
+from db_pool import ConnectionPool
 
 DB_NAME = "my_db"  # or absolute path if you want
 
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "32"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide pool for DB_NAME (a new pool if DB_NAME was changed)."""
+    pool = _pools.get(DB_NAME)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(DB_NAME)
+            if pool is None:
+                pool = ConnectionPool(
+                    DB_NAME,
+                    size=POOL_SIZE,
+                    max_overflow=POOL_MAX_OVERFLOW,
+                    timeout=POOL_TIMEOUT,
+                )
+                _pools[DB_NAME] = pool
+    return pool
+
 
 def get_connection():
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row  # lets you access columns by name
-    except Exception as e:
-        print("Connection failed:", e)
-    return conn
+    """
+    Borrow a connection from the pool (rows accessible by column name).
+    Calling conn.close() returns it to the pool.
+    """
+    return get_pool().acquire()
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
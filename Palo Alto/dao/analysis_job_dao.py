@@ -0,0 +1,215 @@
+# dao/analysis_job_dao.py
+import sqlite3
+from typing import Optional
+from connection import get_connection
+from models.analysis_job import (
+    AnalysisJob,
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+)
+from .exceptions import DAOError
+
+
+class AnalysisJobDAO:
+    """Persisted queue of background AI analysis jobs (one row per entry)."""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self._external_conn = conn
+
+    def _conn(self):
+        return self._external_conn or get_connection()
+
+    @staticmethod
+    def _row_to_job(row) -> AnalysisJob:
+        return AnalysisJob(
+            id=row["id"],
+            entry_id=row["entry_id"],
+            user_id=row["user_id"],
+            status=row["status"],
+            attempts=row["attempts"],
+            last_error=row["last_error"],
+            next_attempt_at=row["next_attempt_at"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            generation=row["generation"],
+        )
+
+    def enqueue(self, entry_id: int, user_id: int) -> None:
+        """
+        Queue (or re-queue) analysis for an entry. Re-queueing bumps the
+        generation, so a worker still running the old text cannot mark it done.
+        """
+        conn = self._conn()
+        try:
+            conn.execute(
+                """
+                INSERT INTO analysis_jobs (entry_id, user_id)
+                VALUES (?, ?)
+                ON CONFLICT(entry_id) DO UPDATE SET
+                    status          = 'pending',
+                    attempts        = 0,
+                    last_error      = NULL,
+                    next_attempt_at = CURRENT_TIMESTAMP,
+                    updated_at      = CURRENT_TIMESTAMP,
+                    generation      = generation + 1
+                """,
+                (entry_id, user_id),
+            )
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to enqueue analysis job: {e}")
+
+    def claim_next(self) -> Optional[AnalysisJob]:
+        """
+        Atomically move the oldest due pending job to 'running' and return it.
+        Safe with several workers: the UPDATE picks and flips the row in one statement.
+        The returned job's generation is the claim token for mark_done/mark_failed.
+        """
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                UPDATE analysis_jobs
+                   SET status = 'running',
+                       attempts = attempts + 1,
+                       updated_at = CURRENT_TIMESTAMP
+                 WHERE id = (
+                        SELECT id FROM analysis_jobs
+                         WHERE status = 'pending'
+                           AND next_attempt_at <= CURRENT_TIMESTAMP
+                         ORDER BY next_attempt_at, id
+                         LIMIT 1
+                 )
+                RETURNING *
+                """
+            )
+            row = cur.fetchone()
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+            return self._row_to_job(row) if row else None
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to claim analysis job: {e}")
+
+    def mark_done(self, job: AnalysisJob) -> bool:
+        """False if the job was re-queued meanwhile; it stays pending then."""
+        return self._set_status(job, STATUS_DONE, None)
+
+    def mark_failed(
+        self, job: AnalysisJob, error: str, max_attempts: int, retry_delay_s: float
+    ) -> str:
+        """
+        Record a failed attempt. Re-queues with a delay while attempts remain,
+        otherwise marks the job failed. Returns the new status; pending if the
+        job was re-queued meanwhile (the fresh request is left alone).
+        """
+        if job.attempts >= max_attempts:
+            if self._set_status(job, STATUS_FAILED, error):
+                return STATUS_FAILED
+            return STATUS_PENDING
+
+        conn = self._conn()
+        try:
+            conn.execute(
+                """
+                UPDATE analysis_jobs
+                   SET status = 'pending',
+                       last_error = ?,
+                       next_attempt_at = datetime('now', ?),
+                       updated_at = CURRENT_TIMESTAMP
+                 WHERE id = ? AND status = 'running' AND generation = ?
+                """,
+                (
+                    error[:1000],
+                    f"+{int(retry_delay_s)} seconds",
+                    job.id,
+                    job.generation,
+                ),
+            )
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+            return STATUS_PENDING
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to reschedule analysis job: {e}")
+
+    def _set_status(
+        self, job: AnalysisJob, status: str, error: Optional[str]
+    ) -> bool:
+        """Finish a claimed job; False if its claim is no longer current."""
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                UPDATE analysis_jobs
+                   SET status = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                 WHERE id = ? AND status = 'running' AND generation = ?
+                """,
+                (status, error[:1000] if error else None, job.id, job.generation),
+            )
+            updated = cur.rowcount == 1
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+            return updated
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to update analysis job: {e}")
+
+    def requeue_running(self) -> int:
+        """After a crash/restart, put jobs that were mid-flight back in the queue."""
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                UPDATE analysis_jobs
+                   SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+                 WHERE status = 'running'
+                """
+            )
+            n = cur.rowcount
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+            return n
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to requeue analysis jobs: {e}")
+
+    def find_by_entry(self, entry_id: int) -> Optional[AnalysisJob]:
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                "SELECT * FROM analysis_jobs WHERE entry_id = ?", (entry_id,)
+            )
+            row = cur.fetchone()
+            if not self._external_conn:
+                conn.close()
+            return self._row_to_job(row) if row else None
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to find analysis job: {e}")
+
+    def delete_by_entry(self, entry_id: int) -> None:
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM analysis_jobs WHERE entry_id = ?", (entry_id,))
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to delete analysis job: {e}")
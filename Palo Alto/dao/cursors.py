@@ -0,0 +1,54 @@
+# dao/cursors.py
+"""
+Opaque keyset cursors for "newest first" listings.
+
+A page ends at the (created_at, id) of its last row; the next page is
+everything strictly older, i.e. `(created_at, id) < (?, ?)`. With the
+(user_id, created_at) index (rowid is the implicit last column) SQLite
+seeks straight to that position, so page 500 costs the same as page 1,
+unlike LIMIT/OFFSET which reads and discards every skipped row.
+
+Cursors carry the raw stored created_at text so the comparison is exact;
+clients treat them as opaque strings.
+"""
+
+from __future__ import annotations
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+Keyset = Tuple[Any, int]  # (created_at as stored, id)
+
+
+def encode_cursor(created_at: Any, row_id: int) -> str:
+    raw = json.dumps([created_at, int(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Keyset]:
+    """None for an empty cursor; ValueError if it was not made by encode_cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def keyset_clause(created_col: str, id_col: str) -> str:
+    """WHERE fragment selecting rows older than the cursor (2 params)."""
+    return f"({created_col}, {id_col}) < (?, ?)"
+
+
+def next_cursor(rows, limit: int, created_key="created_at", id_key="id"):
+    """
+    rows were fetched with LIMIT limit + 1: returns (page, cursor or None).
+    The extra row only tells whether another page exists.
+    """
+    if len(rows) <= limit:
+        return list(rows), None
+    page = list(rows[:limit])
+    last = page[-1]
+    return page, encode_cursor(last[created_key], last[id_key])
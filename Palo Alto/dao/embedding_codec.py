@@ -0,0 +1,74 @@
+# dao/embedding_codec.py
+"""
+Embedding storage formats for insights.embedding.
+
+- "json": legacy text, e.g. "[0.12, 0.98, -0.45]"
+- "f32":  packed little-endian float32 BLOB (768 dims -> 3 KB)
+- "f16":  packed little-endian float16 BLOB (768 dims -> 1.5 KB)
+
+The format of each row is kept in insights.embedding_format (NULL = json),
+so old rows keep working until they are converted.
+"""
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_JSON = "json"
+FORMAT_F32 = "f32"
+FORMAT_F16 = "f16"
+
+_DTYPES = {FORMAT_F32: np.dtype("<f4"), FORMAT_F16: np.dtype("<f2")}
+FORMATS = (FORMAT_JSON, FORMAT_F32, FORMAT_F16)
+
+
+def encode_embedding(vec: Any, fmt: str) -> Tuple[Any, str]:
+    """Return (value to store, format tag)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown embedding format: {fmt}")
+    if fmt == FORMAT_JSON:
+        if isinstance(vec, np.ndarray):
+            vec = vec.tolist()
+        return json.dumps(list(vec) if vec is not None else []), FORMAT_JSON
+    arr = np.asarray(vec if vec is not None else [], dtype=_DTYPES[fmt])
+    return arr.tobytes(), fmt
+
+
+def decode_embedding(value: Any, fmt: Optional[str], as_numpy: bool = False):
+    """
+    Decode a stored embedding. With as_numpy=True binary rows come back as a
+    read-only np.frombuffer view over the row bytes (no copy, no parsing).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        arr = np.frombuffer(value, dtype=_DTYPES.get(fmt or FORMAT_F32, _DTYPES[FORMAT_F32]))
+        if as_numpy:
+            return arr
+        return arr.astype(np.float64).tolist()
+    if isinstance(value, str):
+        try:
+            data = json.loads(value)
+        except Exception:
+            return None
+        return np.asarray(data, dtype=np.float32) if as_numpy else data
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype=np.float32) if as_numpy else list(value)
+    return None
+
+
+def stack_embeddings(
+    rows: Sequence[Tuple[Any, Optional[str]]], dim: Optional[int] = None
+) -> np.ndarray:
+    """Decode (value, format) pairs into one contiguous float32 matrix."""
+    vecs: List[np.ndarray] = []
+    for value, fmt in rows:
+        v = decode_embedding(value, fmt, as_numpy=True)
+        vecs.append(np.asarray(v, dtype=np.float32) if v is not None else None)
+    if dim is None:
+        dim = next((len(v) for v in vecs if v is not None and len(v)), 0)
+    out = np.zeros((len(vecs), dim), dtype=np.float32)
+    for i, v in enumerate(vecs):
+        if v is not None and len(v) == dim:
+            out[i] = v
+    return out
@@ -1,13 +1,41 @@
 # dao/entry_dao.py
+import re
 import sqlite3
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from connection import get_connection
 from models.entry import Entry
+from .cursors import decode_cursor, keyset_clause, next_cursor
 from .exceptions import DAOError  # <-- relative
 from dao.interfaces import IEntryDAO
 
 ALLOWED_FIELDS = {"title", "text", "created_at"}  # user_id stays fixed
 
+# bm25 column weights for entries_fts(title, text): title matches count double
+FTS_WEIGHTS = (2.0, 1.0)
+SNIPPET_TOKENS = 12
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# SQL expression for the first day of a bucket (weeks start on Monday)
+BUCKET_SQL = {
+    "day": "date(created_at)",
+    "week": "date(created_at, 'weekday 0', '-6 days')",
+}
+
+
+def to_fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must appear,
+    the last one as a prefix (search-as-you-type). FTS5 operators and quotes
+    in user input are never passed through.
+    """
+    terms = _TERM_RE.findall(text or "")
+    if not terms:
+        return ""
+    parts = [f'"{t}"' for t in terms]
+    parts[-1] += "*"
+    return " ".join(parts)
+
 
 class EntryDAO(IEntryDAO):
     def __init__(self, conn=None):
@@ -66,6 +94,27 @@ class EntryDAO(IEntryDAO):
                 conn.close()
             raise DAOError(f"Failed to find entry by id: {e}")
 
+    def find_by_ids(self, user_id: int, entry_ids: List[int]) -> List[Entry]:
+        """Fetch several of a user's entries at once (order not guaranteed)."""
+        if not entry_ids:
+            return []
+        conn = self._conn()
+        try:
+            marks = ",".join("?" * len(entry_ids))
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT * FROM entries WHERE user_id = ? AND id IN ({marks})",
+                (user_id, *entry_ids),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [self._row_to_entry(r) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to find entries by ids: {e}")
+
     def list_by_user(self, user_id: int, limit: int = 100) -> List[Entry]:
         conn = self._conn()
         try:
@@ -74,7 +123,7 @@ class EntryDAO(IEntryDAO):
                 """
                 SELECT * FROM entries
                 WHERE user_id = ?
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
                 LIMIT ?
             """,
                 (user_id, limit),
@@ -88,6 +137,175 @@ class EntryDAO(IEntryDAO):
                 conn.close()
             raise DAOError(f"Failed to list entries by user: {e}")
 
+    def page_by_user(
+        self,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        text_chars: Optional[int] = None,
+    ) -> Tuple[List[Entry], Optional[str]]:
+        """
+        One page of the user's entries, newest first, plus the cursor for the
+        next (older) page or None at the end. Keyset on (created_at, id), so
+        every page is an index seek on idx_entries_user_created.
+        text_chars: read only the first N characters of each text (list
+        previews); such entries must not be written back.
+        Raises ValueError for a cursor that was not issued here.
+        """
+        before = decode_cursor(cursor)
+        text_sql, text_params = "text", []
+        if text_chars is not None:
+            text_sql, text_params = "substr(text, 1, ?) AS text", [text_chars]
+        where, params = "user_id = ?", [user_id]
+        if before is not None:
+            where += " AND " + keyset_clause("created_at", "id")
+            params.extend(before)
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT id, user_id, title, {text_sql}, created_at FROM entries
+                WHERE {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """,
+                (*text_params, *params, limit + 1),
+            )
+            rows, token = next_cursor(cur.fetchall(), limit)
+            if not self._external_conn:
+                conn.close()
+            return [self._row_to_entry(r) for r in rows], token
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to page entries by user: {e}")
+
+    def list_for_analysis(
+        self,
+        user_id: int,
+        after_id: int = 0,
+        limit: int = 100,
+        only_missing: bool = True,
+    ) -> List[Tuple[Entry, Optional[str]]]:
+        """
+        [(entry, stored insight content_hash or None)] for a user, in id order
+        starting after `after_id` (keyset paging for backfills).
+        only_missing=True skips entries that already have an insight.
+        """
+        missing = "AND i.id IS NULL" if only_missing else ""
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT e.*, i.content_hash AS insight_hash FROM entries e
+                LEFT JOIN insights i ON i.entry_id = e.id
+                WHERE e.user_id = ? AND e.id > ? {missing}
+                ORDER BY e.id
+                LIMIT ?
+            """,
+                (user_id, after_id, limit),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [(self._row_to_entry(r), r["insight_hash"]) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to list entries for analysis: {e}")
+
+    def count_for_analysis(self, user_id: int, only_missing: bool = True) -> int:
+        missing = "AND i.id IS NULL" if only_missing else ""
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT COUNT(*) FROM entries e
+                LEFT JOIN insights i ON i.entry_id = e.id
+                WHERE e.user_id = ? {missing}
+            """,
+                (user_id,),
+            )
+            n = cur.fetchone()[0]
+            if not self._external_conn:
+                conn.close()
+            return n
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to count entries for analysis: {e}")
+
+    def search_text(
+        self, user_id: int, query: str, limit: int = 20
+    ) -> List[Tuple[Entry, float, str]]:
+        """
+        Keyword search over a user's entries via the entries_fts index.
+        Returns [(entry, score, snippet)] best first; score = -bm25 (higher is
+        better), snippet has matches wrapped in <mark>...</mark>.
+        """
+        match = to_fts_query(query)
+        if not match:
+            return []
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT e.*,
+                       bm25(entries_fts, ?, ?) AS rank,
+                       snippet(entries_fts, 1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}) AS snip
+                FROM entries_fts
+                JOIN entries e ON e.id = entries_fts.rowid
+                WHERE entries_fts MATCH ? AND e.user_id = ?
+                ORDER BY rank
+                LIMIT ?
+            """,
+                (*FTS_WEIGHTS, match, user_id, limit),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [(self._row_to_entry(r), -float(r["rank"]), r["snip"]) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to search entries: {e}")
+
+    def activity(
+        self, user_id: int, start: str, end: str, bucket: str = "day"
+    ) -> List[Tuple[str, int]]:
+        """
+        [(bucket_start 'YYYY-MM-DD', entry_count)] for start <= created_at < end,
+        oldest first. Range bounds are date/datetime strings; the range scan
+        uses idx_entries_user_created.
+        """
+        if bucket not in BUCKET_SQL:
+            raise ValueError(f"bucket must be one of {tuple(BUCKET_SQL)}")
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT {BUCKET_SQL[bucket]} AS bucket, COUNT(*) AS n
+                FROM entries
+                WHERE user_id = ? AND created_at >= ? AND created_at < ?
+                GROUP BY bucket
+                ORDER BY bucket
+            """,
+                (user_id, start, end),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [(r["bucket"], r["n"]) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to aggregate entry activity: {e}")
+
     def update(self, entry: Entry) -> Entry:
         conn = self._conn()
         try:
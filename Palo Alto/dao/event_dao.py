@@ -1,6 +1,6 @@
 # dao/event_dao.py
 import sqlite3, json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Tuple
 from connection import get_connection
 
 
@@ -30,3 +30,33 @@ class EventDAO:
         finally:
             if not self._external_conn:
                 conn.close()
+
+    def create_many(
+        self, rows: Iterable[Tuple[int, str, str, Optional[str]]]
+    ) -> int:
+        """
+        Insert (user_id, type, meta_json, created_at) rows with one executemany;
+        created_at None means now. Returns the number of rows written.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        conn = self._conn()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO events (user_id, type, meta, created_at)
+                VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """,
+                rows,
+            )
+            if not self._external_conn:
+                conn.commit()
+            return len(rows)
+        except Exception:
+            if not self._external_conn:
+                conn.rollback()
+            raise
+        finally:
+            if not self._external_conn:
+                conn.close()
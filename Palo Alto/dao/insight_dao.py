@@ -1,21 +1,69 @@
 # dao/insight_dao.py
 import json
+import os
 import sqlite3
-from typing import Optional, List, Any, Dict
-from datetime import datetime
+from typing import Optional, List, Any, Dict, Iterable, Sequence, Tuple
+from datetime import datetime, timezone
+
+import numpy as np
+
 from connection import get_connection
 from models.insights import Insight
+from .cursors import Keyset, decode_cursor, keyset_clause, next_cursor
 from .exceptions import DAOError
 from dao.interfaces import IInsightDAO
+from dao.entry_dao import BUCKET_SQL
+from dao.embedding_codec import (
+    FORMATS,
+    decode_embedding,
+    encode_embedding,
+    stack_embeddings,
+)
 
 ALLOWED_FIELDS = {"sentiment", "themes", "embedding", "created_at"}
 
+# Selectable keys for get_for_user -> the columns they read
+JOINED_FIELDS = {
+    "entry_id": "e.id AS entry_id",
+    "title": "e.title AS title",
+    "text": "e.text AS text",
+    "created_at": "e.created_at AS created_at",
+    "insight_id": "i.id AS insight_id",
+    "sentiment": "i.sentiment AS sentiment",
+    "themes": "i.themes AS themes",
+    "embedding": "i.embedding AS embedding, i.embedding_format AS embedding_format",
+    "analyzed_at": "i.created_at AS analyzed_at",
+}
+DEFAULT_JOINED_FIELDS = (
+    "entry_id",
+    "text",
+    "created_at",
+    "sentiment",
+    "themes",
+    "embedding",
+)
+
+# How new/updated embeddings are written: f32 (default), f16 or json
+EMBEDDING_FORMAT = os.getenv("EMBEDDING_FORMAT", "f32")
+
+
+# CURRENT_TIMESTAMP's format. Every stored created_at must use it: keyset
+# pages compare the text, and an ISO "T" sorts after the space.
+DB_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 def _dt_to_db(value: Any) -> Optional[str]:
     if value is None:
         return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
     if isinstance(value, datetime):
-        return value.isoformat()
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime(DB_TIME_FORMAT)
     return str(value)
 
 
@@ -40,8 +88,11 @@ def _maybe_load_json(v: Any):
 
 
 class InsightDAO(IInsightDAO):
-    def __init__(self, conn=None):
+    def __init__(self, conn=None, embedding_format: Optional[str] = None):
         self._external_conn = conn
+        self.embedding_format = embedding_format or EMBEDDING_FORMAT
+        if self.embedding_format not in FORMATS:
+            raise ValueError(f"Unknown embedding format: {self.embedding_format}")
 
     def _conn(self):
         return self._external_conn or get_connection()
@@ -53,81 +104,277 @@ class InsightDAO(IInsightDAO):
             entry_id=row["entry_id"],
             sentiment=row["sentiment"],
             themes=json.loads(row["themes"]),
-            embedding=json.loads(row["embedding"]),
+            embedding=decode_embedding(row["embedding"], row["embedding_format"]),
             created_at=_db_to_dt(row["created_at"]),
+            content_hash=row["content_hash"],
         )
 
-    def get_for_user(self, user_id: int, limit: int = 200) -> List[Dict[str, Any]]:
+    def get_for_user(
+        self,
+        user_id: int,
+        limit: int = 200,
+        with_embeddings: bool = True,
+        as_numpy: bool = False,
+        offset: int = 0,
+        entry_ids: Optional[Sequence[int]] = None,
+        fields: Optional[Iterable[str]] = None,
+        analyzed_only: bool = False,
+        before: Optional[Keyset] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Return recent entries for this user joined with their insight.
         Each item:
         {
           "entry_id": int, "text": str, "created_at": str,
           "sentiment": float | None, "themes": list[str] | None,
-          "embedding": list[float] | None
+          "embedding": list[float] | np.ndarray | None
         }
+        with_embeddings=False skips reading the vectors at all.
+
+        fields: return only these keys (see JOINED_FIELDS; entry_id is always
+        included) and read only the columns they need.
+        entry_ids: restrict to these entries (other users' ids never match).
+        analyzed_only: skip entries that have no insight yet.
+        before: keyset (entry created_at, entry id); only older entries are
+        returned. Use page_for_user() for opaque cursors.
         """
+        if fields is None:
+            wanted = list(DEFAULT_JOINED_FIELDS)
+            if not with_embeddings:
+                wanted.remove("embedding")
+        else:
+            wanted = ["entry_id"] + [f for f in fields if f != "entry_id"]
+            unknown = [f for f in wanted if f not in JOINED_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown insight fields: {', '.join(unknown)}")
+            wanted = list(dict.fromkeys(wanted))
+
+        select = ",\n                    ".join(JOINED_FIELDS[f] for f in wanted)
+        where = ["e.user_id = ?"]
+        params: List[Any] = [user_id]
+        if entry_ids is not None:
+            if not entry_ids:
+                return []
+            where.append(f"e.id IN ({','.join('?' * len(entry_ids))})")
+            params.extend(int(i) for i in entry_ids)
+        if before is not None:
+            where.append(keyset_clause("e.created_at", "e.id"))
+            params.extend(before)
+        join = "JOIN" if analyzed_only else "LEFT JOIN"
+
         conn = self._conn()
         try:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT
-                    e.id         AS entry_id,
-                    e.text       AS text,
-                    e.created_at AS created_at,
-                    i.sentiment  AS sentiment,
-                    i.themes     AS themes,
-                    i.embedding  AS embedding
+                    {select}
                 FROM entries e
-                LEFT JOIN insights i ON i.entry_id = e.id
-                WHERE e.user_id = ?
-                ORDER BY e.created_at DESC
-                LIMIT ?
+                {join} insights i ON i.entry_id = e.id
+                WHERE {' AND '.join(where)}
+                ORDER BY e.created_at DESC, e.id DESC
+                LIMIT ? OFFSET ?
                 """,
-                (user_id, limit),
+                (*params, limit, offset),
             )
             rows = cur.fetchall()
             if not self._external_conn:
                 conn.close()
             out: List[Dict[str, Any]] = []
             for r in rows:
-                out.append(
-                    {
-                        "entry_id": r["entry_id"],
-                        "text": r["text"],
-                        "created_at": r["created_at"],
-                        "sentiment": r["sentiment"],
-                        "themes": _maybe_load_json(r["themes"]),
-                        "embedding": _maybe_load_json(r["embedding"]),
-                    }
-                )
+                item: Dict[str, Any] = {}
+                for f in wanted:
+                    if f == "themes":
+                        item[f] = _maybe_load_json(r["themes"])
+                    elif f == "embedding":
+                        item[f] = decode_embedding(
+                            r["embedding"], r["embedding_format"], as_numpy=as_numpy
+                        )
+                    else:
+                        item[f] = r[f]
+                out.append(item)
             return out
         except sqlite3.Error as e:
             if not self._external_conn:
                 conn.close()
             raise DAOError(f"Failed to get insights for user: {e}")
 
+    def page_for_user(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        analyzed_only: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Keyset-paged get_for_user(): (items, next cursor or None).
+        created_at is always read for the cursor and dropped again if the
+        caller did not ask for it. Raises ValueError for a foreign cursor.
+        """
+        before = decode_cursor(cursor)
+        wanted = list(fields) if fields is not None else list(DEFAULT_JOINED_FIELDS)
+        extra = "created_at" not in wanted
+        rows = self.get_for_user(
+            user_id,
+            limit=limit + 1,
+            fields=wanted + ["created_at"] if extra else wanted,
+            analyzed_only=analyzed_only,
+            before=before,
+        )
+        page, token = next_cursor(rows, limit, id_key="entry_id")
+        if extra:
+            for item in page:
+                del item["created_at"]
+        return page, token
+
+    def sentiment_timeseries(
+        self, user_id: int, start: str, end: str, bucket: str = "day"
+    ) -> List[Dict[str, Any]]:
+        """
+        Per-bucket sentiment stats for entries with start <= created_at < end,
+        oldest first: {"bucket", "count", "mean", "min", "max"}.
+        Entries without an insight are not counted.
+        """
+        if bucket not in BUCKET_SQL:
+            raise ValueError(f"bucket must be one of {tuple(BUCKET_SQL)}")
+        bucket_sql = BUCKET_SQL[bucket].replace("created_at", "e.created_at")
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT {bucket_sql}     AS bucket,
+                       COUNT(*)         AS n,
+                       AVG(i.sentiment) AS mean,
+                       MIN(i.sentiment) AS lo,
+                       MAX(i.sentiment) AS hi
+                FROM entries e
+                JOIN insights i ON i.entry_id = e.id
+                WHERE e.user_id = ? AND e.created_at >= ? AND e.created_at < ?
+                GROUP BY bucket
+                ORDER BY bucket
+                """,
+                (user_id, start, end),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [
+                {
+                    "bucket": r["bucket"],
+                    "count": r["n"],
+                    "mean": r["mean"],
+                    "min": r["lo"],
+                    "max": r["hi"],
+                }
+                for r in rows
+            ]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to aggregate sentiment: {e}")
+
+    def embeddings_for_user(self, user_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All of a user's embeddings as (entry_ids int64[n], matrix float32[n, dim]).
+        Binary rows are read with np.frombuffer, so no per-row parsing.
+        """
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                SELECT i.entry_id, i.embedding, i.embedding_format
+                FROM insights i
+                JOIN entries e ON e.id = i.entry_id
+                WHERE e.user_id = ?
+                ORDER BY i.entry_id
+                """,
+                (user_id,),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            return ids, stack_embeddings([(r[1], r[2]) for r in rows])
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to load embeddings for user: {e}")
+
+    def convert_embeddings(self, fmt: Optional[str] = None, batch: int = 500) -> int:
+        """
+        Rewrite stored embeddings into `fmt` (default: this DAO's format),
+        e.g. to migrate legacy JSON rows to packed float32. Returns rows changed.
+        """
+        fmt = fmt or self.embedding_format
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown embedding format: {fmt}")
+        conn = self._conn()
+        changed = 0
+        try:
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    """
+                    SELECT id, embedding, embedding_format FROM insights
+                    WHERE id > ? AND COALESCE(embedding_format, 'json') != ?
+                    ORDER BY id LIMIT ?
+                    """,
+                    (last_id, fmt, batch),
+                ).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for r in rows:
+                    vec = decode_embedding(r["embedding"], r["embedding_format"])
+                    value, tag = encode_embedding(vec or [], fmt)
+                    updates.append((value, tag, r["id"]))
+                conn.executemany(
+                    "UPDATE insights SET embedding = ?, embedding_format = ? WHERE id = ?",
+                    updates,
+                )
+                if not self._external_conn:
+                    conn.commit()
+                changed += len(updates)
+                last_id = rows[-1]["id"]
+            if not self._external_conn:
+                conn.close()
+            return changed
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to convert embeddings: {e}")
+
     def upsert_for_entry(self, insight: Insight) -> Insight:
+        emb_value, emb_format = encode_embedding(
+            insight.embedding, self.embedding_format
+        )
         conn = self._conn()
         try:
             cur = conn.cursor()
             cur.execute(
                 """
-                INSERT INTO insights (entry_id, sentiment, themes, embedding, created_at)
-                VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                INSERT INTO insights
+                    (entry_id, sentiment, themes, embedding, embedding_format,
+                     created_at, content_hash)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
                 ON CONFLICT(entry_id) DO UPDATE SET
                     sentiment = excluded.sentiment,
                     themes    = excluded.themes,
                     embedding = excluded.embedding,
-                    created_at= excluded.created_at
+                    embedding_format = excluded.embedding_format,
+                    created_at= excluded.created_at,
+                    content_hash = excluded.content_hash
                 """,
                 (
                     insight.entry_id,
                     insight.sentiment,
                     json.dumps(insight.themes),
-                    json.dumps(insight.embedding),
+                    emb_value,
+                    emb_format,
                     _dt_to_db(getattr(insight, "created_at", None)),
+                    getattr(insight, "content_hash", None),
                 ),
             )
             if not self._external_conn:
@@ -139,6 +386,71 @@ class InsightDAO(IInsightDAO):
                 conn.close()
             raise DAOError(f"Failed to upsert insight: {e}")
 
+    def upsert_many(self, insights: List[Insight]) -> int:
+        """Upsert a batch of insights in one statement / one transaction."""
+        if not insights:
+            return 0
+        params = []
+        for ins in insights:
+            emb_value, emb_format = encode_embedding(
+                ins.embedding, self.embedding_format
+            )
+            params.append(
+                (
+                    ins.entry_id,
+                    ins.sentiment,
+                    json.dumps(ins.themes),
+                    emb_value,
+                    emb_format,
+                    _dt_to_db(getattr(ins, "created_at", None)),
+                    getattr(ins, "content_hash", None),
+                )
+            )
+        conn = self._conn()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO insights
+                    (entry_id, sentiment, themes, embedding, embedding_format,
+                     created_at, content_hash)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+                ON CONFLICT(entry_id) DO UPDATE SET
+                    sentiment = excluded.sentiment,
+                    themes    = excluded.themes,
+                    embedding = excluded.embedding,
+                    embedding_format = excluded.embedding_format,
+                    created_at= excluded.created_at,
+                    content_hash = excluded.content_hash
+                """,
+                params,
+            )
+            if not self._external_conn:
+                conn.commit()
+                conn.close()
+            return len(params)
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.rollback()
+                conn.close()
+            raise DAOError(f"Failed to upsert insights: {e}")
+
+    def content_hash_for_entry(self, entry_id: int) -> Optional[str]:
+        """Stored content_hash of the entry's insight (None: no insight / legacy)."""
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT content_hash FROM insights WHERE entry_id = ?", (entry_id,)
+            )
+            row = cur.fetchone()
+            if not self._external_conn:
+                conn.close()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to read insight content hash: {e}")
+
     def find_by_entry(self, entry_id: int) -> Optional[Insight]:
         conn = self._conn()
         try:
@@ -186,8 +498,11 @@ class InsightDAO(IInsightDAO):
                     cols.append("themes = ?")
                     vals.append(json.dumps(v))
                 elif k == "embedding":
+                    emb_value, emb_format = encode_embedding(v, self.embedding_format)
                     cols.append("embedding = ?")
-                    vals.append(json.dumps(v))
+                    vals.append(emb_value)
+                    cols.append("embedding_format = ?")
+                    vals.append(emb_format)
                 elif k == "created_at":
                     cols.append("created_at = COALESCE(?, created_at)")
                     vals.append(_dt_to_db(v))
@@ -265,3 +580,32 @@ class InsightDAO(IInsightDAO):
             if not self._external_conn:
                 conn.close()
             raise DAOError(f"Failed to list recent insights: {e}")
+
+    def page_recent(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Insight], Optional[str]]:
+        """list_recent() by keyset on (created_at, id) instead of OFFSET."""
+        before = decode_cursor(cursor)
+        where, params = "", []
+        if before is not None:
+            where, params = "WHERE " + keyset_clause("created_at", "id"), list(before)
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT * FROM insights
+                {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+                """,
+                (*params, limit + 1),
+            )
+            rows, token = next_cursor(cur.fetchall(), limit)
+            if not self._external_conn:
+                conn.close()
+            return [self._row_to_insight(r) for r in rows], token
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to page recent insights: {e}")
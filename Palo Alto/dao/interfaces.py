@@ -1,5 +1,5 @@
 # dao/interfaces.py
-from typing import Optional, List, Protocol
+from typing import Any, Dict, Iterable, Optional, List, Protocol, Sequence, Tuple
 from models.user import User
 from models.entry import Entry
 from models.insights import Insight
@@ -12,13 +12,25 @@ class IUserDAO(Protocol):
     def update(self, user: User) -> User: ...
     def update_partial(self, user_id: int, **fields) -> Optional[User]: ...
     def delete(self, user_id: int) -> None: ...
-    def list_recent(self, limit: int = 50, offset: int = 0) -> List[User]: ...
+    def list_recent(
+        self, limit: int = 50, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[User]: ...
 
 
 class IEntryDAO(Protocol):
     def create(self, entry: Entry) -> Entry: ...
     def find_by_id(self, entry_id: int) -> Optional[Entry]: ...
     def list_by_user(self, user_id: int, limit: int = 100) -> List[Entry]: ...
+    def page_by_user(
+        self,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        text_chars: Optional[int] = None,
+    ) -> Tuple[List[Entry], Optional[str]]: ...
+    def search_text(
+        self, user_id: int, query: str, limit: int = 20
+    ) -> List[Tuple[Entry, float, str]]: ...
     def update(self, entry: Entry) -> Entry: ...
     def update_partial(self, entry_id: int, **fields) -> Optional[Entry]: ...
     def delete(self, entry_id: int) -> None: ...
@@ -32,3 +44,26 @@ class IInsightDAO(Protocol):
     def delete_by_entry(self, entry_id: int) -> None: ...
     def delete(self, insight_id: int) -> None: ...
     def list_recent(self, limit: int = 100, offset: int = 0) -> List[Insight]: ...
+    def page_recent(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Insight], Optional[str]]: ...
+    def get_for_user(
+        self,
+        user_id: int,
+        limit: int = 200,
+        with_embeddings: bool = True,
+        as_numpy: bool = False,
+        offset: int = 0,
+        entry_ids: Optional[Sequence[int]] = None,
+        fields: Optional[Iterable[str]] = None,
+        analyzed_only: bool = False,
+        before: Optional[Tuple[Any, int]] = None,
+    ) -> List[Dict[str, Any]]: ...
+    def page_for_user(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+        analyzed_only: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]: ...
@@ -0,0 +1,120 @@
+# dao/rollup_dao.py
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from connection import get_connection
+from models.daily_rollup import DailyRollup, RollupTotals
+from .exceptions import DAOError
+from dao.schema import rebuild_daily_rollups
+
+# bucket start for a rollup day (weeks start on Monday, as in EntryDAO.BUCKET_SQL)
+_BUCKET_OF_DAY = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",
+}
+
+
+class RollupDAO:
+    """
+    Read side of daily_rollups. The rows are kept current by triggers on
+    entries/insights (see dao.schema), so there is nothing to write here
+    except a full rebuild.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self._external_conn = conn
+
+    def _conn(self):
+        return self._external_conn or get_connection()
+
+    @staticmethod
+    def _row_to_rollup(row) -> DailyRollup:
+        return DailyRollup(
+            user_id=row["user_id"],
+            day=row["day"],
+            entry_count=row["entry_count"],
+            insight_count=row["insight_count"],
+            sentiment_sum=row["sentiment_sum"],
+            sentiment_sq_sum=row["sentiment_sq_sum"],
+            sentiment_min=row["sentiment_min"],
+            sentiment_max=row["sentiment_max"],
+            themes=json.loads(row["themes"] or "{}"),
+        )
+
+    def days(self, user_id: int, start: str, end: str) -> List[DailyRollup]:
+        """Rollups for start <= day < end ('YYYY-MM-DD'), oldest first."""
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT * FROM daily_rollups
+                WHERE user_id = ? AND day >= ? AND day < ?
+                ORDER BY day
+            """,
+                (user_id, start, end),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [self._row_to_rollup(r) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to read daily rollups: {e}")
+
+    def totals(self, user_id: int, start: str, end: str) -> RollupTotals:
+        """Everything between start (inclusive) and end (exclusive) added up."""
+        return RollupTotals.of(self.days(user_id, start, end))
+
+    def buckets(
+        self, user_id: int, start: str, end: str, bucket: str = "day"
+    ) -> List[Dict[str, Any]]:
+        """
+        Per day/week numbers (no themes) for charts, oldest first:
+        {"bucket", "entry_count", "insight_count", "sentiment_sum",
+         "sentiment_min", "sentiment_max"}
+        """
+        if bucket not in _BUCKET_OF_DAY:
+            raise ValueError(f"bucket must be one of {tuple(_BUCKET_OF_DAY)}")
+        conn = self._conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT {_BUCKET_OF_DAY[bucket]} AS bucket,
+                       SUM(entry_count)    AS entry_count,
+                       SUM(insight_count)  AS insight_count,
+                       SUM(sentiment_sum)  AS sentiment_sum,
+                       MIN(sentiment_min)  AS sentiment_min,
+                       MAX(sentiment_max)  AS sentiment_max
+                FROM daily_rollups
+                WHERE user_id = ? AND day >= ? AND day < ?
+                GROUP BY bucket
+                ORDER BY bucket
+            """,
+                (user_id, start, end),
+            )
+            rows = cur.fetchall()
+            if not self._external_conn:
+                conn.close()
+            return [dict(r) for r in rows]
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to aggregate daily rollups: {e}")
+
+    def rebuild(self) -> int:
+        """Recompute all rollups from entries + insights; returns the row count."""
+        conn = self._conn()
+        try:
+            rebuild_daily_rollups(conn)
+            n = conn.execute("SELECT COUNT(*) FROM daily_rollups").fetchone()[0]
+            if not self._external_conn:
+                conn.close()
+            return n
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to rebuild daily rollups: {e}")
@@ -0,0 +1,400 @@
+# dao/schema.py
+"""
+Idempotent schema setup / migrations.
+
+ensure_schema(conn) can be run on every startup: base tables are created
+only if missing, and each later migration checks before it changes anything.
+"""
+import sqlite3
+from typing import Callable, List
+
+BASE_SQL = """
+CREATE TABLE IF NOT EXISTS users (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    username        TEXT    NOT NULL UNIQUE,
+    email           TEXT    NOT NULL UNIQUE,
+    password        TEXT    NOT NULL,
+    age             INTEGER NOT NULL CHECK (age >= 0 AND age <= 150),
+    gender          TEXT    NOT NULL,
+    created_at      TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    last_entry_date TEXT,
+    current_streak  INTEGER NOT NULL DEFAULT 0,
+    longest_streak  INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     INTEGER NOT NULL,
+    title       TEXT    NOT NULL,
+    text        TEXT    NOT NULL,
+    created_at  TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS insights (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id    INTEGER NOT NULL UNIQUE,   -- one insight per entry
+    sentiment   REAL    NOT NULL CHECK (sentiment >= -1.0 AND sentiment <= 1.0),
+    themes      TEXT    NOT NULL,          -- JSON text, e.g. '["work","gratitude"]'
+    embedding   TEXT    NOT NULL,          -- JSON text or packed float BLOB (see embedding_format)
+    created_at  TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     INTEGER NOT NULL,
+    type        TEXT NOT NULL,                 -- e.g., 'entry.created', 'streak.updated'
+    meta        TEXT NOT NULL DEFAULT '{}',    -- JSON string, e.g., {"entry_id":123}
+    created_at  TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_entries_user_created ON entries(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_insights_entry ON insights(entry_id);
+CREATE INDEX IF NOT EXISTS idx_events_user_created ON events(user_id, created_at);
+"""
+
+ANALYSIS_JOBS_SQL = """
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id        INTEGER NOT NULL UNIQUE,   -- at most one live job per entry
+    user_id         INTEGER NOT NULL,
+    status          TEXT    NOT NULL DEFAULT 'pending'
+                    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    next_attempt_at TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    created_at      TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    updated_at      TEXT    NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status_next
+    ON analysis_jobs(status, next_attempt_at);
+"""
+
+# External-content FTS5 index over entries (rowid = entries.id); the triggers
+# keep it in sync with every write path, including cascading deletes.
+ENTRIES_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title,
+    text,
+    content = 'entries',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, text)
+    VALUES (new.id, new.title, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_au AFTER UPDATE OF title, text ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, text)
+    VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO entries_fts(rowid, title, text)
+    VALUES (new.id, new.title, new.text);
+END;
+"""
+
+# Per user/day aggregates for summaries and charts. Maintained by triggers that
+# recompute only the (user, day) a write touched, so cascading deletes and
+# edited created_at values stay correct without any application code.
+DAILY_ROLLUPS_SQL = """
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    user_id          INTEGER NOT NULL,
+    day              TEXT    NOT NULL,              -- YYYY-MM-DD of entries.created_at
+    entry_count      INTEGER NOT NULL DEFAULT 0,    -- entries written that day
+    insight_count    INTEGER NOT NULL DEFAULT 0,    -- ... of which analyzed
+    sentiment_sum    REAL    NOT NULL DEFAULT 0,
+    sentiment_sq_sum REAL    NOT NULL DEFAULT 0,
+    sentiment_min    REAL,
+    sentiment_max    REAL,
+    themes           TEXT    NOT NULL DEFAULT '{}', -- JSON {"theme": count}
+    PRIMARY KEY (user_id, day)    -- no FK: derived data, emptied by the entry triggers
+) WITHOUT ROWID;
+"""
+
+# {user} / {day} are SQL expressions evaluated inside the trigger
+_ROLLUP_REFRESH = """
+    DELETE FROM daily_rollups WHERE user_id = {user} AND day = {day};
+    INSERT INTO daily_rollups (
+        user_id, day, entry_count, insight_count, sentiment_sum,
+        sentiment_sq_sum, sentiment_min, sentiment_max, themes
+    )
+    SELECT e.user_id, {day}, COUNT(*), COUNT(i.id),
+           COALESCE(SUM(i.sentiment), 0),
+           COALESCE(SUM(i.sentiment * i.sentiment), 0),
+           MIN(i.sentiment), MAX(i.sentiment),
+           (SELECT COALESCE(json_group_object(t.theme, t.n), '{{}}')
+            FROM (SELECT j.value AS theme, COUNT(*) AS n
+                  FROM entries e2
+                  JOIN insights i2 ON i2.entry_id = e2.id,
+                       json_each(CASE WHEN json_valid(i2.themes)
+                                      THEN i2.themes ELSE '[]' END) j
+                  WHERE e2.user_id = {user}
+                    AND e2.created_at >= {day}
+                    AND e2.created_at < date({day}, '+1 day')
+                  GROUP BY j.value) t)
+    FROM entries e
+    LEFT JOIN insights i ON i.entry_id = e.id
+    WHERE e.user_id = {user}
+      AND e.created_at >= {day}
+      AND e.created_at < date({day}, '+1 day')
+    GROUP BY e.user_id;"""
+
+
+def _rollup_refresh(user: str, day: str) -> str:
+    return _ROLLUP_REFRESH.format(user=user, day=day)
+
+
+def _entry_of(ref: str, col: str) -> str:
+    return f"(SELECT {col} FROM entries WHERE id = {ref}.entry_id)"
+
+
+DAILY_ROLLUP_TRIGGERS_SQL = f"""
+CREATE TRIGGER IF NOT EXISTS rollup_entries_ai AFTER INSERT ON entries BEGIN
+{_rollup_refresh("new.user_id", "date(new.created_at)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_entries_ad AFTER DELETE ON entries BEGIN
+{_rollup_refresh("old.user_id", "date(old.created_at)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_entries_au AFTER UPDATE OF user_id, created_at ON entries
+WHEN old.user_id != new.user_id OR date(old.created_at) != date(new.created_at)
+BEGIN
+{_rollup_refresh("old.user_id", "date(old.created_at)")}
+{_rollup_refresh("new.user_id", "date(new.created_at)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_insights_ai AFTER INSERT ON insights BEGIN
+{_rollup_refresh(_entry_of("new", "user_id"), _entry_of("new", "date(created_at)"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_insights_au AFTER UPDATE OF entry_id, sentiment, themes ON insights BEGIN
+{_rollup_refresh(_entry_of("old", "user_id"), _entry_of("old", "date(created_at)"))}
+{_rollup_refresh(_entry_of("new", "user_id"), _entry_of("new", "date(created_at)"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_insights_ad AFTER DELETE ON insights BEGIN
+{_rollup_refresh(_entry_of("old", "user_id"), _entry_of("old", "date(created_at)"))}
+END;
+"""
+
+# Per-user change counters for HTTP ETags (api/etag.py). Any write to a user's
+# entries / insights bumps the matching counter, so "has anything changed?"
+# is one primary-key read instead of re-running the listing.
+USER_VERSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id  INTEGER PRIMARY KEY,  -- no FK: a counter may outlive its rows
+    entries  INTEGER NOT NULL DEFAULT 0,
+    insights INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# {user} is a SQL expression evaluated inside the trigger; no row -> no bump
+_VERSION_BUMP = """
+    INSERT INTO user_versions (user_id, {col})
+    SELECT user_id, 1 FROM (SELECT {user} AS user_id) WHERE user_id IS NOT NULL
+    ON CONFLICT(user_id) DO UPDATE SET {col} = {col} + 1;"""
+
+
+def _version_bump(col: str, user: str) -> str:
+    return _VERSION_BUMP.format(col=col, user=user)
+
+
+USER_VERSION_TRIGGERS_SQL = f"""
+CREATE TRIGGER IF NOT EXISTS version_entries_ai AFTER INSERT ON entries BEGIN
+{_version_bump("entries", "new.user_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_entries_au AFTER UPDATE ON entries BEGIN
+{_version_bump("entries", "new.user_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_entries_au_owner AFTER UPDATE OF user_id ON entries
+WHEN old.user_id != new.user_id
+BEGIN
+{_version_bump("entries", "old.user_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_entries_ad AFTER DELETE ON entries BEGIN
+{_version_bump("entries", "old.user_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_insights_ai AFTER INSERT ON insights BEGIN
+{_version_bump("insights", _entry_of("new", "user_id"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_insights_au AFTER UPDATE ON insights BEGIN
+{_version_bump("insights", _entry_of("new", "user_id"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_insights_au_entry AFTER UPDATE OF entry_id ON insights
+WHEN old.entry_id != new.entry_id
+BEGIN
+{_version_bump("insights", _entry_of("old", "user_id"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS version_insights_ad AFTER DELETE ON insights BEGIN
+{_version_bump("insights", _entry_of("old", "user_id"))}
+END;
+"""
+
+# Full recompute (backfill / repair); same numbers the triggers produce
+REBUILD_DAILY_ROLLUPS_SQL = """
+DELETE FROM daily_rollups;
+
+INSERT INTO daily_rollups (
+    user_id, day, entry_count, insight_count, sentiment_sum,
+    sentiment_sq_sum, sentiment_min, sentiment_max
+)
+SELECT e.user_id, date(e.created_at) AS day, COUNT(*), COUNT(i.id),
+       COALESCE(SUM(i.sentiment), 0),
+       COALESCE(SUM(i.sentiment * i.sentiment), 0),
+       MIN(i.sentiment), MAX(i.sentiment)
+FROM entries e
+LEFT JOIN insights i ON i.entry_id = e.id
+GROUP BY e.user_id, day;
+
+UPDATE daily_rollups SET themes = (
+    SELECT COALESCE(json_group_object(t.theme, t.n), '{}')
+    FROM (SELECT j.value AS theme, COUNT(*) AS n
+          FROM entries e
+          JOIN insights i ON i.entry_id = e.id,
+               json_each(CASE WHEN json_valid(i.themes) THEN i.themes ELSE '[]' END) j
+          WHERE e.user_id = daily_rollups.user_id
+            AND date(e.created_at) = daily_rollups.day
+          GROUP BY j.value) t
+);
+"""
+
+
+# --------------------------- helpers ----------------------------------------
+
+
+def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(r[1] == column for r in rows)
+
+
+def add_column_if_missing(
+    conn: sqlite3.Connection, table: str, column: str, decl: str
+) -> None:
+    if not column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+# --------------------------- migrations -------------------------------------
+
+
+def _base(conn: sqlite3.Connection) -> None:
+    conn.executescript(BASE_SQL)
+    # older databases were created before streak tracking existed
+    add_column_if_missing(conn, "users", "last_entry_date", "TEXT")
+    add_column_if_missing(
+        conn, "users", "current_streak", "INTEGER NOT NULL DEFAULT 0"
+    )
+    add_column_if_missing(
+        conn, "users", "longest_streak", "INTEGER NOT NULL DEFAULT 0"
+    )
+
+
+def _analysis_jobs(conn: sqlite3.Connection) -> None:
+    conn.executescript(ANALYSIS_JOBS_SQL)
+
+
+def _embedding_format(conn: sqlite3.Connection) -> None:
+    # NULL = legacy JSON text; 'f32' / 'f16' = packed BLOB (see dao.embedding_codec)
+    add_column_if_missing(conn, "insights", "embedding_format", "TEXT")
+
+
+def _insight_content_hash(conn: sqlite3.Connection) -> None:
+    # sha256 of model version + normalized text (see services.analysis_cache)
+    add_column_if_missing(conn, "insights", "content_hash", "TEXT")
+
+
+def rebuild_entries_fts(conn: sqlite3.Connection) -> None:
+    """Re-index every entry (backfill / repair)."""
+    conn.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+
+
+def _entries_fts(conn: sqlite3.Connection) -> None:
+    existed = table_exists(conn, "entries_fts")
+    conn.executescript(ENTRIES_FTS_SQL)
+    if not existed:
+        rebuild_entries_fts(conn)  # index rows written before the table existed
+
+
+def rebuild_daily_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute every daily_rollups row from entries + insights."""
+    conn.executescript("BEGIN;" + REBUILD_DAILY_ROLLUPS_SQL + "COMMIT;")
+
+
+def _daily_rollups(conn: sqlite3.Connection) -> None:
+    existed = table_exists(conn, "daily_rollups")
+    conn.executescript(DAILY_ROLLUPS_SQL + DAILY_ROLLUP_TRIGGERS_SQL)
+    if not existed:
+        rebuild_daily_rollups(conn)
+
+
+def _insights_created_index(conn: sqlite3.Connection) -> None:
+    # keyset pages of InsightDAO.page_recent seek this instead of sorting the table
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_insights_created ON insights(created_at)"
+    )
+
+
+def _insight_timestamps(conn: sqlite3.Connection) -> None:
+    # rows upserted before InsightDAO normalized timestamps carry ISO "T"
+    # times, which misorder against CURRENT_TIMESTAMP ones in keyset pages
+    conn.execute(
+        "UPDATE insights SET created_at = datetime(created_at)"
+        " WHERE instr(created_at, 'T') > 0 AND datetime(created_at) IS NOT NULL"
+    )
+
+
+def _analysis_job_generation(conn: sqlite3.Connection) -> None:
+    # claim token: a re-enqueue while running invalidates the worker's result
+    add_column_if_missing(
+        conn, "analysis_jobs", "generation", "INTEGER NOT NULL DEFAULT 0"
+    )
+
+
+def _user_versions(conn: sqlite3.Connection) -> None:
+    conn.executescript(USER_VERSIONS_SQL + USER_VERSION_TRIGGERS_SQL)
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _base,
+    _analysis_jobs,
+    _embedding_format,
+    _entries_fts,
+    _daily_rollups,
+    _insight_content_hash,
+    _insights_created_index,
+    _user_versions,
+    _insight_timestamps,
+    _analysis_job_generation,
+]
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    for step in MIGRATIONS:
+        step(conn)
+    conn.commit()
@@ -0,0 +1,112 @@
+# dao/user_cache.py
+"""
+In-process TTL + LRU cache of User rows keyed by id.
+
+api.deps.get_current_user resolves the JWT subject on every authenticated
+request; with this cache that is a dict lookup instead of a SQLite query.
+UserDAO invalidates an id on update / update_partial / delete (streak
+updates from EntryService go through update_partial), and `ttl` bounds how
+stale a row can get if something writes to users behind the DAO's back.
+
+Copies go in and out, so callers mutating a User never touch the cache.
+
+Env knobs:
+    USER_CACHE_SIZE    max users kept (default 10000, 0 disables the cache)
+    USER_CACHE_TTL     seconds an entry stays valid (default 60)
+"""
+
+from __future__ import annotations
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from models.user import User
+
+CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+
+class UserCache:
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation; put() drops rows read before one
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def generation(self) -> int:
+        """Take before loading from the DB; pass to put()."""
+        with self._lock:
+            return self._generation
+
+    def get(self, user_id: int) -> Optional[User]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                self._misses += 1
+                return None
+            stored_at, user = item
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._items[user_id]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._items.move_to_end(user_id)
+            self._hits += 1
+            return copy.copy(user)
+
+    def put(self, user: User, generation: Optional[int] = None) -> None:
+        """
+        Cache a row. With `generation` (from generation() before the read),
+        the row is dropped if any invalidation happened in between, so a
+        slow read cannot resurrect data an update just replaced.
+        """
+        if not self.max_size or user is None or user.id is None:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[user.id] = (time.monotonic(), copy.copy(user))
+            self._items.move_to_end(user.id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            self._items.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+# process-wide cache shared by api.deps and UserDAO
+user_cache = UserCache()
@@ -5,6 +5,7 @@ from connection import get_connection
 from models.user import User
 from dao.interfaces import IUserDAO
 from dao.exceptions import DAOError
+from dao.user_cache import user_cache
 
 
 class UserDAO(IUserDAO):
@@ -20,6 +21,11 @@ class UserDAO(IUserDAO):
         c.row_factory = sqlite3.Row
         return c
 
+    def _done(self, conn: sqlite3.Connection) -> None:
+        # hand pooled connections back; injected ones belong to the caller
+        if not self._external_conn:
+            conn.close()
+
     def _row_to_user(self, row) -> Optional[User]:
         if row is None:
             return None
@@ -51,12 +57,14 @@ class UserDAO(IUserDAO):
             if not self._external_conn:
                 conn.commit()
             user.id = cur.lastrowid
-            # fetch full row (to include defaults)
-            return self.find_by_id(user.id)
         except Exception as e:
             if not self._external_conn:
                 conn.rollback()
             raise DAOError(f"UserDAO.create failed: {e}")
+        finally:
+            self._done(conn)
+        # fetch full row (to include defaults)
+        return self.find_by_id(user.id)
 
     def find_by_id(self, user_id: int) -> Optional[User]:
         conn = self._conn()
@@ -73,6 +81,8 @@ class UserDAO(IUserDAO):
             return self._row_to_user(row)
         except Exception as e:
             raise DAOError(f"UserDAO.find_by_id failed: {e}")
+        finally:
+            self._done(conn)
 
     def find_by_email(self, email: str) -> Optional[User]:
         conn = self._conn()
@@ -89,6 +99,8 @@ class UserDAO(IUserDAO):
             return self._row_to_user(row)
         except Exception as e:
             raise DAOError(f"UserDAO.find_by_email failed: {e}")
+        finally:
+            self._done(conn)
 
     def update(self, user: User) -> User:
         if user.id is None:
@@ -122,11 +134,14 @@ class UserDAO(IUserDAO):
             )
             if not self._external_conn:
                 conn.commit()
-            return self.find_by_id(user.id)
         except Exception as e:
             if not self._external_conn:
                 conn.rollback()
             raise DAOError(f"UserDAO.update failed: {e}")
+        finally:
+            self._done(conn)
+        user_cache.invalidate(user.id)
+        return self.find_by_id(user.id)
 
     def update_partial(self, user_id: int, **fields) -> Optional[User]:
         if not fields:
@@ -161,11 +176,14 @@ class UserDAO(IUserDAO):
             conn.execute(sql, tuple(values))
             if not self._external_conn:
                 conn.commit()
-            return self.find_by_id(user_id)
         except Exception as e:
             if not self._external_conn:
                 conn.rollback()
             raise DAOError(f"UserDAO.update_partial failed: {e}")
+        finally:
+            self._done(conn)
+        user_cache.invalidate(user_id)
+        return self.find_by_id(user_id)
 
     def delete(self, user_id: int) -> None:
         conn = self._conn()
@@ -177,8 +195,20 @@ class UserDAO(IUserDAO):
             if not self._external_conn:
                 conn.rollback()
             raise DAOError(f"UserDAO.delete failed: {e}")
-
-    def list_recent(self, limit: int = 50, offset: int = 0) -> List[User]:
+        finally:
+            self._done(conn)
+        user_cache.invalidate(user_id)
+
+    def list_recent(
+        self, limit: int = 50, offset: int = 0, before_id: Optional[int] = None
+    ) -> List[User]:
+        """
+        Newest users first. For deep listings pass the last id seen as
+        before_id (keyset on the primary key) instead of a growing offset.
+        """
+        where, params = "", []
+        if before_id is not None:
+            where, params = "WHERE id < ?", [before_id]
         conn = self._conn()
         try:
             cur = conn.execute(
@@ -186,12 +216,15 @@ class UserDAO(IUserDAO):
                 SELECT id, username, email, password, age, gender,
                        last_entry_date, current_streak, longest_streak
                 FROM users
+                {where}
                 ORDER BY id DESC
                 LIMIT ? OFFSET ?
                 """,
-                (limit, offset),
+                (*params, limit, offset),
             )
             rows = cur.fetchall()
             return [self._row_to_user(r) for r in rows]
         except Exception as e:
             raise DAOError(f"UserDAO.list_recent failed: {e}")
+        finally:
+            self._done(conn)
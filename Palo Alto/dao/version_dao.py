@@ -0,0 +1,35 @@
+# dao/version_dao.py
+import sqlite3
+from typing import Optional, Tuple
+
+from connection import get_connection
+from .exceptions import DAOError
+
+
+class VersionDAO:
+    """
+    Read side of user_versions: per-user counters bumped by triggers on every
+    write to entries / insights (see dao.schema). Used to build ETags.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self._external_conn = conn
+
+    def _conn(self):
+        return self._external_conn or get_connection()
+
+    def get(self, user_id: int) -> Tuple[int, int]:
+        """(entries version, insights version); (0, 0) before the first write."""
+        conn = self._conn()
+        try:
+            row = conn.execute(
+                "SELECT entries, insights FROM user_versions WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+            if not self._external_conn:
+                conn.close()
+            return (row[0], row[1]) if row else (0, 0)
+        except sqlite3.Error as e:
+            if not self._external_conn:
+                conn.close()
+            raise DAOError(f"Failed to read user versions: {e}")
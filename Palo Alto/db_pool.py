@@ -0,0 +1,204 @@
+# db_pool.py
+"""
+SQLite connection pool.
+
+DAOs keep calling connection.get_connection() and conn.close(); the pool
+hands out PooledConnection objects whose close() returns them to the pool
+instead of closing the file handle.
+
+- Per-thread affinity: a thread gets back the connection it used last if idle
+  (keeps SQLite's page cache warm for FastAPI's threadpool workers)
+- `size` connections are kept; up to `max_overflow` extra are opened under
+  load and closed again when returned
+- Every new connection gets WAL + tuned pragmas (see PRAGMAS)
+- stats() reports hits / misses / waits for the /metrics endpoint
+"""
+
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dao.exceptions import ConnectionError as DBConnectionError
+
+PRAGMAS = {
+    "journal_mode": "WAL",  # readers no longer block on the writer
+    "synchronous": "NORMAL",  # safe with WAL, one fsync per checkpoint not per commit
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,  # ms to wait on a locked db instead of failing at once
+    "cache_size": -16000,  # KiB (~16 MB page cache per connection)
+    "mmap_size": 268435456,  # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() gives it back to its pool."""
+
+    _pool: Optional["ConnectionPool"] = None
+    _checked_out = False
+
+    def close(self) -> None:
+        pool = self._pool
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+    def close_for_real(self) -> None:
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 8,
+        max_overflow: int = 32,
+        timeout: float = 30.0,
+        pragmas: Optional[Dict[str, Any]] = None,
+    ):
+        self.db_path = db_path
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pragmas = dict(PRAGMAS if pragmas is None else pragmas)
+        self._idle: List[PooledConnection] = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._closed = False
+        # metrics
+        self._acquires = 0
+        self._hits = 0
+        self._affinity_hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+
+    # ---- connections --------------------------------------------------------
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=PooledConnection,
+            check_same_thread=False,  # connections move between worker threads
+            timeout=self.pragmas.get("busy_timeout", 5000) / 1000.0,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn._pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        deadline = time.monotonic() + self.timeout
+        waited_from: Optional[float] = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise DBConnectionError("connection pool is closed")
+                conn = self._take_idle()
+                if conn is not None:
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    self._misses += 1
+                    try:
+                        conn = self._connect()
+                    except sqlite3.Error as e:
+                        self._open -= 1
+                        raise DBConnectionError(f"Connection failed: {e}")
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise DBConnectionError(
+                        f"no database connection available after {self.timeout}s"
+                    )
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self._waits += 1
+                self._cond.wait(remaining)
+
+            if waited_from is not None:
+                self._wait_seconds += time.monotonic() - waited_from
+            conn._checked_out = True
+            self._acquires += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        self._local.last = conn
+        return conn
+
+    def _take_idle(self) -> Optional[PooledConnection]:
+        if not self._idle:
+            return None
+        last = getattr(self._local, "last", None)
+        if last is not None:
+            for i, c in enumerate(self._idle):
+                if c is last:
+                    self._affinity_hits += 1
+                    self._hits += 1
+                    return self._idle.pop(i)
+        self._hits += 1
+        return self._idle.pop()
+
+    def release(self, conn: PooledConnection) -> None:
+        if not conn._checked_out:
+            return  # already returned (double close)
+        conn._checked_out = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # never hand out a connection mid-transaction
+            conn.row_factory = sqlite3.Row
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            if healthy and not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            self._open -= 1
+            self._cond.notify()
+        conn.close_for_real()
+
+    def close_all(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for c in idle:
+            c.close_for_real()
+
+    # ---- metrics ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "db_path": self.db_path,
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "acquires": self._acquires,
+                "hits": self._hits,
+                "affinity_hits": self._affinity_hits,
+                "misses": self._misses,
+                "hit_rate": (
+                    round(self._hits / self._acquires, 4) if self._acquires else 0.0
+                ),
+                "waits": self._waits,
+                "wait_seconds": round(self._wait_seconds, 4),
+                "timeouts": self._timeouts,
+            }
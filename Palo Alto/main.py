@@ -1,15 +1,49 @@
 # main.py
-from fastapi import FastAPI
+import time
+
+_BOOT_T0 = time.perf_counter()
+
+import os
+import threading
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+try:  # orjson serializes large lists of floats/rows several times faster
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.compression import CompressionMiddleware
 from api.routers import auth as auth_router
 from api.routers import users as users_router
 from api.routers import entries as entries_router
 from api.routers import insights as insights_router
 from api.routers import ai as ai_router
+from api.routers import metrics as metrics_router
+from connection import get_connection, close_pools
+from dao.schema import ensure_schema
+from services.model_registry import registry
+from services import entry_service
+from services.analysis_worker import pool as analysis_pool
+from services.event_buffer import event_buffer
+from services.executors import ExecutorBusy, shutdown_executors
+from services.model_registry import heavy_modules_loaded
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=DefaultResponse)
+# Cold start is lazy: no ML library is imported until the first inference or
+# warmup, so auth/users/entries serve as soon as the app is up. GET /metrics
+# reports the timings and which heavy modules are resident.
+app.state.startup = {
+    "import_seconds": round(time.perf_counter() - _BOOT_T0, 4),
+    "ready_seconds": None,
+    "heavy_modules_at_ready": None,
+    "warmup_mode": os.getenv("AI_WARMUP_MODE", "sync"),
+    "warmup_seconds": None,
+}
 app.include_router(ai_router.router)
 # --- CORS: allow your Vite dev server ---
 origins = [
@@ -22,10 +56,78 @@ app.add_middleware(
     allow_credentials=True,  # okay even if you don't use cookies
     allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # entries paging (GET /entries)
 )
+# gzip / brotli above HTTP_COMPRESS_MIN_BYTES (see api/compression.py)
+app.add_middleware(CompressionMiddleware)
 
 # --- Mount routers with the prefixes your frontend uses ---
 app.include_router(auth_router.router, prefix="/auth", tags=["auth"])
 app.include_router(users_router.router, prefix="/users", tags=["users"])
 app.include_router(entries_router.router, prefix="/entries", tags=["entries"])
 app.include_router(insights_router.router, prefix="/insights", tags=["insights"])
+app.include_router(metrics_router.router)
+
+
+# a saturated executor (services.executors) sheds load instead of queueing
+@app.exception_handler(ExecutorBusy)
+async def executor_busy(request: Request, exc: ExecutorBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.on_event("startup")
+def migrate_db():
+    conn = get_connection()
+    try:
+        ensure_schema(conn)
+    finally:
+        conn.close()
+
+
+# --- Background analysis workers (AI_ASYNC_ANALYSIS=1) ---
+@app.on_event("startup")
+def start_analysis_workers():
+    if entry_service.ASYNC_ANALYSIS:
+        analysis_pool.start()
+
+
+@app.on_event("shutdown")
+def stop_analysis_workers():
+    analysis_pool.stop()
+    shutdown_executors()
+    event_buffer.close()  # buffered events still need the pool
+    close_pools()
+
+
+# --- Optional model warmup: AI_WARMUP=all or a comma list, e.g. "sentiment,embedder" ---
+# AI_WARMUP_MODE=sync (default) loads before serving; background loads in a
+# thread so non-AI routes are up immediately and AI routes wait on first use.
+def _warmup(names):
+    t0 = time.perf_counter()
+    registry.warmup(names)
+    app.state.startup["warmup_seconds"] = round(time.perf_counter() - t0, 4)
+
+
+@app.on_event("startup")
+def warmup_models():
+    wanted = os.getenv("AI_WARMUP", "").strip()
+    if not wanted:
+        return
+    names = None if wanted == "all" else [n.strip() for n in wanted.split(",") if n.strip()]
+    if app.state.startup["warmup_mode"] == "background":
+        threading.Thread(
+            target=_warmup, args=(names,), name="model-warmup", daemon=True
+        ).start()
+    else:
+        _warmup(names)
+
+
+# registered last so it runs after the other startup hooks
+@app.on_event("startup")
+def mark_ready():
+    app.state.startup["ready_seconds"] = round(time.perf_counter() - _BOOT_T0, 4)
+    app.state.startup["heavy_modules_at_ready"] = heavy_modules_loaded()
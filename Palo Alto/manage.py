@@ -0,0 +1,137 @@
+# manage.py
+"""
+Maintenance commands. Run from the Palo Alto folder:
+
+    python manage.py migrate
+    python manage.py convert-embeddings --format f16
+    python manage.py fts-rebuild
+    python manage.py rebuild-rollups
+    AI_BACKEND=onnx-int8 python manage.py ai-parity --samples 200
+    AI_INFERENCE_SOCKET=/tmp/journal-ai.sock python manage.py inference-server --warmup all
+"""
+import argparse
+import sys
+
+from connection import get_connection
+from dao.schema import ensure_schema, rebuild_entries_fts
+
+
+def cmd_migrate(args) -> None:
+    conn = get_connection()
+    try:
+        ensure_schema(conn)
+    finally:
+        conn.close()
+    print("schema up to date")
+
+
+def cmd_convert_embeddings(args) -> None:
+    from dao.insight_dao import InsightDAO
+
+    cmd_migrate(args)
+    n = InsightDAO(embedding_format=args.format).convert_embeddings(batch=args.batch)
+    print(f"converted {n} embeddings to {args.format}")
+
+
+def cmd_fts_rebuild(args) -> None:
+    conn = get_connection()
+    try:
+        ensure_schema(conn)
+        rebuild_entries_fts(conn)
+        conn.commit()
+        n = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"indexed {n} entries for full-text search")
+
+
+def cmd_rebuild_rollups(args) -> None:
+    from dao.rollup_dao import RollupDAO
+
+    cmd_migrate(args)
+    n = RollupDAO().rebuild()
+    print(f"rebuilt {n} daily rollups")
+
+
+def cmd_ai_parity(args) -> int:
+    import json
+
+    from services import inference_backends
+    from services.model_registry import EMBED_MODEL, SENTIMENT_MODEL
+
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT text FROM entries WHERE TRIM(COALESCE(text, '')) <> '' "
+            "ORDER BY id DESC LIMIT ?",
+            (args.samples,),
+        ).fetchall()
+    finally:
+        conn.close()
+    report = inference_backends.parity_report(
+        [r[0] for r in rows],
+        sentiment_model=SENTIMENT_MODEL,
+        embed_model=EMBED_MODEL,
+        backend=args.backend,
+    )
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+def cmd_inference_server(args) -> None:
+    import logging
+
+    from services import inference_server
+
+    logging.basicConfig(level=logging.INFO)
+    socket = args.socket or inference_server.SOCKET_PATH
+    if not socket:
+        sys.exit("set AI_INFERENCE_SOCKET or pass --socket")
+    warmup = None
+    if args.warmup:
+        warmup = [] if args.warmup == "all" else args.warmup.split(",")
+    inference_server.serve(socket, warmup=warmup)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Journaling Companion maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="create missing tables/columns")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser(
+        "convert-embeddings", help="rewrite stored embeddings (e.g. JSON -> f32 BLOB)"
+    )
+    p.add_argument("--format", choices=["f32", "f16", "json"], default="f32")
+    p.add_argument("--batch", type=int, default=500)
+    p.set_defaults(func=cmd_convert_embeddings)
+
+    p = sub.add_parser("fts-rebuild", help="re-index all entries for keyword search")
+    p.set_defaults(func=cmd_fts_rebuild)
+
+    p = sub.add_parser(
+        "rebuild-rollups", help="recompute daily_rollups from entries + insights"
+    )
+    p.set_defaults(func=cmd_rebuild_rollups)
+
+    p = sub.add_parser(
+        "ai-parity", help="compare an AI backend's outputs against eager PyTorch"
+    )
+    p.add_argument("--samples", type=int, default=200)
+    p.add_argument("--backend", choices=["onnx", "onnx-int8"], default=None)
+    p.set_defaults(func=cmd_ai_parity)
+
+    p = sub.add_parser(
+        "inference-server", help="hold the AI models for all API workers (Unix socket)"
+    )
+    p.add_argument("--socket", default=None, help="default: AI_INFERENCE_SOCKET")
+    p.add_argument("--warmup", default=None, help='"all" or e.g. "sentiment,embedder"')
+    p.set_defaults(func=cmd_inference_server)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# Job lifecycle: pending -> running -> done | (pending again on retry) | failed
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class AnalysisJob:
+    id: Optional[int]
+    entry_id: int
+    user_id: int
+    status: str = STATUS_PENDING
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    # bumped by every enqueue; a worker's claim is only valid for its generation
+    generation: int = 0
@@ -0,0 +1,69 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+
+@dataclass
+class DailyRollup:
+    """One daily_rollups row: a user's entries and sentiment for one day."""
+
+    user_id: int
+    day: str  # YYYY-MM-DD
+    entry_count: int = 0
+    insight_count: int = 0
+    sentiment_sum: float = 0.0
+    sentiment_sq_sum: float = 0.0
+    sentiment_min: Optional[float] = None
+    sentiment_max: Optional[float] = None
+    themes: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class RollupTotals:
+    """Several DailyRollup rows added together (e.g. one week)."""
+
+    entry_count: int = 0
+    insight_count: int = 0
+    sentiment_sum: float = 0.0
+    sentiment_sq_sum: float = 0.0
+    sentiment_min: Optional[float] = None
+    sentiment_max: Optional[float] = None
+    themes: Counter = field(default_factory=Counter)
+
+    @classmethod
+    def of(cls, rows: Iterable[DailyRollup]) -> "RollupTotals":
+        t = cls()
+        for r in rows:
+            t.add(r)
+        return t
+
+    def add(self, r: DailyRollup) -> None:
+        self.entry_count += r.entry_count
+        self.insight_count += r.insight_count
+        self.sentiment_sum += r.sentiment_sum
+        self.sentiment_sq_sum += r.sentiment_sq_sum
+        if r.sentiment_min is not None:
+            self.sentiment_min = (
+                r.sentiment_min
+                if self.sentiment_min is None
+                else min(self.sentiment_min, r.sentiment_min)
+            )
+        if r.sentiment_max is not None:
+            self.sentiment_max = (
+                r.sentiment_max
+                if self.sentiment_max is None
+                else max(self.sentiment_max, r.sentiment_max)
+            )
+        self.themes.update(r.themes)
+
+    @property
+    def mean(self) -> float:
+        return self.sentiment_sum / self.insight_count if self.insight_count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if not self.insight_count:
+            return 0.0
+        var = self.sentiment_sq_sum / self.insight_count - self.mean**2
+        return math.sqrt(max(0.0, var))
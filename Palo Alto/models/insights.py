@@ -11,6 +11,7 @@ class Insight:
         embedding: List[float],
         created_at: datetime,
         id: Optional[int] = None,
+        content_hash: Optional[str] = None,
     ):
         self._id = id
         self._entry_id = entry_id
@@ -18,6 +19,7 @@ class Insight:
         self._themes = themes
         self._embedding = embedding
         self._created_at = created_at
+        self._content_hash = content_hash
 
     # id
     @property
@@ -81,6 +83,15 @@ class Insight:
             raise ValueError("created_at must be a datetime object")
         self._created_at = value
 
+    # content_hash (what was analyzed; see services.analysis_cache)
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self._content_hash
+
+    @content_hash.setter
+    def content_hash(self, value: Optional[str]):
+        self._content_hash = value
+
     # convert object to dictionary (JSON-friendly)
     def to_dict(self) -> dict:
         return {
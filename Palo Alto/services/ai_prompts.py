@@ -14,14 +14,14 @@ Requires: transformers, torch, sentencepiece, safetensors
 from __future__ import annotations
 import random
 import re
-from typing import List, Sequence, Any, Optional
-
-import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+import threading
+from typing import Iterator, List, Sequence, Any, Optional
 
 from dao.entry_dao import EntryDAO
+from services.inference_server import get_client
+from services.model_registry import registry, PROMPT_MODEL
 
-MODEL_NAME = "google/flan-t5-base"  # lightweight instruction-tuned model
+MODEL_NAME = PROMPT_MODEL  # lightweight instruction-tuned model
 
 # Decoding settings for variety without going off the rails
 GEN_CFG = {
@@ -48,6 +48,128 @@ def _jaccard(a: str, b: str) -> float:
     return len(ta & tb) / len(ta | tb)
 
 
+# Fallback bank if the model returns too few
+FALLBACK_PROMPTS = [
+    "What is a 5-minute step you can take next?",
+    "Who or what made today a little easier?",
+    "What felt heavy or light today, and why?",
+    "What boundary could protect your energy this week?",
+    "What small win are you grateful for today?",
+    "What would make tomorrow 1% better?",
+]
+
+JACCARD_DUP = 0.6  # prompts at least this similar count as repeats
+
+
+def dedup_prompts(
+    existing: Sequence[str], candidates: Sequence[str], limit: Optional[int] = None
+) -> List[str]:
+    """
+    Candidates not too similar (by _jaccard) to `existing` or to each other,
+    in order, at most `limit` of them.
+    """
+    kept: List[str] = []
+    for s in candidates:
+        if limit is not None and len(kept) >= limit:
+            break
+        if all(_jaccard(s, t) < JACCARD_DUP for t in (*existing, *kept)):
+            kept.append(s)
+    return kept
+
+
+def fill_from_bank(prompts: List[str], k: int) -> List[str]:
+    if len(prompts) >= k:
+        return prompts[:k]
+    bank = FALLBACK_PROMPTS[:]
+    random.shuffle(bank)
+    return prompts + dedup_prompts(prompts, bank, limit=k - len(prompts))
+
+
+def generate_text(instruction: str, gen_cfg: dict) -> str:
+    """One FLAN-T5 generation on this process's model (shared via the registry)."""
+    tok, model, device = registry.get("prompter")
+
+    import torch  # deferred: only needed once the model is loaded
+
+    inputs = tok(instruction, return_tensors="pt").to(device)
+    with torch.no_grad():
+        out = model.generate(**inputs, **gen_cfg)
+    return tok.decode(out[0], skip_special_tokens=True)
+
+
+def generate_text_stream(instruction: str, gen_cfg: dict) -> Iterator[str]:
+    """
+    Like generate_text but yields decoded text pieces as tokens are produced
+    (transformers TextIteratorStreamer; generate runs on a helper thread).
+    Closing the iterator stops generation at the next token.
+    """
+    tok, model, device = registry.get("prompter")
+
+    import torch
+    from transformers import (
+        StoppingCriteria,
+        StoppingCriteriaList,
+        TextIteratorStreamer,
+    )
+
+    stop = threading.Event()
+
+    class _Stop(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return stop.is_set()
+
+    streamer = TextIteratorStreamer(
+        tok, skip_prompt=True, skip_special_tokens=True, timeout=120
+    )
+    inputs = tok(instruction, return_tensors="pt").to(device)
+
+    def run():
+        with torch.no_grad():
+            model.generate(
+                **inputs,
+                **gen_cfg,
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([_Stop()]),
+            )
+
+    worker = threading.Thread(target=run, name="prompt-stream", daemon=True)
+    worker.start()
+    try:
+        for piece in streamer:
+            if piece:
+                yield piece
+    finally:
+        stop.set()
+        worker.join()
+
+
+# FLAN-T5's vocabulary has no newline, so questions often arrive on one line;
+# a "?" followed by whitespace also ends a question
+_SEGMENT_END = re.compile(r"\n|(?<=\?)\s+")
+
+
+class QuestionSplitter:
+    """Incrementally cut streamed text into cleaned candidate questions."""
+
+    def __init__(self):
+        self._buf = ""
+
+    def feed(self, piece: str) -> List[str]:
+        self._buf += piece
+        parts = _SEGMENT_END.split(self._buf)
+        self._buf = parts.pop()  # last part may still be growing
+        return self._clean(parts)
+
+    def flush(self) -> List[str]:
+        rest, self._buf = self._buf, ""
+        return self._clean([rest])
+
+    @staticmethod
+    def _clean(parts: List[str]) -> List[str]:
+        lines = [_strip_bullets(s) for s in parts]
+        return [s for s in lines if s and len(s) > 3]
+
+
 def _get_field(obj: Any, key: str, default: Any = None) -> Any:
     """Access obj.key or obj['key'] interchangeably."""
     if obj is None:
@@ -59,18 +181,20 @@ def _get_field(obj: Any, key: str, default: Any = None) -> Any:
 
 class AIPrompts:
     def __init__(self, entry_dao: Optional[EntryDAO] = None):
-        self._tok = None
-        self._model = None
-        self._device = "cuda" if torch.cuda.is_available() else "cpu"
         self.entries = entry_dao or EntryDAO()
 
-    # Lazy-load model to keep startup snappy
-    def _ensure_loaded(self):
-        if self._tok is None or self._model is None:
-            self._tok = AutoTokenizer.from_pretrained(MODEL_NAME)
-            self._model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
-            self._model.to(self._device)
-            self._model.eval()
+    def _generate(self, instruction: str, gen_cfg: dict) -> str:
+        """Run the model here, or in the inference server when one is configured."""
+        client = get_client()
+        if client is not None:
+            return client.call("generate", instruction, gen_cfg)
+        return generate_text(instruction, gen_cfg)
+
+    def _generate_stream(self, instruction: str, gen_cfg: dict) -> Iterator[str]:
+        client = get_client()
+        if client is not None:
+            return client.stream("generate_stream", instruction, gen_cfg)
+        return generate_text_stream(instruction, gen_cfg)
 
     # ---- DAO-flexible fetch -------------------------------------------------
 
@@ -139,14 +263,10 @@ class AIPrompts:
             trimmed.append(t)
         return trimmed
 
-    def suggest(
-        self, *, user_id: int, k: int = 5, goal_hint: Optional[str] = None
-    ) -> List[str]:
-        """
-        Generate K short reflection questions grounded in the user's recent entries.
-        """
-        self._ensure_loaded()
-
+    def _build_request(
+        self, user_id: int, k: int, goal_hint: Optional[str]
+    ) -> tuple[str, dict]:
+        """The instruction text and jittered decoding settings for one model run."""
         context_snips = self._sample_context_snippets(user_id, k_entries=5)
         context_block = (
             "No prior notes available."
@@ -174,39 +294,62 @@ class AIPrompts:
         jitter = random.uniform(-0.1, 0.1)
         gcfg["temperature"] = max(0.8, min(1.1, GEN_CFG["temperature"] + jitter))
 
-        inputs = self._tok(instruction, return_tensors="pt").to(self._device)
-        with torch.no_grad():
-            out = self._model.generate(**inputs, **gcfg)
+        return instruction, gcfg
 
-        text = self._tok.decode(out[0], skip_special_tokens=True)
+    def suggest(
+        self, *, user_id: int, k: int = 5, goal_hint: Optional[str] = None
+    ) -> List[str]:
+        """
+        Generate K short reflection questions grounded in the user's recent entries.
+        """
+        k = max(3, min(7, k))
+        final = self.generate_candidates(user_id=user_id, k=k, goal_hint=goal_hint)
+        return fill_from_bank(final, k)
 
-        # Split lines, clean bullets and numbers
-        lines = [_strip_bullets(s) for s in text.splitlines()]
-        lines = [s for s in lines if s and len(s) > 3]
+    def generate_candidates(
+        self, *, user_id: int, k: int = 5, goal_hint: Optional[str] = None
+    ) -> List[str]:
+        """
+        One model run: up to K de-duplicated questions, without the fallback
+        bank (services.prompt_cache pools these across calls).
+        """
+        instruction, gcfg = self._build_request(user_id, k, goal_hint)
+        text = self._generate(instruction, gcfg)
+
+        # Same cuts as stream(): newlines and "?" + whitespace, bullets stripped
+        splitter = QuestionSplitter()
+        lines = splitter.feed(text) + splitter.flush()
 
         # De-dup by Jaccard similarity
-        final: List[str] = []
-        for s in lines:
-            if all(_jaccard(s, t) < 0.6 for t in final):
-                final.append(s)
-            if len(final) >= k:
-                break
-
-        # Fallback bank if model returns too few
-        if len(final) < k:
-            bank = [
-                "What is a 5-minute step you can take next?",
-                "Who or what made today a little easier?",
-                "What felt heavy or light today, and why?",
-                "What boundary could protect your energy this week?",
-                "What small win are you grateful for today?",
-                "What would make tomorrow 1% better?",
-            ]
-            random.shuffle(bank)
-            for q in bank:
-                if all(_jaccard(q, t) < 0.6 for t in final):
-                    final.append(q)
-                if len(final) >= k:
-                    break
-
-        return final
+        return dedup_prompts([], lines, limit=k)
+
+    def stream(
+        self, *, user_id: int, k: int = 5, goal_hint: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Like suggest(), but yields each question as soon as the model has
+        finished it. Bullet stripping and _jaccard de-dup run per question;
+        generation stops once K are out, and the fallback bank tops up at
+        the end if the model produced too few.
+        """
+        k = max(3, min(7, k))
+        instruction, gcfg = self._build_request(user_id, k, goal_hint)
+
+        emitted: List[str] = []
+        splitter = QuestionSplitter()
+        pieces = self._generate_stream(instruction, gcfg)
+        try:
+            for piece in pieces:
+                for q in dedup_prompts(emitted, splitter.feed(piece)):
+                    emitted.append(q)
+                    yield q
+                    if len(emitted) >= k:
+                        return
+            for q in dedup_prompts(emitted, splitter.flush(), limit=k - len(emitted)):
+                emitted.append(q)
+                yield q
+        finally:
+            close = getattr(pieces, "close", None)
+            if close is not None:
+                close()  # stops generation early when K were reached
+        yield from fill_from_bank(emitted, k)[len(emitted) :]
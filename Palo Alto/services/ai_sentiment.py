@@ -1,34 +1,76 @@
 # services/ai_sentiment.py
 from __future__ import annotations
-from typing import List, Tuple
-import torch
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer
+import os
+from typing import List, Optional, Tuple
 import numpy as np
 
 # NEW: better theme extraction
 from services.ai_themes import extract_themes
+from services.inference_batcher import MicroBatcher
+from services.inference_server import get_client
+from services.model_registry import registry
+
+# Micro-batching: concurrent single-text calls are merged into one padded batch.
+# Each caller blocks an ai executor worker while it waits, so a batch from one
+# web process never grows past AI_EXECUTOR_WORKERS (which defaults to this
+# size; see services.executors)
+BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("AI_BATCH_MAX_WAIT_MS", "10"))
+
+
+def _label_to_score(out: dict) -> float:
+    label = out["label"].upper()
+    score = float(out["score"])
+    return score if label == "POSITIVE" else -score
+
+
+def _sentiment_batch(texts: List[str]) -> List[float]:
+    client = get_client()
+    if client is not None:  # models live in the inference server process
+        return client.call("sentiment", texts)
+    # simple, accurate SST-2 classifier from HF; the pipeline pads the batch
+    sent_pipe = registry.get("sentiment")
+    outs = sent_pipe(
+        [t[:4096] for t in texts], batch_size=len(texts), truncation=True
+    )
+    return [_label_to_score(o) for o in outs]
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    client = get_client()
+    if client is not None:
+        return client.call("embed", texts)
+    embedder = registry.get("embedder")
+    vecs = embedder.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+    if isinstance(vecs, np.ndarray):
+        return vecs.tolist()
+    return [list(map(float, v)) for v in vecs]
+
+
+# One queue per model, shared by every AISentiment in the process
+_sentiment_batcher = MicroBatcher(
+    _sentiment_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="sentiment"
+)
+_embed_batcher = MicroBatcher(
+    _embed_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="embedder"
+)
+
+
+def batcher_stats() -> List[dict]:
+    return [_sentiment_batcher.stats(), _embed_batcher.stats()]
 
 
 class AISentiment:
-    def __init__(self):
-        self._sent_pipe = None
-        self._embed = None
-        self._device = 0 if torch.cuda.is_available() else -1
-
-    def _ensure_sent(self):
-        if self._sent_pipe is None:
-            # simple, accurate SST-2 classifier from HF
-            self._sent_pipe = pipeline(
-                "sentiment-analysis",
-                model="distilbert-base-uncased-finetuned-sst-2-english",
-                device=self._device,
-            )
-
-    def _ensure_embedder(self):
-        if self._embed is None:
-            # good all-round encoder that works well on journaling text
-            self._embed = SentenceTransformer("intfloat/e5-base")
+    """
+    Thin facade over the shared models in services.model_registry.
+    Cheap to construct; models are loaded once per process, on first use.
+
+    With batched=True (default) single-text calls go through the shared
+    micro-batchers so concurrent requests share one forward pass.
+    """
+
+    def __init__(self, batched: bool = True):
+        self.batched = batched
 
     # ---- Public API ---------------------------------------------------------
 
@@ -40,20 +82,63 @@ class AISentiment:
             return 0.0, []
 
         # sentiment
-        self._ensure_sent()
-        out = self._sent_pipe(text[:4096])[0]
-        label = out["label"].upper()
-        score = float(out["score"])
-        sent = score if label == "POSITIVE" else -score
+        if self.batched:
+            sent = _sentiment_batcher(text)
+        else:
+            sent = _sentiment_batch([text])[0]
 
         # themes (KeyBERT + YAKE + optional spaCy noun-chunks)
-        themes = extract_themes(text, top_k=3)
+        themes = self.themes(text, top_k=3)
 
         return sent, themes
 
+    def analyze_full(self, text: str) -> Tuple[float, List[str], List[float]]:
+        """
+        Sentiment, themes and embedding for one entry. The embedding is
+        computed once and handed to KeyBERT, which runs on the same encoder,
+        so themes only cost a pass over the candidate phrases. Sentiment is
+        queued first and batches with other callers in the meantime.
+        """
+        if not text or not text.strip():
+            return 0.0, [], self.embed_entries([text or ""])[0]
+        if not self.batched:
+            sent = _sentiment_batch([text])[0]
+            emb = _embed_batch([text])[0]
+            return sent, self.themes(text, doc_embedding=emb), emb
+
+        sent_f = _sentiment_batcher.submit(text)
+        emb = _embed_batcher.submit(text).result()
+        themes = self.themes(text, doc_embedding=emb)
+        return sent_f.result(), themes, emb
+
+    def themes(
+        self,
+        text: str,
+        top_k: int = 3,
+        doc_embedding: Optional[List[float]] = None,
+    ) -> List[str]:
+        """
+        Themes only (KeyBERT + YAKE); thread-safe, CPU bound. Pass the entry's
+        embedding when it is already known to avoid encoding the text again.
+        """
+        if not text or not text.strip():
+            return []
+        client = get_client()
+        if client is not None:
+            return client.call("themes", text, top_k=top_k, doc_embedding=doc_embedding)
+        return extract_themes(text, top_k=top_k, doc_embedding=doc_embedding)
+
+    def sentiment_batch(self, texts: List[str]) -> List[float]:
+        """Direct batched sentiment for callers that already hold many texts."""
+        return _sentiment_batch(texts) if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query with the same encoder used for entries."""
+        return self.embed_entries([text])[0]
+
     def embed_entries(self, texts: List[str]) -> List[List[float]]:
-        self._ensure_embedder()
-        vecs = self._embed.encode(texts, normalize_embeddings=True)
-        if isinstance(vecs, np.ndarray):
-            return vecs.tolist()
-        return [list(map(float, v)) for v in vecs]
+        if not texts:
+            return []
+        if self.batched:
+            return _embed_batcher.map(texts)
+        return _embed_batch(texts)
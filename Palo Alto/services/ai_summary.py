@@ -1,28 +1,12 @@
 # services/ai_summary.py
 from __future__ import annotations
-import json
 import re
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
 from collections import Counter
-from typing import Dict, List, Any, Iterable
+from typing import Dict, List, Any, Iterable, Optional
 
 from dao.insight_dao import InsightDAO
-
-
-def _to_dt(x) -> datetime | None:
-    if x is None:
-        return None
-    if isinstance(x, datetime):
-        return x
-    s = str(x)
-    try:
-        return datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except Exception:
-        pass
-    try:
-        return datetime.strptime(s[:19], "%Y-%m-%d %H:%M:%S")
-    except Exception:
-        return None
+from dao.rollup_dao import RollupDAO
 
 
 def _monday_of_week(today: date) -> date:
@@ -180,48 +164,30 @@ def _humanize_list(items: List[str]) -> str:
 class AISummary:
     """Weekly recap for the current user (Mon..Sun)."""
 
-    def __init__(self, insights: InsightDAO):
+    def __init__(self, insights: InsightDAO, rollups: Optional[RollupDAO] = None):
         self.insights = insights
+        self.rollups = rollups or RollupDAO()
 
     def weekly(self, user_id: int) -> Dict[str, Any]:
         today = date.today()
         week_start = _monday_of_week(today)
-        window_start = datetime.combine(week_start, datetime.min.time())
-        window_end = window_start + timedelta(days=7)
-
-        rows = self.insights.get_for_user(user_id=user_id, limit=1000)
 
-        week_rows: List[Dict[str, Any]] = []
-        for r in rows:
-            dt = _to_dt(r.get("created_at"))
-            if dt and window_start <= dt < window_end:
-                week_rows.append(r)
+        # seven pre-aggregated daily_rollups rows instead of scanning entries
+        totals = self.rollups.totals(
+            user_id, week_start.isoformat(), (week_start + timedelta(days=7)).isoformat()
+        )
 
-        if not week_rows:
+        if not totals.entry_count:
             return {
                 "summary": "No entries this week. If you’d like, jot one small note about today—two sentences is plenty.",
                 "insights": {"count": 0, "avg_sentiment": 0.0, "themes": []},
                 "week_start": week_start.isoformat(),
             }
 
-        sentiments = [
-            float(r.get("sentiment") or 0.0)
-            for r in week_rows
-            if r.get("sentiment") is not None
-        ]
-        avg = sum(sentiments) / max(1, len(sentiments))
-
-        # Gather all raw themes
-        all_themes: List[str] = []
-        for r in week_rows:
-            th = r.get("themes")
-            if isinstance(th, str):
-                try:
-                    th = json.loads(th)
-                except Exception:
-                    th = []
-            if isinstance(th, list):
-                all_themes.extend([str(x) for x in th])
+        avg = totals.mean
+
+        # Gather all raw themes (each occurrence counts, as before)
+        all_themes: List[str] = list(totals.themes.elements())
 
         clean = _clean_themes(all_themes, top_k=3)
 
@@ -247,7 +213,7 @@ class AISummary:
             )
 
         sentences.append(
-            f"You logged {len(week_rows)} entries. That consistency matters."
+            f"You logged {totals.entry_count} entries. That consistency matters."
         )
 
         summary = " ".join(sentences)
@@ -255,7 +221,7 @@ class AISummary:
         return {
             "summary": summary,
             "insights": {
-                "count": len(week_rows),
+                "count": totals.entry_count,
                 "avg_sentiment": avg,
                 "themes": clean,
             },
@@ -8,26 +8,48 @@ Human-friendly theme extraction for short journal entries.
 - Returns top_k short, readable themes
 
 Requires: keybert, yake, sentence-transformers
+KeyBERT reuses the registry's e5 encoder; pass doc_embedding (the entry's
+stored embedding) to skip re-encoding the document.
 """
 
 from __future__ import annotations
-from typing import List, Tuple, Optional, Iterable
+from typing import List, Tuple, Optional, Iterable, Sequence
 import re
 
-# --- YAKE --------------------------------------------------------------------
-try:
-    import yake  # type: ignore
-except Exception:  # pragma: no cover
-    yake = None
+import numpy as np
 
-# --- KeyBERT -----------------------------------------------------------------
-try:
-    from keybert import KeyBERT  # type: ignore
-except Exception:  # pragma: no cover
-    KeyBERT = None  # type: ignore
+from services.inference_backends import keybert_model
+from services.model_registry import registry
+
+# --- optional libraries, imported on first use ------------------------------
+# keybert pulls in sentence-transformers + torch; importing it here would make
+# every process that touches this module (auth/CRUD workers too) pay for it.
+_UNSET = object()
+_yake: object = _UNSET
+_keybert_cls: object = _UNSET
+
+
+def _get_yake():
+    global _yake
+    if _yake is _UNSET:
+        try:
+            import yake  # type: ignore
+        except Exception:  # pragma: no cover
+            yake = None
+        _yake = yake
+    return _yake
+
+
+def _get_keybert():
+    global _keybert_cls
+    if _keybert_cls is _UNSET:
+        try:
+            from keybert import KeyBERT  # type: ignore
+        except Exception:  # pragma: no cover
+            KeyBERT = None  # type: ignore
+        _keybert_cls = KeyBERT
+    return _keybert_cls
 
-# Keep a single KeyBERT instance (it loads a sentence-transformer under the hood)
-_KB: Optional["KeyBERT"] = None
 
 # ---------------------- Heuristic filters (no spaCy) -------------------------
 
@@ -182,6 +204,7 @@ def _is_meaningful_token(tok: str) -> bool:
 
 
 def _yake_candidates(text: str, top_n: int = 5) -> List[Tuple[str, float]]:
+    yake = _get_yake()
     if not yake:
         return []
     kw = yake.KeywordExtractor(lan="en", n=2, top=top_n, dedupLim=0.9)
@@ -193,19 +216,28 @@ def _yake_candidates(text: str, top_n: int = 5) -> List[Tuple[str, float]]:
     return [(_norm(p), 1.0 - (s / hi)) for p, s in out]  # higher is better
 
 
-def _keybert_candidates(text: str, top_n: int = 5) -> List[Tuple[str, float]]:
-    global _KB
+def _keybert_candidates(
+    text: str, top_n: int = 5, doc_embedding: Optional[Sequence[float]] = None
+) -> List[Tuple[str, float]]:
+    KeyBERT = _get_keybert()
     if KeyBERT is None:
         return []
-    if _KB is None:
-        _KB = KeyBERT()
-    cands = _KB.extract_keywords(
+    # KeyBERT on top of the shared e5 encoder (no second sentence-transformer);
+    # the wrapper itself is cheap and holds no model of its own
+    kb = KeyBERT(model=keybert_model(registry.get("embedder")))
+    kwargs = {}
+    if doc_embedding is not None and len(doc_embedding):
+        # the entry was already embedded with this encoder: only the candidate
+        # phrases need a forward pass
+        kwargs["doc_embeddings"] = np.asarray([doc_embedding], dtype=np.float32)
+    cands = kb.extract_keywords(
         text,
         keyphrase_ngram_range=(1, 2),
         stop_words="english",
         top_n=top_n,
         use_maxsum=True,
         nr_candidates=20,
+        **kwargs,
     )
     return [(_norm(p), float(s)) for p, s in cands]
 
@@ -255,7 +287,9 @@ def _clean_phrase(p: str) -> str | None:
     return f"{t1} {t2}"
 
 
-def extract_themes(text: str, top_k: int = 3) -> List[str]:
+def extract_themes(
+    text: str, top_k: int = 3, doc_embedding: Optional[Sequence[float]] = None
+) -> List[str]:
     """
     Return up to top_k short, human-friendly themes for the given entry text.
     """
@@ -264,7 +298,7 @@ def extract_themes(text: str, top_k: int = 3) -> List[str]:
 
     # gather candidates
     cand = []
-    cand += _keybert_candidates(text, top_n=6)
+    cand += _keybert_candidates(text, top_n=6, doc_embedding=doc_embedding)
     cand += _yake_candidates(text, top_n=6)
 
     # sort by score desc, then by shorter length
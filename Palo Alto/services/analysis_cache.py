@@ -0,0 +1,37 @@
+# services/analysis_cache.py
+"""
+Content hashes for AI analysis results.
+
+Every insight stores content_hash = sha256(ANALYSIS_VERSION + normalized text).
+When an entry is saved again and its text hashes to the stored value, running
+the models would only reproduce what is already there, so analysis is skipped.
+Title-only edits never change the hash (the title is not analyzed), and
+changing a model or the theme pipeline changes ANALYSIS_VERSION, which marks
+every stored insight as stale.
+"""
+import hashlib
+import os
+import re
+import unicodedata
+
+from services.model_registry import EMBED_MODEL, SENTIMENT_MODEL
+
+# bump when theme extraction / post-processing changes in a way that matters
+# (2: KeyBERT candidates scored with the e5 encoder)
+PIPELINE_REV = os.getenv("AI_PIPELINE_REV", "2")
+ANALYSIS_VERSION = f"{SENTIMENT_MODEL}|{EMBED_MODEL}|pipeline-{PIPELINE_REV}"
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFC, collapsed whitespace, trimmed: edits that only touch these don't count."""
+    return _WS.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def content_hash(text: str, version: str = ANALYSIS_VERSION) -> str:
+    h = hashlib.sha256()
+    h.update(version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalize_text(text).encode("utf-8"))
+    return h.hexdigest()
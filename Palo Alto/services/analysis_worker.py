@@ -0,0 +1,117 @@
+# services/analysis_worker.py
+"""
+Background worker pool that drains the analysis_jobs table.
+
+EntryService (in async mode) only commits the entry and enqueues a job;
+these threads claim jobs one at a time, run the AI analysis through
+EntryService.reanalyze and record the outcome. Failures are retried with
+exponential backoff up to max_attempts, then the job is marked 'failed'.
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Callable, List, Optional
+
+from dao.analysis_job_dao import AnalysisJobDAO
+
+log = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("AI_ANALYSIS_WORKERS", "2"))
+MAX_ATTEMPTS = int(os.getenv("AI_ANALYSIS_MAX_ATTEMPTS", "3"))
+RETRY_BASE_S = float(os.getenv("AI_ANALYSIS_RETRY_BASE_S", "5"))
+POLL_INTERVAL_S = float(os.getenv("AI_ANALYSIS_POLL_S", "0.5"))
+
+
+def _default_service_factory():
+    from dao.entry_dao import EntryDAO
+    from services.entry_service import EntryService
+
+    return EntryService(EntryDAO(), async_analysis=False)
+
+
+class AnalysisWorkerPool:
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        jobs: Optional[AnalysisJobDAO] = None,
+        service_factory: Callable = _default_service_factory,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_base_s: float = RETRY_BASE_S,
+        poll_interval_s: float = POLL_INTERVAL_S,
+    ):
+        self.workers = workers
+        self.jobs = jobs or AnalysisJobDAO()
+        self.service_factory = service_factory
+        self.max_attempts = max_attempts
+        self.retry_base_s = retry_base_s
+        self.poll_interval_s = poll_interval_s
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self.jobs.requeue_running()
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._loop, name=f"analysis-worker-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake idle workers right away (called after enqueue)."""
+        self._wake.set()
+
+    def run_once(self, service=None) -> bool:
+        """Claim and process a single job. Returns False when the queue is empty."""
+        job = self.jobs.claim_next()
+        if job is None:
+            return False
+        svc = service or self.service_factory()
+        try:
+            # None if the entry was deleted meanwhile; repeated saves of the same
+            # text (autosave) find the insight current and skip the models
+            svc.reanalyze(job.entry_id, force=False)
+            if not self.jobs.mark_done(job):
+                log.debug("entry %s changed while analyzed; job re-queued", job.entry_id)
+        except Exception as e:
+            delay = self.retry_base_s * (2 ** max(0, job.attempts - 1))
+            status = self.jobs.mark_failed(
+                job, f"{type(e).__name__}: {e}", self.max_attempts, delay
+            )
+            log.warning(
+                "analysis job %s for entry %s failed (attempt %s, now %s): %s",
+                job.id,
+                job.entry_id,
+                job.attempts,
+                status,
+                e,
+            )
+        return True
+
+    def _loop(self) -> None:
+        svc = self.service_factory()
+        while not self._stop.is_set():
+            try:
+                if self.run_once(svc):
+                    continue
+            except Exception:
+                log.exception("analysis worker error")
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+
+
+# Process-wide pool, started from main.py when AI_ASYNC_ANALYSIS is on
+pool = AnalysisWorkerPool()
@@ -0,0 +1,93 @@
+# services/analytics_service.py
+"""
+Server-side aggregates for the Analytics page.
+
+Responses are columnar ({"dates": [...], "count": [...], ...}) so the payload
+grows with the number of active days in the range, not with the number of
+entries, and the browser doesn't have to group anything itself.
+
+Numbers come from daily_rollups (one row per user and active day); the
+EntryDAO.activity / InsightDAO.sentiment_timeseries scans give the same
+result straight from the base tables.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from dao.entry_dao import BUCKET_SQL
+from dao.rollup_dao import RollupDAO
+
+DEFAULT_RANGE_DAYS = 90
+MAX_RANGE_DAYS = 3660  # ~10 years
+
+
+def resolve_range(
+    start: Optional[date], end: Optional[date], default_days: int = DEFAULT_RANGE_DAYS
+) -> Tuple[date, date]:
+    """Inclusive [start, end]; defaults to the last `default_days` days."""
+    end = end or date.today()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise ValueError("start must be on or before end")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+class AnalyticsService:
+    def __init__(self, rollup_dao: Optional[RollupDAO] = None):
+        self.rollup_dao = rollup_dao or RollupDAO()
+
+    @staticmethod
+    def _bounds(
+        start: Optional[date], end: Optional[date], bucket: str
+    ) -> Tuple[date, date]:
+        if bucket not in BUCKET_SQL:
+            raise ValueError(f"bucket must be one of {tuple(BUCKET_SQL)}")
+        return resolve_range(start, end)
+
+    def activity(
+        self,
+        user_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        bucket: str = "day",
+    ) -> Dict[str, Any]:
+        """Entries written per bucket; buckets without entries are omitted."""
+        start, end = self._bounds(start, end, bucket)
+        rows = self.rollup_dao.buckets(
+            user_id, start.isoformat(), (end + timedelta(days=1)).isoformat(), bucket
+        )
+        return {
+            "bucket": bucket,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "dates": [r["bucket"] for r in rows],
+            "count": [r["entry_count"] for r in rows],
+        }
+
+    def sentiment_timeseries(
+        self,
+        user_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        bucket: str = "day",
+    ) -> Dict[str, Any]:
+        """Analyzed entries per bucket with mean / min / max sentiment."""
+        start, end = self._bounds(start, end, bucket)
+        rows = [
+            r
+            for r in self.rollup_dao.buckets(
+                user_id, start.isoformat(), (end + timedelta(days=1)).isoformat(), bucket
+            )
+            if r["insight_count"]
+        ]
+        return {
+            "bucket": bucket,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "dates": [r["bucket"] for r in rows],
+            "count": [r["insight_count"] for r in rows],
+            "mean": [round(r["sentiment_sum"] / r["insight_count"], 4) for r in rows],
+            "min": [round(r["sentiment_min"], 4) for r in rows],
+            "max": [round(r["sentiment_max"], 4) for r in rows],
+        }
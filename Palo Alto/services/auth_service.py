@@ -5,6 +5,7 @@ from models.user import User
 from security.passwords import hash_password, verify_password
 from security.tokens import make_access_token
 from dao.exceptions import DAOError
+from services.executors import run_auth
 
 
 class AuthService:
@@ -23,6 +24,18 @@ class AuthService:
             return None
         if not verify_password(password, u.password):
             return None
+        return self._token_for(u)
+
+    # async variants for the routers: the whole call (bcrypt dominates) runs
+    # on the auth executor
+    async def register_async(self, user: User) -> User:
+        return await run_auth(self.register, user)
+
+    async def login_async(self, email: str, password: str) -> Optional[str]:
+        return await run_auth(self.login, email, password)
+
+    @staticmethod
+    def _token_for(u: User) -> str:
         # issue access token (1h)
         return make_access_token(
             sub=u.id, expires_in=3600, extra={"username": u.username}
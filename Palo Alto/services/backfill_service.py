@@ -0,0 +1,222 @@
+# services/backfill_service.py
+"""
+Bulk (re-)analysis of a user's existing entries.
+
+Pipeline per chunk of CHUNK_SIZE entries (keyset-paged by id):
+- embeddings run as one batch; themes then run on a small thread pool reusing
+  those vectors (KeyBERT shares the encoder) while sentiment runs as one batch
+- insights are written with a single upsert_many transaction
+- force=True revisits analyzed entries too, but still skips the ones whose
+  content hash is current (same text, same models)
+
+The next chunk is analyzed on a helper thread while the current one is being
+written, so the models are never idle waiting on SQLite. Reads and writes
+stay on the calling thread.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dao.entry_dao import EntryDAO
+from dao.insight_dao import InsightDAO
+from models.entry import Entry
+from models.insights import Insight
+from services.ai_sentiment import AISentiment
+from services.analysis_cache import content_hash
+from services.vector_index import VectorIndexManager, vector_indexes
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.getenv("AI_BACKFILL_CHUNK", "64"))
+THEME_WORKERS = int(os.getenv("AI_BACKFILL_THEME_WORKERS", "4"))
+
+
+@dataclass
+class BackfillProgress:
+    user_id: int
+    total: int = 0
+    analyzed: int = 0
+    skipped: int = 0  # entries with no text
+    unchanged: int = 0  # insight already current (content hash matches)
+    status: str = "running"  # running | done | failed
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "user_id": self.user_id,
+            "status": self.status,
+            "total": self.total,
+            "analyzed": self.analyzed,
+            "skipped": self.skipped,
+            "unchanged": self.unchanged,
+            "remaining": max(
+                0, self.total - self.analyzed - self.skipped - self.unchanged
+            ),
+            "elapsed_s": round(elapsed, 2),
+            "entries_per_s": round(self.analyzed / elapsed, 2) if elapsed > 0 else 0.0,
+            "error": self.error,
+        }
+
+
+class BackfillService:
+    def __init__(
+        self,
+        entry_dao: Optional[EntryDAO] = None,
+        insight_dao: Optional[InsightDAO] = None,
+        ai: Optional[AISentiment] = None,
+        indexes: Optional[VectorIndexManager] = None,
+        chunk_size: int = CHUNK_SIZE,
+        theme_workers: int = THEME_WORKERS,
+    ):
+        self.entry_dao = entry_dao or EntryDAO()
+        self.insight_dao = insight_dao or InsightDAO()
+        # whole chunks are already batches; skip the micro-batch queues
+        self.ai = ai or AISentiment(batched=False)
+        self.indexes = indexes or vector_indexes
+        self.chunk_size = max(1, chunk_size)
+        self.theme_workers = max(1, theme_workers)
+
+    def run(
+        self,
+        user_id: int,
+        force: bool = False,
+        progress: Optional[BackfillProgress] = None,
+        on_progress: Optional[Callable[[BackfillProgress], None]] = None,
+    ) -> BackfillProgress:
+        """
+        Analyze the user's entries that have no insight yet (all of them
+        with force=True). Returns the final progress record.
+        """
+        only_missing = not force
+        prog = progress or BackfillProgress(user_id=user_id)
+        prog.total = self.entry_dao.count_for_analysis(user_id, only_missing)
+
+        themes_pool = ThreadPoolExecutor(
+            self.theme_workers, thread_name_prefix="backfill-themes"
+        )
+        infer_pool = ThreadPoolExecutor(1, thread_name_prefix="backfill-infer")
+        try:
+            chunk = self._read(user_id, 0, only_missing)
+            pending: Optional[Future] = (
+                infer_pool.submit(self._analyze, chunk, themes_pool) if chunk else None
+            )
+            while pending is not None:
+                insights, skipped, unchanged = pending.result()
+                # read + start the next chunk before writing this one
+                chunk = self._read(user_id, chunk[-1][0].id, only_missing)
+                pending = (
+                    infer_pool.submit(self._analyze, chunk, themes_pool)
+                    if chunk
+                    else None
+                )
+                self._write(user_id, insights)
+                prog.analyzed += len(insights)
+                prog.skipped += skipped
+                prog.unchanged += unchanged
+                if on_progress:
+                    on_progress(prog)
+            prog.status = "done"
+        except Exception as e:
+            log.exception("backfill failed for user %s", user_id)
+            prog.status = "failed"
+            prog.error = str(e)
+        finally:
+            prog.finished_at = time.time()
+            infer_pool.shutdown(wait=True)
+            themes_pool.shutdown(wait=True)
+        return prog
+
+    # ---- pipeline stages ----------------------------------------------------
+
+    def _read(
+        self, user_id: int, after_id: int, only_missing: bool
+    ) -> List[Tuple[Entry, Optional[str]]]:
+        return self.entry_dao.list_for_analysis(
+            user_id, after_id, self.chunk_size, only_missing=only_missing
+        )
+
+    def _analyze(
+        self, chunk: List[Tuple[Entry, Optional[str]]], themes_pool: ThreadPoolExecutor
+    ) -> Tuple[List[Insight], int, int]:
+        """Returns (insights, entries without text, entries already current)."""
+        todo: List[Tuple[Entry, str]] = []
+        skipped = unchanged = 0
+        for e, stored_hash in chunk:
+            if not e.text or not e.text.strip():
+                skipped += 1
+                continue
+            h = content_hash(e.text)
+            if stored_hash == h:
+                unchanged += 1
+                continue
+            todo.append((e, h))
+        if not todo:
+            return [], skipped, unchanged
+        texts = [e.text for e, _ in todo]
+        embeddings = self.ai.embed_entries(texts)
+        theme_futs = [
+            themes_pool.submit(self.ai.themes, t, doc_embedding=v)
+            for t, v in zip(texts, embeddings)
+        ]
+        sentiments = self.ai.sentiment_batch(texts)
+        now = datetime.utcnow()
+        insights = [
+            Insight(
+                id=None,
+                entry_id=e.id,
+                sentiment=float(s),
+                themes=list(f.result() or []),
+                embedding=list(v or []),
+                created_at=now,
+                content_hash=h,
+            )
+            for (e, h), s, v, f in zip(todo, sentiments, embeddings, theme_futs)
+        ]
+        return insights, skipped, unchanged
+
+    def _write(self, user_id: int, insights: List[Insight]) -> None:
+        if not insights:
+            return
+        self.insight_dao.upsert_many(insights)
+        for ins in insights:
+            self.indexes.on_upsert(user_id, ins.entry_id, ins.embedding)
+
+
+# ---- background runs (one per user) -----------------------------------------
+
+_runs: Dict[int, BackfillProgress] = {}
+_runs_lock = threading.Lock()
+
+
+def start_background(
+    user_id: int, force: bool = False, service: Optional[BackfillService] = None
+) -> BackfillProgress:
+    """Start a backfill thread for the user unless one is already running."""
+    with _runs_lock:
+        current = _runs.get(user_id)
+        if current is not None and current.status == "running":
+            return current
+        prog = BackfillProgress(user_id=user_id)
+        _runs[user_id] = prog
+    svc = service or BackfillService()
+    threading.Thread(
+        target=svc.run,
+        kwargs={"user_id": user_id, "force": force, "progress": prog},
+        name=f"backfill-{user_id}",
+        daemon=True,
+    ).start()
+    return prog
+
+
+def progress_for(user_id: int) -> Optional[BackfillProgress]:
+    with _runs_lock:
+        return _runs.get(user_id)
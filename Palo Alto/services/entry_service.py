@@ -1,63 +1,85 @@
 # services/entry_service.py
-from typing import Optional, List
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, List, Tuple
 from datetime import datetime, timezone
 
 from models.entry import Entry
 from models.insights import Insight
 
 from dao.interfaces import IEntryDAO
-from dao.user_dao import UserDAO
-from dao.event_dao import EventDAO
 from dao.insight_dao import InsightDAO
+from dao.analysis_job_dao import AnalysisJobDAO
+from dao.user_cache import user_cache
 
 from services.ai_sentiment import AISentiment
+from services.analysis_cache import content_hash
+from services.prompt_cache import prompt_cache
+from services.unit_of_work import UnitOfWork
+from services.vector_index import vector_indexes
+
+log = logging.getLogger(__name__)
+
+# When on, create/update only enqueue analysis; services.analysis_worker does the AI work
+ASYNC_ANALYSIS = os.getenv("AI_ASYNC_ANALYSIS", "0") == "1"
 
 
 class EntryService:
     def __init__(
         self,
         entry_dao: IEntryDAO,
-        user_dao: Optional[UserDAO] = None,
-        event_dao: Optional[EventDAO] = None,
         insight_dao: Optional[InsightDAO] = None,
         ai: Optional[AISentiment] = None,
+        job_dao: Optional[AnalysisJobDAO] = None,
+        async_analysis: Optional[bool] = None,
+        uow_factory: Optional[Callable[[], UnitOfWork]] = None,
     ):
         """
         Orchestrates CRUD for entries, streak updates, event logging,
         and AI analysis (sentiment/themes/embeddings).
+
+        async_analysis=True queues analysis in analysis_jobs instead of
+        running the models before returning (default: AI_ASYNC_ANALYSIS env).
+
+        uow_factory: units of work for multi-table writes; by default they
+        run on entry_dao's injected connection if it has one, else on a
+        pooled connection.
         """
         self.entry_dao = entry_dao
-        self.user_dao = user_dao or UserDAO()
-        self.event_dao = event_dao or EventDAO()
         self.insight_dao = insight_dao or InsightDAO()
         self.ai = ai or AISentiment()
+        self.job_dao = job_dao or AnalysisJobDAO()
+        self.async_analysis = (
+            ASYNC_ANALYSIS if async_analysis is None else async_analysis
+        )
+        self.uow_factory = uow_factory or (
+            lambda: UnitOfWork(getattr(entry_dao, "_external_conn", None))
+        )
 
     # ----------------------
     # Create
     # ----------------------
     def create(self, entry: Entry) -> Entry:
         """
-        Creates an entry, updates the user's streaks, logs an event,
-        and stores AI analysis (sentiment, themes, embedding) for the entry.
+        Creates an entry, updates the user's streaks, logs events and stores
+        the AI analysis (sentiment, themes, embedding), all in one transaction
+        with a single commit. The models run before the transaction opens so
+        the write lock is never held during inference; in async mode the
+        analysis job is enqueued in the same transaction instead.
         """
         self._validate_entry(entry)
-
-        saved = self.entry_dao.create(entry)
-
-        self._update_user_streak_after_entry(saved.user_id, saved.created_at)
-
-        try:
-            self.event_dao.create(
-                saved.user_id, "entry.created", {"entry_id": saved.id}
-            )
-        except Exception:
-            pass
-
-        try:
-            self._analyze_and_upsert_insight(saved)
-        except Exception:
-
-            pass
+        insight = None if self.async_analysis else self._analyze_safely(entry)
+
+        with self.uow_factory() as uow:
+            saved = uow.entries.create(entry)
+            self._update_user_streak_after_entry(saved.user_id, saved.created_at, uow)
+            self._log_event(uow, saved.user_id, "entry.created", {"entry_id": saved.id})
+            if insight is not None:
+                insight.entry_id = saved.id
+                self._store_insight(uow, saved, insight)
+            elif self.async_analysis:
+                self._enqueue_analysis(uow, saved)
+            uow.after_commit(lambda: prompt_cache.invalidate(saved.user_id))
 
         return saved
 
@@ -70,6 +92,19 @@ class EntryService:
     def list_for_user(self, user_id: int, limit: int = 100) -> List[Entry]:
         return self.entry_dao.list_by_user(user_id, limit)
 
+    def page_for_user(
+        self,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        text_chars: Optional[int] = None,
+    ) -> Tuple[List[Entry], Optional[str]]:
+        """
+        Newest first; pass the returned cursor back for the next page.
+        text_chars truncates texts in SQL (previews for list views).
+        """
+        return self.entry_dao.page_by_user(user_id, limit, cursor, text_chars)
+
     # ----------------------
     # Update
     # ----------------------
@@ -77,10 +112,8 @@ class EntryService:
         self._validate_entry(entry)
         updated = self.entry_dao.update(entry)
 
-        try:
-            self._analyze_and_upsert_insight(updated)
-        except Exception:
-            pass
+        self._schedule_analysis(updated)
+        prompt_cache.invalidate(updated.user_id)
 
         return updated
 
@@ -88,11 +121,10 @@ class EntryService:
         self._validate_entry_patch(fields)
         updated = self.entry_dao.update_partial(entry_id, **fields)
 
-        if updated and ("text" in fields or "title" in fields):
-            try:
-                self._analyze_and_upsert_insight(updated)
-            except Exception:
-                pass
+        # only the text is analyzed; unchanged text is skipped by content hash
+        if updated and "text" in fields:
+            self._schedule_analysis(updated)
+            prompt_cache.invalidate(updated.user_id)
 
         return updated
 
@@ -100,52 +132,149 @@ class EntryService:
     # Delete
     # ----------------------
     def remove(self, entry_id: int) -> None:
+        entry = self.entry_dao.find_by_id(entry_id)
 
         try:
             self.insight_dao.delete_by_entry(entry_id)
         except Exception:
             pass
+        try:
+            self.job_dao.delete_by_entry(entry_id)
+        except Exception:
+            pass
         self.entry_dao.delete(entry_id)
+        vector_indexes.on_delete(entry_id)
+        if entry is not None:
+            prompt_cache.invalidate(entry.user_id)
 
     # ----------------------
     # Helpers
     # ----------------------
-    def reanalyze(self, entry_id: int) -> Optional[Insight]:
+    def reanalyze(self, entry_id: int, force: bool = True) -> Optional[Insight]:
         """
         Public helper to (re)compute AI insight for an existing entry.
         Returns the stored Insight or None if entry not found.
+        force=False returns the stored insight when its content hash is current.
         """
         entry = self.entry_dao.find_by_id(entry_id)
         if not entry:
             return None
+        if not force and self.is_analysis_current(entry):
+            return self.insight_dao.find_by_entry(entry_id)
         return self._analyze_and_upsert_insight(entry)
 
+    def is_analysis_current(self, entry: Entry) -> bool:
+        """True if the stored insight was computed from this exact text and models."""
+        stored = self.insight_dao.content_hash_for_entry(entry.id)
+        return stored is not None and stored == content_hash(entry.text)
+
+    def analysis_status(self, entry_id: int) -> dict:
+        """
+        pending / running / done / failed from the job table; entries analyzed
+        synchronously (no job row) report done if an insight exists, else none.
+        """
+        job = self.job_dao.find_by_entry(entry_id)
+        if job:
+            return {
+                "entry_id": entry_id,
+                "status": job.status,
+                "attempts": job.attempts,
+                "last_error": job.last_error,
+                "updated_at": job.updated_at,
+            }
+        has_insight = self.insight_dao.find_by_entry(entry_id) is not None
+        return {
+            "entry_id": entry_id,
+            "status": "done" if has_insight else "none",
+            "attempts": 0,
+            "last_error": None,
+            "updated_at": None,
+        }
+
+    def _schedule_analysis(self, entry: Entry) -> None:
+        """Enqueue (async mode) or run the AI analysis now; never fails the write."""
+        try:
+            if self.is_analysis_current(entry):
+                log.debug("entry %s unchanged since last analysis, skipping", entry.id)
+                return
+        except Exception:
+            log.exception("content hash check failed for entry %s", entry.id)
+        if self.async_analysis:
+            try:
+                self.job_dao.enqueue(entry.id, entry.user_id)
+                from services.analysis_worker import pool
+
+                pool.notify()
+                return
+            except Exception:
+                log.exception("could not enqueue analysis for entry %s", entry.id)
+        try:
+            self._analyze_and_upsert_insight(entry)
+        except Exception:
+            log.exception("AI analysis failed for entry %s", entry.id)
+
     def _analyze_and_upsert_insight(self, entry: Entry) -> Insight:
         """
         Runs AI (sentiment, themes, embedding) and upserts to insights table.
         """
-        sentiment, themes = self.ai.analyze_entry(entry.text)
-        embedding = self.ai.embed_entries([entry.text])[0]
+        ins = self._analyze(entry)
+        with self.uow_factory() as uow:
+            self._store_insight(uow, entry, ins)
+        return ins
 
-        ins = Insight(
+    def _analyze(self, entry: Entry) -> Insight:
+        """Model work only; nothing is written."""
+        sentiment, themes, embedding = self.ai.analyze_full(entry.text)
+        return Insight(
             id=None,
             entry_id=entry.id,
             sentiment=sentiment,
             themes=themes,
             embedding=embedding,
+            created_at=datetime.utcnow(),
+            content_hash=content_hash(entry.text),
         )
-        self.insight_dao.upsert_for_entry(ins)
 
+    def _analyze_safely(self, entry: Entry) -> Optional[Insight]:
         try:
-            self.event_dao.create(
-                entry.user_id,
-                "entry.analyzed",
-                {"entry_id": entry.id, "sentiment": sentiment, "themes": themes[:3]},
-            )
+            return self._analyze(entry)
         except Exception:
-            pass
+            log.exception("AI analysis failed for new entry of user %s", entry.user_id)
+            return None
 
-        return ins
+    def _store_insight(self, uow: UnitOfWork, entry: Entry, ins: Insight) -> None:
+        uow.insights.upsert_for_entry(ins)
+        self._log_event(
+            uow,
+            entry.user_id,
+            "entry.analyzed",
+            {"entry_id": entry.id, "sentiment": ins.sentiment, "themes": ins.themes[:3]},
+        )
+        uow.after_commit(
+            lambda: vector_indexes.on_upsert(entry.user_id, entry.id, ins.embedding)
+        )
+
+    def _enqueue_analysis(self, uow: UnitOfWork, entry: Entry) -> None:
+        try:
+            uow.jobs.enqueue(entry.id, entry.user_id)
+        except Exception:
+            log.exception("could not enqueue analysis for entry %s", entry.id)
+            # retried (or run inline) once the entry itself is committed
+            uow.after_commit(lambda: self._schedule_analysis(entry))
+            return
+        from services.analysis_worker import pool
+
+        uow.after_commit(pool.notify)
+
+    @staticmethod
+    def _log_event(
+        uow: UnitOfWork, user_id: int, type_: str, meta: Dict[str, Any]
+    ) -> None:
+        # telemetry never fails the write it describes
+        try:
+            uow.events.create(user_id, type_, meta)
+        except Exception:
+            pass
 
     # ----------------------
     # Validations
@@ -171,12 +300,15 @@ class EntryService:
     # ----------------------
     # Streak logic
     # ----------------------
-    def _update_user_streak_after_entry(self, user_id: int, created_at) -> None:
+    def _update_user_streak_after_entry(
+        self, user_id: int, created_at, uow: UnitOfWork
+    ) -> None:
         """
         Update last_entry_date/current_streak/longest_streak when a new entry is created.
         - Counts one per calendar day (UTC).
         - Increments streak if last entry was yesterday.
         - Resets to 1 if gap >= 2 days.
+        Reads and writes go through `uow`, inside the entry's transaction.
         """
 
         if isinstance(created_at, str):
@@ -191,46 +323,38 @@ class EntryService:
 
         today = created_dt.astimezone(timezone.utc).date()
 
-        u = self.user_dao.find_by_id(user_id)
+        u = uow.users.find_by_id(user_id)
         last_str = u.last_entry_date if u else None
 
         if not last_str:
-            patch = dict(last_entry_date=str(today), current_streak=1, longest_streak=1)
-            self.user_dao.update_partial(user_id, **patch)
+            new_current = new_longest = 1
+        else:
             try:
-                self.event_dao.create(
-                    user_id, "streak.updated", {"current": 1, "longest": 1}
-                )
+                last_date = datetime.fromisoformat(last_str).date()
             except Exception:
-                pass
-            return
-
-        try:
-            last_date = datetime.fromisoformat(last_str).date()
-        except Exception:
-            last_date = today
-
-        delta = (today - last_date).days
-        if delta == 0:
-
-            return
-        elif delta == 1:
-            new_current = int(u.current_streak or 0) + 1
-        else:
-            new_current = 1
-
-        new_longest = max(int(u.longest_streak or 0), new_current)
-        patch = dict(
+                last_date = today
+
+            delta = (today - last_date).days
+            if delta == 0:
+                return
+            elif delta == 1:
+                new_current = int(u.current_streak or 0) + 1
+            else:
+                new_current = 1
+            new_longest = max(int(u.longest_streak or 0), new_current)
+
+        uow.users.update_partial(
+            user_id,
             last_entry_date=str(today),
             current_streak=new_current,
             longest_streak=new_longest,
         )
-        self.user_dao.update_partial(user_id, **patch)
-        try:
-            self.event_dao.create(
-                user_id,
-                "streak.updated",
-                {"current": new_current, "longest": new_longest},
-            )
-        except Exception:
-            pass
+        # UserDAO already dropped the cached row; drop it again once committed
+        # so a read racing the transaction cannot re-cache the old streak
+        uow.after_commit(lambda: user_cache.invalidate(user_id))
+        self._log_event(
+            uow,
+            user_id,
+            "streak.updated",
+            {"current": new_current, "longest": new_longest},
+        )
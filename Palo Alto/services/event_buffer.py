@@ -0,0 +1,245 @@
+# services/event_buffer.py
+"""
+Buffered writer for the events table (entry.created, streak.updated,
+entry.analyzed, ...).
+
+EventDAO.create is one INSERT and one commit per event, two or three per
+entry. EventBuffer keeps events in memory and a background thread writes
+them with a single executemany + commit per batch, when `batch_size` events
+are waiting or `flush_interval` seconds after the first one, and on close()
+(app shutdown / interpreter exit).
+
+Durability modes (EVENT_DURABILITY):
+    sync         write before create() returns, one commit each (old behavior)
+    buffered     default; a crash loses at most the unflushed batch. With the
+                 buffer full, producers wait up to `block_timeout` for the
+                 flusher, then the event is dropped
+    best_effort  like buffered, but a full buffer drops at once, never waits
+
+Events written inside a UnitOfWork go to the buffer only if it commits (see
+services.unit_of_work). stats() counts drops and waits for /metrics.
+
+Env knobs:
+    EVENT_DURABILITY       sync | buffered | best_effort (default buffered)
+    EVENT_BATCH_SIZE       events per executemany (default 256)
+    EVENT_FLUSH_INTERVAL   max seconds an event waits in memory (default 1.0)
+    EVENT_MAX_PENDING      buffer capacity (default 10000)
+    EVENT_BLOCK_TIMEOUT    seconds a producer may wait on a full buffer (default 0.05)
+"""
+
+from __future__ import annotations
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from dao.event_dao import EventDAO
+
+log = logging.getLogger(__name__)
+
+MODES = ("sync", "buffered", "best_effort")
+
+DURABILITY = os.getenv("EVENT_DURABILITY", "buffered")
+BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "256"))
+FLUSH_INTERVAL_S = float(os.getenv("EVENT_FLUSH_INTERVAL", "1.0"))
+MAX_PENDING = int(os.getenv("EVENT_MAX_PENDING", "10000"))
+BLOCK_TIMEOUT_S = float(os.getenv("EVENT_BLOCK_TIMEOUT", "0.05"))
+
+# (user_id, type, meta) as passed to create()
+Event = Tuple[int, str, Optional[Dict[str, Any]]]
+# (user_id, type, meta_json, created_at) as EventDAO.create_many takes them
+Row = Tuple[int, str, str, str]
+
+
+def _row(user_id: int, type_: str, meta: Optional[Dict[str, Any]]) -> Row:
+    # stamped now, in CURRENT_TIMESTAMP's format, not when the batch is written
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return user_id, type_, json.dumps(meta or {}), now
+
+
+class EventBuffer:
+    def __init__(
+        self,
+        mode: str = DURABILITY,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_S,
+        max_pending: int = MAX_PENDING,
+        block_timeout: float = BLOCK_TIMEOUT_S,
+        dao_factory: Callable[[], EventDAO] = EventDAO,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"event durability must be one of {MODES}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self._dao_factory = dao_factory
+        self._pending: Deque[Row] = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # flusher vs flush()/close()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._dropped = 0
+        self._blocked = 0
+        self._flush_errors = 0
+        self._flush_seconds = 0.0
+
+    # ---- producers ----------------------------------------------------------
+
+    def create(
+        self, user_id: int, type_: str, meta: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Same signature as EventDAO.create."""
+        self.add_many([(user_id, type_, meta)])
+
+    def add_many(self, events: Iterable[Event]) -> None:
+        rows = [_row(*e) for e in events]
+        if not rows:
+            return
+        if self.mode == "sync" or self._closed:
+            self._write(rows)
+            return
+        self._ensure_thread()
+        with self._cond:
+            for row in rows:
+                if len(self._pending) >= self.max_pending and not self._wait_for_room():
+                    self._dropped += 1
+                    continue
+                self._pending.append(row)
+                self._enqueued += 1
+            self._cond.notify_all()
+
+    def _wait_for_room(self) -> bool:
+        """Called with the lock held and the buffer full."""
+        if self.mode != "buffered" or self.block_timeout <= 0:
+            return False
+        self._blocked += 1
+        self._cond.notify_all()  # make sure the flusher is draining
+        return self._cond.wait_for(
+            lambda: len(self._pending) < self.max_pending, self.block_timeout
+        )
+
+    # ---- flushing -----------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="event-flusher", daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _take(self, limit: int) -> List[Row]:
+        n = min(limit, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(n)]
+        if batch:
+            self._cond.notify_all()  # room for blocked producers
+        return batch
+
+    def _run(self) -> None:
+        # a full buffer is flushed at once, even below batch_size
+        threshold = min(self.batch_size, self.max_pending)
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._closed and len(self._pending) < threshold:
+                    # first event of a batch: give the rest flush_interval to arrive
+                    self._cond.wait_for(
+                        lambda: self._closed or len(self._pending) >= threshold,
+                        self.flush_interval,
+                    )
+                if self._closed:
+                    return  # close() drains what is left
+                batch = self._take(self.batch_size)
+            self._write(batch)
+
+    def _write(self, rows: List[Row]) -> None:
+        t0 = time.perf_counter()
+        try:
+            with self._write_lock:
+                self._dao_factory().create_many(rows)
+        except Exception:
+            log.exception("could not write %d events", len(rows))
+            with self._cond:
+                self._flush_errors += 1
+                self._dropped += len(rows)
+            return
+        with self._cond:
+            self._written += len(rows)
+            self._batches += 1
+            self._flush_seconds += time.perf_counter() - t0
+
+    def flush(self) -> None:
+        """Write everything buffered so far, on the calling thread."""
+        while True:
+            with self._cond:
+                batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write what is left; later events are written at once."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "mode": self.mode,
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "avg_batch": (
+                    round(self._written / self._batches, 2) if self._batches else 0.0
+                ),
+                "avg_flush_ms": (
+                    round(1000 * self._flush_seconds / self._batches, 3)
+                    if self._batches
+                    else 0.0
+                ),
+                "dropped": self._dropped,
+                "blocked": self._blocked,
+                "flush_errors": self._flush_errors,
+            }
+
+
+class DeferredEvents:
+    """
+    uow.events for buffered modes: collects events and hands them to the
+    buffer after the unit of work commits; a rollback discards them.
+    """
+
+    def __init__(self, uow: Any, sink: EventBuffer):
+        self._events: List[Event] = []
+        uow.after_commit(lambda: sink.add_many(self._events))
+
+    def create(
+        self, user_id: int, type_: str, meta: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self._events.append((user_id, type_, meta))
+
+
+# process-wide sink used by EntryService (through UnitOfWork) and main.py
+event_buffer = EventBuffer()
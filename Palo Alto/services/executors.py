@@ -0,0 +1,166 @@
+# services/executors.py
+"""
+Dedicated, bounded thread pools for blocking work done on behalf of async
+routes, so one kind of slow work cannot starve the others:
+
+    auth   bcrypt hashing / verification (deliberately slow, CPU bound)
+    ai     model calls (sentiment, embeddings, themes, FLAN-T5, backfill)
+    db     SQLite reads and writes
+
+Routes are `async def` and `await run_db(...)` / `run_ai(...)` /
+`run_auth(...)` instead of relying on FastAPI's shared default threadpool.
+Each pool also caps how many calls may wait for it; beyond that run()
+raises ExecutorBusy, which main.py turns into 503 + Retry-After, so a burst
+of /ai/* calls is shed instead of queueing forever.
+
+Env knobs:
+    AUTH_EXECUTOR_WORKERS / AUTH_EXECUTOR_MAX_PENDING   default 4 / 64
+    AI_EXECUTOR_WORKERS   / AI_EXECUTOR_MAX_PENDING     default AI_BATCH_MAX_SIZE
+                                                        (16) / 2x workers, min 32
+    DB_EXECUTOR_WORKERS   / DB_EXECUTOR_MAX_PENDING     default 16 / 512
+
+An ai worker stays blocked while its request waits in the sentiment/embedding
+micro-batchers (services.ai_sentiment), so at most AI_EXECUTOR_WORKERS texts
+can be queued there at once: that is the effective batch size under load.
+The worker default follows AI_BATCH_MAX_SIZE so full batches can form; set
+the two together, and keep the worker count no higher than the batch size
+unless FLAN-T5 generation and backfill need extra concurrency.
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorBusy(RuntimeError):
+    """Too many calls already waiting for this executor."""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} executor is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix=f"{name}-exec")
+        self._lock = threading.Lock()
+        self._pending = 0  # submitted, not finished (queued + running)
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._peak_pending = 0
+
+    def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+        """
+        Submit fn(*args, **kwargs) to this pool; await the returned future.
+        Admission is checked here, synchronously, so a route can get its 503
+        before it starts a (streaming) response.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorBusy(self.name)
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+        submitted = time.perf_counter()
+
+        def call():
+            with self._lock:
+                self._running += 1
+                self._wait_seconds += time.perf_counter() - submitted
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def release(done: "Future[T]") -> None:
+            # also runs for jobs cancelled before they started (shutdown, or
+            # the awaiting request went away), which never enter call()
+            with self._lock:
+                self._pending -= 1
+                if not done.cancelled():
+                    self._completed += 1
+
+        try:
+            job = self._pool.submit(call)
+        except RuntimeError:  # pool already shut down
+            with self._lock:
+                self._pending -= 1
+            raise
+        job.add_done_callback(release)
+        return asyncio.wrap_future(job)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "peak_pending": self._peak_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": (
+                    round(1000 * self._wait_seconds / self._completed, 3)
+                    if self._completed
+                    else 0.0
+                ),
+            }
+
+
+auth_executor = BoundedExecutor(
+    "auth",
+    int(os.getenv("AUTH_EXECUTOR_WORKERS", "4")),
+    int(os.getenv("AUTH_EXECUTOR_MAX_PENDING", "64")),
+)
+_AI_WORKERS = int(
+    os.getenv("AI_EXECUTOR_WORKERS", os.getenv("AI_BATCH_MAX_SIZE", "16"))
+)
+ai_executor = BoundedExecutor(
+    "ai",
+    _AI_WORKERS,
+    int(os.getenv("AI_EXECUTOR_MAX_PENDING", str(max(32, 2 * _AI_WORKERS)))),
+)
+db_executor = BoundedExecutor(
+    "db",
+    int(os.getenv("DB_EXECUTOR_WORKERS", "16")),
+    int(os.getenv("DB_EXECUTOR_MAX_PENDING", "512")),
+)
+
+
+def run_auth(fn: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+    return auth_executor.run(fn, *args, **kwargs)
+
+
+def run_ai(fn: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+    return ai_executor.run(fn, *args, **kwargs)
+
+
+def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> "asyncio.Future[T]":
+    return db_executor.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> List[Dict[str, Any]]:
+    return [e.stats() for e in (auth_executor, ai_executor, db_executor)]
+
+
+def shutdown_executors() -> None:
+    for e in (auth_executor, ai_executor, db_executor):
+        e.shutdown(wait=False)
@@ -0,0 +1,355 @@
+# services/inference_backends.py
+"""
+Pluggable CPU inference backends for the models in services.model_registry.
+
+AI_BACKEND selects how the three models are run:
+    torch      eager PyTorch (default, previous behaviour)
+    onnx       exported ONNX graphs on ONNX Runtime
+    onnx-int8  same, with dynamic int8 quantization of the weights
+
+The loaders return objects with the same surface the services already use
+(an HF pipeline for sentiment, an .encode() encoder for embeddings,
+(tokenizer, model, device) for the prompter), so AISentiment / AIPrompts do
+not change. ONNX exports are cached under AI_ONNX_DIR and reused on restart.
+
+Threading:
+    AI_INTRA_OP_THREADS / AI_INTER_OP_THREADS   0 = library default
+    AI_QUANT_ARCH   avx2 | avx512 | avx512_vnni | arm64 (int8 kernels to target)
+
+Requires for onnx*: optimum[onnxruntime] (not needed for torch).
+Check accuracy with `python manage.py ai-parity` before switching.
+"""
+from __future__ import annotations
+import glob
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+BACKEND = os.getenv("AI_BACKEND", "torch")
+INTRA_OP_THREADS = int(os.getenv("AI_INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("AI_INTER_OP_THREADS", "0"))
+QUANT_ARCH = os.getenv("AI_QUANT_ARCH", "avx2")
+ONNX_DIR = os.getenv(
+    "AI_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "journal-onnx")
+)
+
+# parity thresholds used by parity_report()
+MIN_LABEL_AGREEMENT = 0.98
+MAX_SCORE_DIFF = 0.05
+MIN_EMBED_COSINE = 0.99
+
+_threads_configured = False
+
+
+def _check(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"AI_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    return backend
+
+
+def backend_info(backend: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "backend": _check(backend or BACKEND),
+        "intra_op_threads": INTRA_OP_THREADS,
+        "inter_op_threads": INTER_OP_THREADS,
+        "quant_arch": QUANT_ARCH,
+        "onnx_dir": ONNX_DIR,
+    }
+
+
+# --------------------------- threads ----------------------------------------
+
+
+def configure_torch_threads() -> None:
+    """Apply the thread settings to PyTorch once per process."""
+    global _threads_configured
+    if _threads_configured:
+        return
+    import torch
+
+    if INTRA_OP_THREADS > 0:
+        torch.set_num_threads(INTRA_OP_THREADS)
+    if INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(INTER_OP_THREADS)
+        except RuntimeError:
+            pass  # only settable before the first parallel op
+    _threads_configured = True
+
+
+def session_options():
+    import onnxruntime as ort
+
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if INTRA_OP_THREADS > 0:
+        so.intra_op_num_threads = INTRA_OP_THREADS
+    if INTER_OP_THREADS > 0:
+        so.inter_op_num_threads = INTER_OP_THREADS
+        so.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    return so
+
+
+# --------------------------- ONNX export / quantization ---------------------
+
+
+def _export_dir(model_id: str, quantized: bool) -> str:
+    name = model_id.replace("/", "__")
+    return os.path.join(ONNX_DIR, name, f"int8-{QUANT_ARCH}" if quantized else "fp32")
+
+
+def _has_onnx(path: str) -> bool:
+    return bool(glob.glob(os.path.join(path, "*.onnx")))
+
+
+def _export(ort_cls, model_id: str) -> str:
+    """Export model_id to ONNX once; returns the directory."""
+    out = _export_dir(model_id, quantized=False)
+    if not _has_onnx(out):
+        from transformers import AutoTokenizer
+
+        model = ort_cls.from_pretrained(model_id, export=True)
+        model.save_pretrained(out)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(out)
+    return out
+
+
+def _quantize(src: str, model_id: str) -> str:
+    """Dynamic int8 quantization of every graph in src (weights only, no calibration)."""
+    out = _export_dir(model_id, quantized=True)
+    if _has_onnx(out):
+        return out
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    qconfig = getattr(AutoQuantizationConfig, QUANT_ARCH)(
+        is_static=False, per_channel=False
+    )
+    os.makedirs(out, exist_ok=True)
+    for path in sorted(glob.glob(os.path.join(src, "*.onnx"))):
+        quantizer = ORTQuantizer.from_pretrained(src, file_name=os.path.basename(path))
+        quantizer.quantize(save_dir=out, quantization_config=qconfig)
+    # configs + tokenizer files travel with the graphs
+    for path in glob.glob(os.path.join(src, "*")):
+        if not path.endswith(".onnx") and os.path.isfile(path):
+            shutil.copy(path, out)
+    return out
+
+
+def _onnx_model(ort_cls, model_id: str, quantized: bool, **file_names):
+    path = _export(ort_cls, model_id)
+    if quantized:
+        path = _quantize(path, model_id)
+        file_names = {
+            k: v.replace(".onnx", "_quantized.onnx") for k, v in file_names.items()
+        }
+    model = ort_cls.from_pretrained(
+        path,
+        provider="CPUExecutionProvider",
+        session_options=session_options(),
+        **file_names,
+    )
+    return model, path
+
+
+# --------------------------- sentence encoder -------------------------------
+
+
+class OrtSentenceEncoder:
+    """
+    SentenceTransformer stand-in on an ONNX Runtime model: mean pooling over
+    the last hidden state (as configured for intfloat/e5-base), optional L2
+    normalisation. Implements the encode() subset the services use.
+    """
+
+    def __init__(self, model, tokenizer, max_length: int = 512):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        **_: Any,
+    ):
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        out = []
+        for i in range(0, len(texts), max(1, batch_size)):
+            enc = self.tokenizer(
+                texts[i : i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            hidden = np.asarray(self.model(**enc).last_hidden_state)
+            mask = enc["attention_mask"][..., None].astype(hidden.dtype)
+            vecs = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                vecs = vecs / np.clip(
+                    np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None
+                )
+            out.append(vecs.astype(np.float32))
+        mat = np.concatenate(out) if out else np.zeros((0, 0), np.float32)
+        return mat[0] if single else mat
+
+
+def keybert_model(encoder: Any) -> Any:
+    """What to hand KeyBERT(model=...) for the registry's encoder."""
+    if not isinstance(encoder, OrtSentenceEncoder):
+        return encoder  # a real SentenceTransformer
+    from keybert.backend import BaseEmbedder
+
+    class _Embedder(BaseEmbedder):
+        def embed(self, documents, verbose=False):
+            return encoder.encode(list(documents), batch_size=32)
+
+    return _Embedder()
+
+
+# --------------------------- loaders ----------------------------------------
+
+
+def load_sentiment(model_id: str, backend: Optional[str] = None):
+    backend = _check(backend or BACKEND)
+    from transformers import AutoTokenizer, pipeline
+
+    if backend == "torch":
+        import torch
+
+        configure_torch_threads()
+        return pipeline(
+            "sentiment-analysis",
+            model=model_id,
+            device=0 if torch.cuda.is_available() else -1,
+        )
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    model, path = _onnx_model(
+        ORTModelForSequenceClassification,
+        model_id,
+        quantized=backend == "onnx-int8",
+        file_name="model.onnx",
+    )
+    return pipeline(
+        "sentiment-analysis", model=model, tokenizer=AutoTokenizer.from_pretrained(path)
+    )
+
+
+def load_embedder(model_id: str, backend: Optional[str] = None):
+    backend = _check(backend or BACKEND)
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        configure_torch_threads()
+        return SentenceTransformer(model_id)
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    model, path = _onnx_model(
+        ORTModelForFeatureExtraction,
+        model_id,
+        quantized=backend == "onnx-int8",
+        file_name="model.onnx",
+    )
+    return OrtSentenceEncoder(model, AutoTokenizer.from_pretrained(path))
+
+
+def load_seq2seq(model_id: str, backend: Optional[str] = None):
+    """(tokenizer, model, device); model.generate() works the same on every backend."""
+    backend = _check(backend or BACKEND)
+    from transformers import AutoTokenizer
+
+    if backend == "torch":
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        configure_torch_threads()
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        tok = AutoTokenizer.from_pretrained(model_id)
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
+        model.to(device)
+        model.eval()
+        return tok, model, device
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    model, path = _onnx_model(
+        ORTModelForSeq2SeqLM,
+        model_id,
+        quantized=backend == "onnx-int8",
+        encoder_file_name="encoder_model.onnx",
+        decoder_file_name="decoder_model.onnx",
+        decoder_with_past_file_name="decoder_with_past_model.onnx",
+    )
+    return AutoTokenizer.from_pretrained(path), model, "cpu"
+
+
+# --------------------------- parity check -----------------------------------
+
+PARITY_SAMPLES = [
+    "Today was great, I finally finished the project and celebrated with friends.",
+    "I couldn't sleep again and everything at work felt overwhelming.",
+    "Went for a long walk by the river. Quiet, a bit tired, but okay.",
+    "Had an argument with my sister and I still feel bad about it.",
+    "Grateful for a slow Sunday morning with coffee and a good book.",
+    "Deadlines are piling up and I am stuck and unmotivated.",
+]
+
+
+def _cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    return (a * b).sum(axis=1)
+
+
+def parity_report(
+    texts: Sequence[str],
+    sentiment_model: str,
+    embed_model: str,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run sentiment + embeddings on `texts` with eager PyTorch and with
+    `backend`, and compare: label agreement and score drift for sentiment,
+    cosine similarity for embeddings. "ok" says whether the thresholds hold.
+    """
+    backend = _check(backend or BACKEND)
+    texts = [t for t in texts if t and t.strip()] or list(PARITY_SAMPLES)
+
+    ref_pipe = load_sentiment(sentiment_model, "torch")
+    cand_pipe = load_sentiment(sentiment_model, backend)
+    ref = ref_pipe(texts, truncation=True)
+    cand = cand_pipe(texts, truncation=True)
+    agree = np.mean([r["label"] == c["label"] for r, c in zip(ref, cand)])
+    score_diff = max(abs(r["score"] - c["score"]) for r, c in zip(ref, cand))
+
+    ref_emb = np.asarray(
+        load_embedder(embed_model, "torch").encode(texts, normalize_embeddings=True)
+    )
+    cand_emb = np.asarray(
+        load_embedder(embed_model, backend).encode(texts, normalize_embeddings=True)
+    )
+    cos = _cosine_rows(ref_emb, cand_emb)
+
+    report = {
+        "backend": backend,
+        "samples": len(texts),
+        "sentiment_label_agreement": round(float(agree), 4),
+        "sentiment_max_score_diff": round(float(score_diff), 4),
+        "embedding_cosine_min": round(float(cos.min()), 4),
+        "embedding_cosine_mean": round(float(cos.mean()), 4),
+    }
+    report["ok"] = (
+        report["sentiment_label_agreement"] >= MIN_LABEL_AGREEMENT
+        and report["sentiment_max_score_diff"] <= MAX_SCORE_DIFF
+        and report["embedding_cosine_min"] >= MIN_EMBED_COSINE
+    )
+    return report
@@ -0,0 +1,129 @@
+# services/inference_batcher.py
+"""
+Micro-batching for model calls.
+
+Callers submit one item at a time from their own request thread; a single
+background thread collects whatever arrives within `max_wait_ms` (up to
+`max_batch_size` items), runs the batch function once on the whole list and
+hands each caller its own result through a Future.
+
+The batch function must take a list of inputs and return a list of outputs
+in the same order.
+"""
+
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._errors = 0
+
+    # ---- public API ---------------------------------------------------------
+
+    def submit(self, item: Any) -> Future:
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((item, fut))
+        return fut
+
+    def map(self, items: Sequence[Any]) -> List[Any]:
+        """Submit every item, then wait for all results (order preserved)."""
+        futs = [self.submit(x) for x in items]
+        return [f.result() for f in futs]
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": (
+                    round(self._items / self._batches, 2) if self._batches else 0.0
+                ),
+                "largest_batch": self._largest_batch,
+                "errors": self._errors,
+                "queued": self._queue.qsize(),
+            }
+
+    # ---- worker -------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-worker", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[Any, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # skip callers that gave up (cancelled) before we got to them
+            batch = [(x, f) for x, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            inputs = [x for x, _ in batch]
+            try:
+                outputs = list(self.batch_fn(inputs))
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(outputs)} results for {len(inputs)} inputs"
+                    )
+            except BaseException as e:  # fan the failure out to every caller
+                with self._stats_lock:
+                    self._errors += 1
+                for _, f in batch:
+                    f.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
+            for (_, f), out in zip(batch, outputs):
+                f.set_result(out)
@@ -0,0 +1,327 @@
+# services/inference_server.py
+"""
+Out-of-process inference: one process holds the models, every API worker
+talks to it over a Unix socket.
+
+Without it each uvicorn worker loads its own DistilBERT / e5 / FLAN-T5 and
+runs them under its own GIL. With AI_INFERENCE_SOCKET set, AISentiment and
+AIPrompts keep their API but send the model calls here instead, so memory
+scales with the number of models, not workers.
+
+    python manage.py inference-server            # or
+    python -m services.inference_server
+
+- One thread per client connection; sentiment / embedding requests from all
+  workers go through the server's micro-batchers and share forward passes
+- Clients keep a small pool of connections and reconnect once on failure
+- Messages are pickled (multiprocessing.connection); the socket is created
+  mode 0600 and AI_INFERENCE_AUTHKEY adds an HMAC handshake on top
+
+Env knobs:
+    AI_INFERENCE_SOCKET     path of the socket; empty = run models in-process (default)
+    AI_INFERENCE_AUTHKEY    shared secret for the handshake (optional)
+    AI_INFERENCE_TIMEOUT    seconds a client waits for a reply (default 120)
+"""
+
+from __future__ import annotations
+import inspect
+import logging
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+log = logging.getLogger(__name__)
+
+SOCKET_PATH = os.getenv("AI_INFERENCE_SOCKET", "")
+AUTHKEY = os.getenv("AI_INFERENCE_AUTHKEY", "").encode() or None
+TIMEOUT_S = float(os.getenv("AI_INFERENCE_TIMEOUT", "120"))
+
+# set in the server process so the AI services never route back to themselves
+_serving = False
+
+
+class InferenceError(RuntimeError):
+    """The inference server could not be reached or the call failed there."""
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+def default_handlers() -> Dict[str, Callable[..., Any]]:
+    """Model calls the server exposes; all run on this process's registry."""
+    from services import ai_sentiment
+    from services.ai_prompts import generate_text, generate_text_stream
+    from services.ai_themes import extract_themes
+    from services.model_registry import registry
+
+    def models(op: str = "status", names: Optional[List[str]] = None):
+        if op == "warmup":
+            registry.warmup(names)
+        elif op == "unload":
+            return {n: registry.unload(n) for n in names or []}
+        return registry.memory_report()
+
+    return {
+        "ping": lambda: "pong",
+        # per-item submit so requests from different workers share batches
+        "sentiment": lambda texts: ai_sentiment._sentiment_batcher.map(texts),
+        "embed": lambda texts: ai_sentiment._embed_batcher.map(texts),
+        "themes": extract_themes,
+        "generate": generate_text,
+        "generate_stream": generate_text_stream,  # via InferenceClient.stream
+        "models": models,
+        "batching": ai_sentiment.batcher_stats,
+    }
+
+
+class InferenceServer:
+    def __init__(
+        self,
+        address: str = SOCKET_PATH,
+        handlers: Optional[Dict[str, Callable[..., Any]]] = None,
+        authkey: Optional[bytes] = AUTHKEY,
+    ):
+        if not address:
+            raise ValueError("an AF_UNIX socket path is required")
+        self.address = address
+        self.handlers = handlers if handlers is not None else default_handlers()
+        self.authkey = authkey
+        self._listener: Optional[Listener] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._calls: Dict[str, int] = {}
+        self._errors = 0
+
+    def start(self) -> None:
+        """Bind the socket (replacing a stale one); serve_forever() accepts."""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        os.chmod(self.address, 0o600)
+
+    def serve_forever(self) -> None:
+        global _serving
+        _serving = True
+        if self._listener is None:
+            self.start()
+        log.info("inference server listening on %s", self.address)
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stop.is_set():
+                    break
+                continue  # failed handshake; keep serving
+            threading.Thread(
+                target=self._serve_client, args=(conn,), daemon=True
+            ).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _serve_client(self, conn: Connection) -> None:
+        with self._lock:
+            self._clients += 1
+        try:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                reply = self._dispatch(method, args, kwargs)
+                if reply[0] == "ok" and inspect.isgenerator(reply[1]):
+                    if not self._send_stream(conn, method, reply[1]):
+                        return
+                else:
+                    conn.send(reply)
+        finally:
+            with self._lock:
+                self._clients -= 1
+            conn.close()
+
+    def _dispatch(self, method: str, args, kwargs):
+        if method == "server_stats":
+            return ("ok", self.stats())
+        fn = self.handlers.get(method)
+        try:
+            if fn is None:
+                raise InferenceError(f"unknown method {method!r}")
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            log.exception("inference call %s failed", method)
+            with self._lock:
+                self._errors += 1
+            return ("err", type(e).__name__, str(e))
+        with self._lock:
+            self._calls[method] = self._calls.get(method, 0) + 1
+        return ("ok", result)
+
+    def _send_stream(self, conn: Connection, method: str, gen) -> bool:
+        """("chunk", x) per item, then ("ok", None); False if the client left."""
+        try:
+            try:
+                for item in gen:
+                    conn.send(("chunk", item))
+            except (OSError, EOFError):
+                return False  # client went away; closing gen stops the work
+            except Exception as e:
+                log.exception("inference stream %s failed", method)
+                with self._lock:
+                    self._errors += 1
+                conn.send(("err", type(e).__name__, str(e)))
+                return True
+            conn.send(("ok", None))
+            return True
+        finally:
+            gen.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "address": self.address,
+                "pid": os.getpid(),
+                "clients": self._clients,
+                "calls": dict(self._calls),
+                "errors": self._errors,
+            }
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+
+class InferenceClient:
+    """Thread-safe client; each call borrows one pooled connection."""
+
+    def __init__(
+        self,
+        address: str = SOCKET_PATH,
+        authkey: Optional[bytes] = AUTHKEY,
+        timeout: float = TIMEOUT_S,
+        max_idle: int = 8,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            raise InferenceError(f"inference server unavailable at {self.address}: {e}")
+
+    def _release(self, conn: Connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        for attempt in (1, 2):  # a pooled connection may be stale after a server restart
+            conn = self._acquire()
+            try:
+                conn.send((method, args, kwargs))
+                if not conn.poll(self.timeout):
+                    conn.close()
+                    raise InferenceError(f"{method}: no reply within {self.timeout}s")
+                reply = conn.recv()
+            except (EOFError, OSError) as e:
+                conn.close()
+                if attempt == 2:
+                    raise InferenceError(f"{method}: connection lost: {e}")
+                continue
+            self._release(conn)
+            if reply[0] == "ok":
+                return reply[1]
+            raise InferenceError(f"{method} failed on server: {reply[1]}: {reply[2]}")
+
+    def stream(self, method: str, *args, **kwargs) -> Iterator[Any]:
+        """Call a generator handler; yields its items as the server sends them."""
+        conn = self._acquire()
+        done = False
+        try:
+            conn.send((method, args, kwargs))
+            while True:
+                if not conn.poll(self.timeout):
+                    raise InferenceError(f"{method}: no reply within {self.timeout}s")
+                reply = conn.recv()
+                if reply[0] == "chunk":
+                    yield reply[1]
+                    continue
+                done = True
+                if reply[0] == "ok":
+                    return
+                raise InferenceError(
+                    f"{method} failed on server: {reply[1]}: {reply[2]}"
+                )
+        except (EOFError, OSError) as e:
+            raise InferenceError(f"{method}: connection lost: {e}")
+        finally:
+            # abandoned mid-stream: the connection still has replies queued
+            if done:
+                self._release(conn)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for c in idle:
+            c.close()
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Optional[InferenceClient]:
+    """The shared client when AI_INFERENCE_SOCKET is set, else None (run in-process)."""
+    global _client
+    if _serving or not SOCKET_PATH:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(SOCKET_PATH)
+    return _client
+
+
+def serve(address: str = SOCKET_PATH, warmup: Optional[List[str]] = None) -> None:
+    """Run the server until interrupted. warmup: None = lazy, [] = all models."""
+    server = InferenceServer(address)
+    server.start()
+    if warmup is not None:
+        from services.model_registry import registry
+
+        t0 = time.perf_counter()
+        registry.warmup(warmup or None)
+        log.info("models warm in %.1fs", time.perf_counter() - t0)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve(warmup=None)
@@ -1,5 +1,5 @@
 # services/insight_service.py
-from typing import Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Sequence, Tuple
 from dao.interfaces import IInsightDAO
 from models.insights import Insight
 
@@ -31,6 +31,50 @@ class InsightService:
     def list_recent(self, limit: int = 100, offset: int = 0) -> List[Insight]:
         return self.insight_dao.list_recent(limit=limit, offset=offset)
 
+    def page_recent(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Insight], Optional[str]]:
+        return self.insight_dao.page_recent(limit=limit, cursor=cursor)
+
+    def batch_for_user(
+        self,
+        user_id: int,
+        entry_ids: Sequence[int],
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Insights for several of the user's entries in one query."""
+        return self.insight_dao.get_for_user(
+            user_id,
+            limit=len(entry_ids),
+            entry_ids=entry_ids,
+            fields=fields,
+            analyzed_only=True,
+        )
+
+    def page_for_user(
+        self,
+        user_id: int,
+        limit: int = 100,
+        offset: int = 0,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """The user's insights, newest entry first."""
+        return self.insight_dao.get_for_user(
+            user_id, limit=limit, offset=offset, fields=fields, analyzed_only=True
+        )
+
+    def cursor_page_for_user(
+        self,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """page_for_user() by keyset: (items, cursor of the next page or None)."""
+        return self.insight_dao.page_for_user(
+            user_id, limit=limit, cursor=cursor, fields=fields, analyzed_only=True
+        )
+
     # --- validations ---
     def _validate_insight(self, insight: Insight):
         if insight.entry_id is None:
@@ -0,0 +1,268 @@
+# services/model_registry.py
+"""
+Process-wide registry for the heavy AI models (sentiment classifier,
+sentence encoder, FLAN-T5 prompter). KeyBERT theme extraction runs on the
+same sentence encoder (see services.ai_themes), so it adds no model.
+
+Every AI service asks the registry for its model instead of loading its own,
+so a model is loaded at most once per process no matter how many
+AISentiment / AIPrompts objects the routers create.
+
+- Thread-safe: concurrent first requests wait on a per-model lock, only one loads
+- Explicit warmup() for startup, status() to report what is resident and its size
+- Eviction: optional max number of loaded models (LRU) and idle TTL
+
+Env knobs:
+    AI_MAX_LOADED_MODELS   0 = unlimited (default)
+    AI_MODEL_IDLE_TTL      seconds a model may sit unused before evict_idle() drops it, 0 = never
+"""
+
+from __future__ import annotations
+import gc
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from services import inference_backends
+
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+EMBED_MODEL = "intfloat/e5-base"
+PROMPT_MODEL = "google/flan-t5-base"
+
+# libraries that cost seconds / hundreds of MB to import; none of them may be
+# imported before the first inference or an explicit warmup
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "keybert",
+    "yake",
+    "onnxruntime",
+    "optimum",
+)
+
+
+def heavy_modules_loaded() -> List[str]:
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def _estimate_bytes(obj: Any) -> int:
+    """Best-effort parameter memory of a model (torch modules, HF pipelines, KeyBERT)."""
+    if obj is None:
+        return 0
+    if isinstance(obj, (tuple, list)):
+        return sum(_estimate_bytes(o) for o in obj)
+    params = getattr(obj, "parameters", None)
+    if callable(params):
+        try:
+            return int(sum(p.numel() * p.element_size() for p in params()))
+        except Exception:
+            pass
+    for attr in ("model", "embedding_model"):
+        inner = getattr(obj, attr, None)
+        if inner is not None and inner is not obj:
+            return _estimate_bytes(inner)
+    return 0
+
+
+def _process_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    def __init__(self, max_loaded: int = 0, idle_ttl: float = 0.0):
+        self.max_loaded = max_loaded
+        self.idle_ttl = idle_ttl
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._pinned: set[str] = set()
+        self._models: Dict[str, Any] = {}
+        self._last_used: Dict[str, float] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    # ---- registration -------------------------------------------------------
+
+    def register(
+        self, name: str, loader: Callable[[], Any], pinned: bool = False
+    ) -> None:
+        """Declare how to build a model. Pinned models are never evicted."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+            if pinned:
+                self._pinned.add(name)
+            else:
+                self._pinned.discard(name)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._loaders)
+
+    # ---- access -------------------------------------------------------------
+
+    def get(self, name: str) -> Any:
+        """Return the loaded model, loading it on first use."""
+        if self.idle_ttl:
+            self.evict_idle()
+        with self._lock:
+            if name in self._models:
+                self._last_used[name] = time.monotonic()
+                return self._models[name]
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model: {name}")
+            load_lock = self._load_locks[name]
+            loader = self._loaders[name]
+
+        # load outside the registry lock so other models stay available
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._last_used[name] = time.monotonic()
+                    return self._models[name]
+            t0 = time.perf_counter()
+            model = loader()
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self._models[name] = model
+                self._last_used[name] = time.monotonic()
+                self._load_seconds[name] = elapsed
+                self._sizes[name] = _estimate_bytes(model)
+            self._enforce_max_loaded(keep=name)
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._models
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Load the given models (default: all registered) and return status()."""
+        for n in list(names) if names is not None else self.names():
+            self.get(n)
+        return self.status()
+
+    # ---- eviction -----------------------------------------------------------
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            model = self._models.pop(name, None)
+            self._last_used.pop(name, None)
+            self._sizes.pop(name, None)
+        if model is None:
+            return False
+        del model
+        self._release_memory()
+        return True
+
+    def unload_all(self) -> List[str]:
+        dropped = [n for n in self.names() if self.unload(n)]
+        return dropped
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Drop unpinned models unused for longer than idle_ttl seconds."""
+        if not self.idle_ttl:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stale = [
+                n
+                for n, ts in self._last_used.items()
+                if n not in self._pinned and now - ts > self.idle_ttl
+            ]
+        return [n for n in stale if self.unload(n)]
+
+    def _enforce_max_loaded(self, keep: str) -> None:
+        if not self.max_loaded:
+            return
+        with self._lock:
+            candidates = sorted(
+                (ts, n)
+                for n, ts in self._last_used.items()
+                if n != keep and n not in self._pinned
+            )
+            overflow = len(self._models) - self.max_loaded
+            victims = [n for _, n in candidates[: max(0, overflow)]]
+        for n in victims:
+            self.unload(n)
+
+    @staticmethod
+    def _release_memory() -> None:
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            try:
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    # ---- reporting ----------------------------------------------------------
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            out = []
+            for n in self._loaders:
+                loaded = n in self._models
+                out.append(
+                    {
+                        "name": n,
+                        "loaded": loaded,
+                        "pinned": n in self._pinned,
+                        "param_bytes": self._sizes.get(n, 0) if loaded else 0,
+                        "load_seconds": self._load_seconds.get(n),
+                        "idle_seconds": (
+                            round(now - self._last_used[n], 3) if loaded else None
+                        ),
+                    }
+                )
+            return out
+
+    def memory_report(self) -> Dict[str, Any]:
+        models = self.status()
+        return {
+            "models": models,
+            "loaded_param_bytes": sum(m["param_bytes"] for m in models),
+            "process_rss_bytes": _process_rss_bytes(),
+            "max_loaded": self.max_loaded,
+            "idle_ttl": self.idle_ttl,
+            "inference": inference_backends.backend_info(),
+            "heavy_modules_loaded": heavy_modules_loaded(),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Default loaders (heavy imports stay inside so importing this module is cheap)
+# AI_BACKEND picks eager torch or ONNX Runtime, see services.inference_backends
+# ---------------------------------------------------------------------------
+
+
+def _load_sentiment():
+    return inference_backends.load_sentiment(SENTIMENT_MODEL)
+
+
+def _load_embedder():
+    # good all-round encoder that works well on journaling text; also used
+    # by KeyBERT for theme candidates
+    return inference_backends.load_embedder(EMBED_MODEL)
+
+
+def _load_prompter():
+    return inference_backends.load_seq2seq(PROMPT_MODEL)
+
+
+registry = ModelRegistry(
+    max_loaded=int(os.getenv("AI_MAX_LOADED_MODELS", "0")),
+    idle_ttl=float(os.getenv("AI_MODEL_IDLE_TTL", "0")),
+)
+registry.register("sentiment", _load_sentiment)
+registry.register("embedder", _load_embedder)
+registry.register("prompter", _load_prompter)
@@ -0,0 +1,241 @@
+# services/prompt_cache.py
+"""
+Per-user pool of pre-generated reflection prompts for /ai/prompt.
+
+A FLAN-T5 sampled generate takes seconds, so requests are served from a pool
+of prompts generated earlier and the model runs off the request path:
+
+- try_take() takes k prompts from the user's pool without blocking and, when
+  the pool runs low, schedules a background refill; only a cold (empty) pool
+  generates inline, in fill(). get() is both in one call
+- Pools expire after `ttl` seconds; invalidate() (called by EntryService on
+  every write) drops the pool and refills it in the background if the user
+  had one, so prompts follow the latest entries
+- New candidates are de-duplicated with ai_prompts' _jaccard against the
+  pool and against prompts served recently, so repeated calls stay varied
+- Pools are keyed by (user, goal hint) and capped at `max_users` (LRU)
+
+Env knobs:
+    AI_PROMPT_CACHE_TTL      seconds a pool stays valid (default 21600 = 6 h)
+    AI_PROMPT_POOL_SIZE      prompts to keep ready per pool (default 14)
+    AI_PROMPT_CACHE_USERS    pools kept in memory (default 1000)
+"""
+
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from services.ai_prompts import dedup_prompts, fill_from_bank
+
+log = logging.getLogger(__name__)
+
+TTL_S = float(os.getenv("AI_PROMPT_CACHE_TTL", "21600"))
+POOL_SIZE = int(os.getenv("AI_PROMPT_POOL_SIZE", "14"))
+MAX_USERS = int(os.getenv("AI_PROMPT_CACHE_USERS", "1000"))
+
+# generator(user_id, goal_hint) -> new candidate prompts (one model run)
+Generator = Callable[[int, Optional[str]], List[str]]
+
+Key = Tuple[int, str]
+
+
+def _default_generator() -> Generator:
+    from services.ai_prompts import AIPrompts
+
+    prompter = AIPrompts()
+    return lambda user_id, goal: prompter.generate_candidates(
+        user_id=user_id, k=7, goal_hint=goal
+    )
+
+
+class _Pool:
+    __slots__ = ("prompts", "served", "created")
+
+    def __init__(self, history: int):
+        self.prompts: List[str] = []
+        self.served: Deque[str] = deque(maxlen=history)  # recently handed out
+        self.created = time.monotonic()
+
+
+class PromptCache:
+    def __init__(
+        self,
+        generator: Optional[Generator] = None,
+        ttl: float = TTL_S,
+        pool_size: int = POOL_SIZE,
+        max_users: int = MAX_USERS,
+        max_rounds: int = 3,
+    ):
+        self._generator = generator
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.max_users = max_users
+        self.max_rounds = max_rounds
+        self._pools: "OrderedDict[Key, _Pool]" = OrderedDict()
+        # bumped by invalidate(); a refill started before a write is discarded
+        self._generations: Dict[int, int] = {}
+        self._refilling: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="prompt-refill")
+        self._hits = 0
+        self._misses = 0
+        self._refills = 0
+        self._invalidations = 0
+
+    @property
+    def generator(self) -> Generator:
+        if self._generator is None:
+            self._generator = _default_generator()
+        return self._generator
+
+    @staticmethod
+    def _key(user_id: int, goal_hint: Optional[str]) -> Key:
+        return user_id, " ".join((goal_hint or "").lower().split())
+
+    # ---- serving ------------------------------------------------------------
+
+    def get(self, user_id: int, k: int = 5, goal_hint: Optional[str] = None) -> List[str]:
+        out = self.try_take(user_id, k, goal_hint)
+        return out if out is not None else self.fill(user_id, k, goal_hint)
+
+    def try_take(
+        self, user_id: int, k: int = 5, goal_hint: Optional[str] = None
+    ) -> Optional[List[str]]:
+        """
+        Non-blocking: k prompts from a warm pool (a refill is scheduled when
+        it runs low), or None when the pool is cold and fill() must generate.
+        Safe to call on the event loop.
+        """
+        key = self._key(user_id, goal_hint)
+        with self._lock:
+            pool = self._fresh_pool(key)
+            if pool is None or not pool.prompts:
+                self._misses += 1
+                return None
+            self._hits += 1
+            out = self._take(pool, k)
+            low = len(pool.prompts) < k
+        if low:
+            self._schedule_refill(key)
+        return fill_from_bank(out, k)
+
+    def fill(self, user_id: int, k: int = 5, goal_hint: Optional[str] = None) -> List[str]:
+        """Cold pool: this request pays for one generation, the rest is pooled."""
+        out = self._fill_inline(self._key(user_id, goal_hint), k)
+        return fill_from_bank(out, k)
+
+    def _fresh_pool(self, key: Key) -> Optional[_Pool]:
+        pool = self._pools.get(key)
+        if pool is None:
+            return None
+        if self.ttl and time.monotonic() - pool.created > self.ttl:
+            del self._pools[key]
+            return None
+        self._pools.move_to_end(key)
+        return pool
+
+    @staticmethod
+    def _take(pool: _Pool, k: int) -> List[str]:
+        out, pool.prompts = pool.prompts[:k], pool.prompts[k:]
+        pool.served.extend(out)
+        return out
+
+    def _fill_inline(self, key: Key, k: int) -> List[str]:
+        self._refill(key)
+        with self._lock:
+            pool = self._pools.get(key)
+            out = self._take(pool, k) if pool is not None else []
+            low = pool is not None and len(pool.prompts) < k
+        if low:
+            self._schedule_refill(key)
+        return out
+
+    # ---- refill -------------------------------------------------------------
+
+    def _schedule_refill(self, key: Key) -> None:
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        self._executor.submit(self._refill_logged, key)
+
+    def _refill_logged(self, key: Key) -> None:
+        try:
+            self._refill(key)
+        except Exception:
+            log.exception("prompt refill failed for user %s", key[0])
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def _refill(self, key: Key) -> None:
+        user_id, goal = key
+        with self._lock:
+            generation = self._generations.get(user_id, 0)
+        for _ in range(self.max_rounds):
+            candidates = self.generator(user_id, goal or None)
+            with self._lock:
+                current = self._generations.get(user_id, 0)
+                if current != generation:
+                    # the user wrote meanwhile: these prompts saw stale entries
+                    generation = current
+                    continue
+                pool = self._fresh_pool(key)
+                if pool is None:
+                    pool = self._pools[key] = _Pool(self.pool_size)
+                    self._evict()
+                pool.prompts += dedup_prompts(
+                    [*pool.prompts, *pool.served],
+                    candidates,
+                    limit=self.pool_size - len(pool.prompts),
+                )
+                self._refills += 1
+                if len(pool.prompts) >= self.pool_size:
+                    return
+
+    def _evict(self) -> None:
+        while len(self._pools) > self.max_users:
+            self._pools.popitem(last=False)
+
+    # ---- invalidation -------------------------------------------------------
+
+    def invalidate(self, user_id: int, refill: bool = True) -> None:
+        """Drop the user's pools; active users get them refilled in the background."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = [key for key in self._pools if key[0] == user_id]
+            for key in keys:
+                del self._pools[key]
+            self._invalidations += 1
+        if refill:
+            for key in keys:
+                self._schedule_refill(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "pools": len(self._pools),
+                "pooled_prompts": sum(len(p.prompts) for p in self._pools.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "refills": self._refills,
+                "refilling": len(self._refilling),
+                "invalidations": self._invalidations,
+                "ttl": self.ttl,
+                "pool_size": self.pool_size,
+            }
+
+
+# process-wide cache used by the /ai/prompt route and EntryService
+prompt_cache = PromptCache()
@@ -0,0 +1,49 @@
+# services/search_service.py
+from typing import List, Optional, Tuple
+
+from dao.interfaces import IEntryDAO
+from models.entry import Entry
+from services.ai_sentiment import AISentiment
+from services.vector_index import VectorIndexManager, vector_indexes, MODES
+
+
+class SearchService:
+    """
+    Search a user's journal by meaning (embedding cosine similarity) or by
+    keyword (SQLite FTS5, bm25 ranking).
+    """
+
+    def __init__(
+        self,
+        entry_dao: IEntryDAO,
+        ai: Optional[AISentiment] = None,
+        indexes: Optional[VectorIndexManager] = None,
+    ):
+        self.entry_dao = entry_dao
+        self.ai = ai or AISentiment()
+        self.indexes = indexes or vector_indexes
+
+    def semantic(
+        self, user_id: int, query: str, k: int = 10, mode: str = "auto"
+    ) -> List[Tuple[Entry, float]]:
+        """Returns [(entry, score)] best first; score is cosine similarity."""
+        if not query or not query.strip():
+            raise ValueError("query is required")
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        qvec = self.ai.embed_query(query.strip())
+        hits = self.indexes.search(user_id, qvec, k=k, mode=mode)
+        if not hits:
+            return []
+        by_id = {
+            e.id: e for e in self.entry_dao.find_by_ids(user_id, [i for i, _ in hits])
+        }
+        return [(by_id[i], score) for i, score in hits if i in by_id]
+
+    def keyword(
+        self, user_id: int, query: str, k: int = 10
+    ) -> List[Tuple[Entry, float, str]]:
+        """Returns [(entry, score, snippet)] best first; score is -bm25."""
+        if not query or not query.strip():
+            raise ValueError("query is required")
+        return self.entry_dao.search_text(user_id, query.strip(), limit=k)
@@ -0,0 +1,109 @@
+# services/unit_of_work.py
+"""
+One connection, one transaction, one commit for a multi-DAO write.
+
+Every DAO commits on its own when it opens the connection itself; handed a
+connection (the injection JournalingService relies on) it leaves commit and
+close to the caller. UnitOfWork is that caller:
+
+    with UnitOfWork() as uow:
+        saved = uow.entries.create(entry)
+        uow.users.update_partial(saved.user_id, current_streak=3)
+        uow.events.create(saved.user_id, "entry.created", {"entry_id": saved.id})
+        uow.after_commit(lambda: prompt_cache.invalidate(saved.user_id))
+
+- BEGIN IMMEDIATE takes the write lock up front, so two concurrent units
+  cannot deadlock upgrading from read to write
+- commit on a clean exit, rollback on an exception; either way a pooled
+  connection goes back to the pool
+- on an injected connection the caller owns the transaction, as with the
+  DAOs: the unit runs inside a savepoint, releases it on a clean exit and
+  rolls back only to it on an exception, and never commits
+- after_commit() callbacks (cache invalidation, vector index updates, worker
+  wake-ups) run only once the data is durable (for an injected connection:
+  once the block exits cleanly), and never on rollback
+- uow.events goes to services.event_buffer after the commit, unless
+  EVENT_DURABILITY=sync or the connection was injected: then events are
+  written in the transaction itself
+
+Keep slow work (model inference) outside the block: the write lock is held
+from BEGIN to COMMIT.
+"""
+
+from __future__ import annotations
+import logging
+import sqlite3
+from typing import Callable, List, Optional
+
+from connection import get_connection
+from dao.analysis_job_dao import AnalysisJobDAO
+from dao.entry_dao import EntryDAO
+from dao.event_dao import EventDAO
+from dao.insight_dao import InsightDAO
+from dao.user_dao import UserDAO
+from services.event_buffer import DeferredEvents, EventBuffer, event_buffer
+
+log = logging.getLogger(__name__)
+
+SAVEPOINT = "unit_of_work"
+
+
+class UnitOfWork:
+    def __init__(
+        self,
+        conn: Optional[sqlite3.Connection] = None,
+        events: Optional[EventBuffer] = None,
+    ):
+        """conn: use this connection (tests, nested flows) instead of a pooled one."""
+        self._external_conn = conn
+        self._event_sink = events or event_buffer
+        self.conn: Optional[sqlite3.Connection] = None
+        self._after_commit: List[Callable[[], None]] = []
+
+    def __enter__(self) -> "UnitOfWork":
+        self.conn = self._external_conn or get_connection()
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        if self._external_conn:
+            self.conn.execute(f"SAVEPOINT {SAVEPOINT}")
+        self.entries = EntryDAO(self.conn)
+        self.users = UserDAO(self.conn)
+        self.insights = InsightDAO(self.conn)
+        if self._external_conn or self._event_sink.mode == "sync":
+            self.events = EventDAO(self.conn)
+        else:
+            self.events = DeferredEvents(self, self._event_sink)
+        self.jobs = AnalysisJobDAO(self.conn)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._external_conn:
+            if exc_type is not None:
+                self.conn.execute(f"ROLLBACK TO {SAVEPOINT}")
+            self.conn.execute(f"RELEASE {SAVEPOINT}")
+        else:
+            try:
+                if exc_type is None:
+                    self.commit()
+                else:
+                    self.conn.rollback()
+            finally:
+                self.conn.close()
+        if exc_type is None:
+            self._run_after_commit()
+
+    def commit(self) -> None:
+        """Commit a connection this unit opened (never an injected one)."""
+        self.conn.commit()
+
+    def after_commit(self, fn: Callable[[], None]) -> None:
+        """Run fn once the transaction has committed (skipped on rollback)."""
+        self._after_commit.append(fn)
+
+    def _run_after_commit(self) -> None:
+        callbacks, self._after_commit = self._after_commit, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                log.exception("after-commit callback failed")
@@ -0,0 +1,277 @@
+# services/vector_index.py
+"""
+Per-user in-memory vector index over insight embeddings.
+
+Each resident user gets one contiguous float32 matrix (rows L2-normalized), so
+a query is a single matrix-vector product + argpartition. The index is loaded
+lazily from InsightDAO.embeddings_for_user and kept current by the write paths
+(on_upsert / on_delete), never re-read per query.
+
+For very large journals an optional IVF mode clusters rows with a few k-means
+iterations and only scores the rows in the `nprobe` closest clusters.
+
+Env knobs:
+    VECTOR_INDEX_MAX_USERS   resident user indexes kept in memory (LRU), default 256
+    VECTOR_ANN_THRESHOLD     rows at which mode="auto" switches to IVF, default 20000
+    VECTOR_ANN_NPROBE        clusters scanned per query in IVF mode, default 8
+"""
+
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAX_USERS = int(os.getenv("VECTOR_INDEX_MAX_USERS", "256"))
+ANN_THRESHOLD = int(os.getenv("VECTOR_ANN_THRESHOLD", "20000"))
+ANN_NPROBE = int(os.getenv("VECTOR_ANN_NPROBE", "8"))
+
+MODES = ("auto", "exact", "approx")
+
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    v = np.asarray(v, dtype=np.float32)
+    if v.ndim == 1:
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else v
+    norms = np.linalg.norm(v, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return v / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class UserVectorIndex:
+    def __init__(self, ids: Sequence[int] = (), matrix: Optional[np.ndarray] = None):
+        ids = np.asarray(ids, dtype=np.int64)
+        if matrix is None or len(ids) == 0:
+            self.dim = 0 if matrix is None or matrix.ndim != 2 else matrix.shape[1]
+            self._mat = np.zeros((0, self.dim), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+        else:
+            self.dim = matrix.shape[1]
+            self._mat = np.ascontiguousarray(_normalize(matrix))
+            self._ids = ids.copy()
+        self._n = len(self._ids)
+        self._pos: Dict[int, int] = {int(i): r for r, i in enumerate(self._ids)}
+        self._lock = threading.RLock()
+        # IVF state (None until built)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[List[set]] = None
+        self._row_list: Optional[np.ndarray] = None
+        self._built_at = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, entry_id: int) -> bool:
+        return int(entry_id) in self._pos
+
+    # ---- updates ------------------------------------------------------------
+
+    def upsert(self, entry_id: int, vec: Sequence[float]) -> None:
+        v = _normalize(np.asarray(vec, dtype=np.float32))
+        with self._lock:
+            if self.dim == 0:
+                self.dim = len(v)
+                self._mat = np.zeros((0, self.dim), dtype=np.float32)
+            if len(v) != self.dim:
+                return  # different model/dimension; ignore rather than corrupt
+            row = self._pos.get(int(entry_id))
+            if row is None:
+                row = self._n
+                self._grow(row + 1)
+                self._ids[row] = entry_id
+                self._pos[int(entry_id)] = row
+                self._n += 1
+            elif self._lists is not None:
+                self._lists[self._row_list[row]].discard(row)
+            self._mat[row] = v
+            if self._centroids is not None:
+                self._assign(row)
+
+    def remove(self, entry_id: int) -> bool:
+        with self._lock:
+            row = self._pos.pop(int(entry_id), None)
+            if row is None:
+                return False
+            last = self._n - 1
+            if self._lists is not None:
+                self._lists[self._row_list[row]].discard(row)
+                if row != last:
+                    self._lists[self._row_list[last]].discard(last)
+            if row != last:  # move the last row into the hole
+                self._mat[row] = self._mat[last]
+                self._ids[row] = self._ids[last]
+                self._pos[int(self._ids[row])] = row
+                if self._lists is not None:
+                    self._row_list[row] = self._row_list[last]
+                    self._lists[self._row_list[row]].add(row)
+            self._n -= 1
+            return True
+
+    def _grow(self, needed: int) -> None:
+        cap = len(self._ids)
+        if needed <= cap:
+            return
+        new_cap = max(needed, cap * 2, 16)
+        mat = np.zeros((new_cap, self.dim), dtype=np.float32)
+        mat[: self._n] = self._mat[: self._n]
+        ids = np.zeros(new_cap, dtype=np.int64)
+        ids[: self._n] = self._ids[: self._n]
+        self._mat, self._ids = mat, ids
+        if self._row_list is not None:
+            rl = np.zeros(new_cap, dtype=np.int64)
+            rl[: self._n] = self._row_list[: self._n]
+            self._row_list = rl
+
+    # ---- IVF ----------------------------------------------------------------
+
+    def build_ivf(self, nlist: Optional[int] = None, iters: int = 8, seed: int = 0) -> None:
+        """Cluster rows with a few rounds of k-means (on a sample for big indexes)."""
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            nlist = min(nlist, n)
+            data = self._mat[:n]
+            rng = np.random.default_rng(seed)
+            sample = data[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+            cent = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            for _ in range(iters):
+                assign = np.argmax(sample @ cent.T, axis=1)
+                for c in range(nlist):
+                    members = sample[assign == c]
+                    if len(members):
+                        cent[c] = members.mean(axis=0)
+                cent = _normalize(cent)
+            self._centroids = cent
+            self._row_list = np.zeros(len(self._ids), dtype=np.int64)
+            self._row_list[:n] = np.argmax(data @ cent.T, axis=1)
+            self._lists = [set() for _ in range(nlist)]
+            for r in range(n):
+                self._lists[self._row_list[r]].add(r)
+            self._built_at = n
+
+    def _assign(self, row: int) -> None:
+        c = int(np.argmax(self._centroids @ self._mat[row]))
+        self._row_list[row] = c
+        self._lists[c].add(row)
+
+    # ---- search -------------------------------------------------------------
+
+    def search(
+        self, query: Sequence[float], k: int = 10, mode: str = "auto", nprobe: int = ANN_NPROBE
+    ) -> List[Tuple[int, float]]:
+        """Return [(entry_id, cosine_similarity)] best first."""
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        with self._lock:
+            n = self._n
+            if n == 0 or len(q) != self.dim:
+                return []
+            use_ivf = mode == "approx" or (mode == "auto" and n >= ANN_THRESHOLD)
+            if use_ivf:
+                # rebuild once the index has doubled since the last clustering
+                if self._centroids is None or n > 2 * max(1, self._built_at):
+                    self.build_ivf()
+                probe = np.argsort(-(self._centroids @ q))[:nprobe]
+                rows = np.fromiter(
+                    (r for c in probe for r in self._lists[c]), dtype=np.int64
+                )
+                if len(rows) == 0:
+                    return []
+                scores = self._mat[rows] @ q
+                best = _top_k(scores, k)
+                return [(int(self._ids[rows[i]]), float(scores[i])) for i in best]
+
+            scores = self._mat[:n] @ q
+            best = _top_k(scores, k)
+            return [(int(self._ids[i]), float(scores[i])) for i in best]
+
+
+class VectorIndexManager:
+    """Keeps up to max_users indexes resident; loads a user's index on first query."""
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[int], Tuple[np.ndarray, np.ndarray]]] = None,
+        max_users: int = MAX_USERS,
+    ):
+        self._loader = loader or self._load_from_db
+        self.max_users = max_users
+        self._indexes: "OrderedDict[int, UserVectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[int, threading.Lock] = {}
+
+    @staticmethod
+    def _load_from_db(user_id: int):
+        from dao.insight_dao import InsightDAO
+
+        return InsightDAO().embeddings_for_user(user_id)
+
+    def get(self, user_id: int) -> UserVectorIndex:
+        with self._lock:
+            idx = self._indexes.get(user_id)
+            if idx is not None:
+                self._indexes.move_to_end(user_id)
+                return idx
+            load_lock = self._load_locks.setdefault(user_id, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if user_id in self._indexes:
+                    return self._indexes[user_id]
+            ids, mat = self._loader(user_id)
+            idx = UserVectorIndex(ids, mat)
+            with self._lock:
+                self._indexes[user_id] = idx
+                while len(self._indexes) > self.max_users:
+                    old, _ = self._indexes.popitem(last=False)
+                    self._load_locks.pop(old, None)
+            return idx
+
+    def search(
+        self, user_id: int, query: Sequence[float], k: int = 10, mode: str = "auto"
+    ) -> List[Tuple[int, float]]:
+        return self.get(user_id).search(query, k=k, mode=mode)
+
+    # ---- write-path hooks (only touch indexes that are already resident) ----
+
+    def on_upsert(self, user_id: int, entry_id: int, vec: Sequence[float]) -> None:
+        with self._lock:
+            idx = self._indexes.get(user_id)
+        if idx is not None and vec is not None and len(vec):
+            idx.upsert(entry_id, vec)
+
+    def on_delete(self, entry_id: int, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is not None:
+                targets = [self._indexes[user_id]] if user_id in self._indexes else []
+            else:
+                targets = list(self._indexes.values())
+        for idx in targets:
+            if idx.remove(entry_id):
+                break
+
+    def drop(self, user_id: int) -> None:
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "resident_users": len(self._indexes),
+                "rows": sum(len(i) for i in self._indexes.values()),
+                "max_users": self.max_users,
+            }
+
+
+# Process-wide indexes shared by the routers and EntryService
+vector_indexes = VectorIndexManager()
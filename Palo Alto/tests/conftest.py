@@ -5,6 +5,7 @@ import pytest
 SCHEMA_SQL = """
 PRAGMA foreign_keys = ON;
 
+DROP TABLE IF EXISTS events;
 DROP TABLE IF EXISTS insights;
 DROP TABLE IF EXISTS entries;
 DROP TABLE IF EXISTS users;
@@ -16,7 +17,10 @@ CREATE TABLE users (
     password   TEXT NOT NULL,
     age        INTEGER NOT NULL CHECK (age >= 0 AND age <= 150),
     gender     TEXT NOT NULL,
-    created_at TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP)
+    created_at TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    last_entry_date TEXT,
+    current_streak  INTEGER NOT NULL DEFAULT 0,
+    longest_streak  INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE entries (
@@ -37,14 +41,26 @@ CREATE TABLE insights (
     created_at TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
     FOREIGN KEY (entry_id) REFERENCES entries(id) ON DELETE CASCADE
 );
+
+CREATE TABLE events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    INTEGER NOT NULL,
+    type       TEXT NOT NULL,
+    meta       TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT NOT NULL DEFAULT (CURRENT_TIMESTAMP),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
 """
 
 
 @pytest.fixture()
 def conn():
+    from dao.schema import ensure_schema
+
     c = sqlite3.connect(":memory:")
     c.row_factory = sqlite3.Row
     c.executescript(SCHEMA_SQL)
+    ensure_schema(c)  # later migrations (job table, etc.)
     return c
 
 
@@ -70,6 +86,49 @@ def insight_dao(conn):
     return InsightDAO(conn)
 
 
+@pytest.fixture()
+def event_dao(conn):
+    from dao.event_dao import EventDAO
+
+    return EventDAO(conn)
+
+
+@pytest.fixture()
+def job_dao(conn):
+    from dao.analysis_job_dao import AnalysisJobDAO
+
+    return AnalysisJobDAO(conn)
+
+
+# ---------- Fake AI (no model downloads in unit tests) ----------
+class FakeAI:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_entry(self, text):
+        self.calls += 1
+        return (0.5 if "good" in text.lower() else -0.5), ["work"]
+
+    def embed_entries(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def sentiment_batch(self, texts):
+        self.calls += len(texts)
+        return [0.5 if "good" in t.lower() else -0.5 for t in texts]
+
+    def themes(self, text, top_k=3, doc_embedding=None):
+        return ["work"]
+
+    def analyze_full(self, text):
+        sent, themes = self.analyze_entry(text)
+        return sent, themes, self.embed_entries([text])[0]
+
+
+@pytest.fixture()
+def fake_ai():
+    return FakeAI()
+
+
 # ---------- Service fixtures ----------
 @pytest.fixture()
 def user_service(user_dao):
@@ -79,10 +138,16 @@ def user_service(user_dao):
 
 
 @pytest.fixture()
-def entry_service(entry_dao):
+def entry_service(entry_dao, insight_dao, job_dao, fake_ai):
     from services.entry_service import EntryService
 
-    return EntryService(entry_dao)
+    return EntryService(
+        entry_dao,
+        insight_dao=insight_dao,
+        ai=fake_ai,
+        job_dao=job_dao,
+        async_analysis=False,
+    )
 
 
 @pytest.fixture()
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+
+def test_require_admin(monkeypatch, make_user):
+    from fastapi import HTTPException
+    import api.deps as deps
+
+    monkeypatch.setattr(deps, "ADMIN_USER_IDS", frozenset({1}))
+    ops = make_user(username="ops", id=1)
+    assert asyncio.run(deps.require_admin(ops)) is ops
+
+    # the same username on another account grants nothing
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(deps.require_admin(make_user(username="ops", id=2)))
+    assert err.value.status_code == 403
+
+
+def test_process_wide_endpoints_are_admin_only():
+    from api.deps import require_admin
+    from api.routers import ai, metrics
+
+    guarded = {
+        ("GET", "/ai/models"),
+        ("GET", "/ai/batching"),
+        ("GET", "/ai/prompt/cache"),
+        ("POST", "/ai/models/warmup"),
+        ("POST", "/ai/models/{name}/unload"),
+        ("GET", "/metrics"),
+    }
+    seen = set()
+    for route in ai.router.routes + metrics.router.routes:
+        for method in route.methods:
+            if (method, route.path) in guarded:
+                deps = [d.call for d in route.dependant.dependencies]
+                assert require_admin in deps, route.path
+                seen.add((method, route.path))
+    assert seen == guarded
@@ -0,0 +1,71 @@
+def test_question_splitter_emits_complete_questions_only():
+    from services.ai_prompts import QuestionSplitter
+
+    sp = QuestionSplitter()
+    assert sp.feed("1. What drained ") == []
+    assert sp.feed("you today? 2. Who help") == ["What drained you today?"]
+    assert sp.feed("ed?\n- ok\n- What next") == ["Who helped?"]  # "ok" too short
+    assert sp.flush() == ["What next"]
+
+
+def test_stream_yields_incrementally_dedups_and_stops_at_k(entry_dao, user_dao, make_user):
+    from services.ai_prompts import AIPrompts
+
+    u = user_dao.create(make_user())
+    prompter = AIPrompts(entry_dao=entry_dao)
+    produced = []
+    closed = []
+
+    def fake_stream(instruction, gcfg):
+        try:
+            for piece in [
+                "1. What drained your energy today? ",
+                "2. What drained your energy today? ",  # duplicate
+                "3. Who made the day easier? 4. What will ",
+                "you try tomorrow? 5. What else?",
+            ]:
+                produced.append(piece)
+                yield piece
+        finally:
+            closed.append(True)
+
+    prompter._generate_stream = fake_stream
+    out = []
+    for q in prompter.stream(user_id=u.id, k=3):
+        out.append(q)
+        if len(out) == 1:
+            # the first question is out before the model has finished
+            assert len(produced) == 1
+
+    assert out == [
+        "What drained your energy today?",
+        "Who made the day easier?",
+        "What will you try tomorrow?",
+    ]
+    assert len(produced) == 4 and closed == [True]
+
+
+def test_stream_tops_up_from_bank(entry_dao, user_dao, make_user):
+    from services.ai_prompts import AIPrompts, FALLBACK_PROMPTS
+
+    u = user_dao.create(make_user())
+    prompter = AIPrompts(entry_dao=entry_dao)
+    prompter._generate_stream = lambda i, g: iter(["How rested do you feel"])
+    out = list(prompter.stream(user_id=u.id, k=3))
+    assert out[0] == "How rested do you feel" and len(out) == 3
+    assert set(out[1:]) <= set(FALLBACK_PROMPTS)
+
+
+def test_generate_candidates_splits_like_stream(entry_dao, user_dao, make_user):
+    from services.ai_prompts import AIPrompts
+
+    u = user_dao.create(make_user())
+    prompter = AIPrompts(entry_dao=entry_dao)
+    # FLAN-T5 emits no newlines: several questions arrive as one line
+    blob = "1. What drained you today? 2. Who helped? 3. What will you try tomorrow?"
+    prompter._generate = lambda i, g: blob
+    assert prompter.generate_candidates(user_id=u.id, k=5) == [
+        "What drained you today?",
+        "Who helped?",
+        "What will you try tomorrow?",
+    ]
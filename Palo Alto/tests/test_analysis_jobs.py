@@ -0,0 +1,84 @@
+def _async_service(entry_dao, insight_dao, job_dao, ai):
+    from services.entry_service import EntryService
+
+    return EntryService(
+        entry_dao,
+        insight_dao=insight_dao,
+        ai=ai,
+        job_dao=job_dao,
+        async_analysis=True,
+    )
+
+
+def test_async_create_enqueues_then_worker_analyzes(
+    entry_dao, user_dao, event_dao, insight_dao, job_dao, fake_ai, make_user, make_entry
+):
+    from services.analysis_worker import AnalysisWorkerPool
+
+    svc = _async_service(entry_dao, insight_dao, job_dao, fake_ai)
+    u = user_dao.create(make_user())
+    e = svc.create(make_entry(user_id=u.id, text="A good day"))
+
+    # nothing analyzed on the request path
+    assert fake_ai.calls == 0
+    assert svc.analysis_status(e.id)["status"] == "pending"
+
+    pool = AnalysisWorkerPool(jobs=job_dao, service_factory=lambda: svc)
+    assert pool.run_once() is True
+    assert pool.run_once() is False  # queue drained
+
+    assert svc.analysis_status(e.id)["status"] == "done"
+    assert insight_dao.find_by_entry(e.id).sentiment == 0.5
+
+
+def test_worker_retries_then_marks_failed(
+    entry_dao, user_dao, event_dao, insight_dao, job_dao, make_user, make_entry
+):
+    from services.analysis_worker import AnalysisWorkerPool
+
+    class BrokenAI:
+        def analyze_full(self, text):
+            raise RuntimeError("model exploded")
+
+    svc = _async_service(entry_dao, insight_dao, job_dao, BrokenAI())
+    u = user_dao.create(make_user())
+    e = svc.create(make_entry(user_id=u.id))
+
+    # retry_base_s=0 so the re-queued job is due immediately
+    pool = AnalysisWorkerPool(
+        jobs=job_dao, service_factory=lambda: svc, max_attempts=2, retry_base_s=0
+    )
+    assert pool.run_once()
+    st = svc.analysis_status(e.id)
+    assert st["status"] == "pending" and "model exploded" in st["last_error"]
+
+    assert pool.run_once()
+    st = svc.analysis_status(e.id)
+    assert st["status"] == "failed" and st["attempts"] == 2
+    assert pool.run_once() is False
+
+
+def test_enqueue_while_running_is_not_lost(
+    job_dao, entry_dao, user_dao, make_user, make_entry
+):
+    u = user_dao.create(make_user())
+    e = entry_dao.create(make_entry(user_id=u.id))
+    job_dao.enqueue(e.id, u.id)
+
+    job = job_dao.claim_next()
+    job_dao.enqueue(e.id, u.id)  # entry edited while the worker runs
+    assert job_dao.mark_done(job) is False
+    assert job_dao.find_by_entry(e.id).status == "pending"
+    assert job_dao.mark_failed(job, "stale", max_attempts=1, retry_delay_s=0) == "pending"
+    assert job_dao.find_by_entry(e.id).last_error is None
+
+    fresh = job_dao.claim_next()
+    assert fresh.generation == job.generation + 1
+    assert job_dao.mark_done(fresh) is True
+    assert job_dao.find_by_entry(e.id).status == "done"
+
+
+def test_sync_mode_reports_done_without_job(entry_service, user_service, make_user, make_entry):
+    u = user_service.register(make_user())
+    e = entry_service.create(make_entry(user_id=u.id))
+    assert entry_service.analysis_status(e.id)["status"] == "done"
@@ -0,0 +1,122 @@
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture()
+def rollup_dao(conn):
+    from dao.rollup_dao import RollupDAO
+
+    return RollupDAO(conn)
+
+
+@pytest.fixture()
+def analytics(rollup_dao):
+    from services.analytics_service import AnalyticsService
+
+    return AnalyticsService(rollup_dao)
+
+
+def _seed(user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight):
+    u = user_dao.create(make_user())
+    days = [
+        ("2024-03-04 09:00:00", 0.5),  # Monday
+        ("2024-03-04 21:00:00", -0.5),
+        ("2024-03-06 12:00:00", None),  # not analyzed yet
+        ("2024-03-11 08:00:00", 1.0),  # next Monday
+        ("2024-04-01 08:00:00", 0.2),  # outside the queried range
+    ]
+    for created_at, sentiment in days:
+        e = entry_dao.create(make_entry(user_id=u.id, created_at=created_at))
+        if sentiment is not None:
+            insight_dao.upsert_for_entry(
+                make_insight(entry_id=e.id, sentiment=sentiment)
+            )
+    return u
+
+
+def test_activity_and_timeseries_by_day(
+    analytics, user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight
+):
+    u = _seed(user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight)
+    start, end = date(2024, 3, 1), date(2024, 3, 31)
+
+    act = analytics.activity(u.id, start, end)
+    assert act["dates"] == ["2024-03-04", "2024-03-06", "2024-03-11"]
+    assert act["count"] == [2, 1, 1]
+
+    ts = analytics.sentiment_timeseries(u.id, start, end)
+    assert ts["dates"] == ["2024-03-04", "2024-03-11"]
+    assert ts["count"] == [2, 1]
+    assert ts["mean"] == [0.0, 1.0]
+    assert ts["min"] == [-0.5, 1.0] and ts["max"] == [0.5, 1.0]
+
+
+def test_weekly_buckets_and_range_validation(
+    analytics, user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight
+):
+    u = _seed(user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight)
+
+    act = analytics.activity(u.id, date(2024, 3, 1), date(2024, 3, 31), bucket="week")
+    assert act["dates"] == ["2024-03-04", "2024-03-11"]
+    assert act["count"] == [3, 1]
+
+    with pytest.raises(ValueError):
+        analytics.activity(u.id, date(2024, 3, 31), date(2024, 3, 1))
+    with pytest.raises(ValueError):
+        analytics.sentiment_timeseries(u.id, bucket="month")
+
+
+def test_rollups_follow_writes_and_match_base_tables(
+    analytics, rollup_dao, user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight
+):
+    u = _seed(user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight)
+    lo, hi = "2024-01-01", "2025-01-01"
+
+    def direct():
+        return [
+            (r["bucket"], r["count"], r["mean"], r["min"], r["max"])
+            for r in insight_dao.sentiment_timeseries(u.id, lo, hi)
+        ]
+
+    def rolled():
+        ts = analytics.sentiment_timeseries(u.id, date(2024, 1, 1), date(2024, 12, 31))
+        return list(zip(ts["dates"], ts["count"], ts["mean"], ts["min"], ts["max"]))
+
+    # re-analysis, moving an entry to another day, deleting an entry
+    first = entry_dao.list_by_user(u.id)[-1]
+    insight_dao.update_partial(first.id, sentiment=-1.0, themes=["rain", "rain"])
+    moved = entry_dao.list_by_user(u.id)[0]
+    entry_dao.update_partial(moved.id, created_at="2024-03-05 10:00:00")
+    entry_dao.delete(entry_dao.list_by_user(u.id)[1].id)
+    assert rolled() == direct()
+    assert analytics.activity(u.id, date(2024, 1, 1), date(2024, 12, 31))["count"] == [
+        n for _, n in entry_dao.activity(u.id, lo, hi)
+    ]
+
+    totals = rollup_dao.totals(u.id, "2024-03-04", "2024-03-05")
+    assert totals.themes["rain"] == 2
+    snapshot = rollup_dao.days(u.id, lo, hi)
+    assert rollup_dao.rebuild() == len(snapshot)
+    assert rollup_dao.days(u.id, lo, hi) == snapshot
+
+
+def test_weekly_summary_reads_rollups(
+    rollup_dao, insight_dao, user_dao, entry_dao, make_user, make_entry, make_insight
+):
+    from datetime import datetime
+    from services.ai_summary import AISummary
+
+    u = user_dao.create(make_user())
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for sentiment, themes in [(0.6, ["work", "sleep"]), (0.4, ["work"])]:
+        e = entry_dao.create(make_entry(user_id=u.id, created_at=now))
+        insight_dao.upsert_for_entry(
+            make_insight(entry_id=e.id, sentiment=sentiment, themes=themes)
+        )
+    entry_dao.create(make_entry(user_id=u.id, created_at=now))  # not analyzed
+
+    out = AISummary(insight_dao, rollups=rollup_dao).weekly(u.id)
+    assert out["insights"]["count"] == 3
+    assert abs(out["insights"]["avg_sentiment"] - 0.5) < 1e-9
+    assert out["insights"]["themes"][0] == "work"
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def _service(entry_dao, insight_dao, fake_ai, chunk_size=2):
+    from services.backfill_service import BackfillService
+    from services.vector_index import VectorIndexManager
+
+    mgr = VectorIndexManager(
+        loader=lambda uid: (np.zeros(0, dtype=np.int64), np.zeros((0, 2), np.float32))
+    )
+    return BackfillService(
+        entry_dao, insight_dao, ai=fake_ai, indexes=mgr, chunk_size=chunk_size
+    )
+
+
+def test_backfill_chunks_skips_current_and_reports(
+    entry_dao, insight_dao, user_dao, make_user, make_entry, make_insight, fake_ai
+):
+    u = user_dao.create(make_user())
+    other = user_dao.create(make_user(username="bob", email="bob@ex.com"))
+    es = [
+        entry_dao.create(make_entry(user_id=u.id, text=f"good day {i}"))
+        for i in range(5)
+    ]
+    entry_dao.create(make_entry(user_id=u.id, text="   "))  # nothing to analyze
+    entry_dao.create(make_entry(user_id=other.id, text="not mine"))
+    insight_dao.upsert_for_entry(make_insight(entry_id=es[0].id, sentiment=-1.0))
+
+    seen = []
+    prog = _service(entry_dao, insight_dao, fake_ai).run(
+        u.id, on_progress=lambda p: seen.append(p.analyzed)
+    )
+
+    assert prog.status == "done"
+    assert (prog.total, prog.analyzed, prog.skipped) == (5, 4, 1)
+    assert seen == [2, 4, 4]  # one report per chunk of 2
+    assert fake_ai.calls == 4  # the already-analyzed entry was not re-run
+    assert insight_dao.find_by_entry(es[0].id).sentiment == -1.0
+    assert insight_dao.find_by_entry(es[4].id).themes == ["work"]
+    assert entry_dao.count_for_analysis(other.id) == 1
+
+
+def test_backfill_force_reanalyzes_everything(
+    entry_dao, insight_dao, user_dao, make_user, make_entry, make_insight, fake_ai
+):
+    u = user_dao.create(make_user())
+    e = entry_dao.create(make_entry(user_id=u.id, text="a good one"))
+    insight_dao.upsert_for_entry(make_insight(entry_id=e.id, sentiment=-1.0))
+
+    prog = _service(entry_dao, insight_dao, fake_ai).run(u.id, force=True)
+    assert prog.analyzed == 1
+    assert insight_dao.find_by_entry(e.id).sentiment == 0.5
+
+    # a second forced run finds every insight current (same text, same models)
+    again = _service(entry_dao, insight_dao, fake_ai).run(u.id, force=True)
+    assert (again.analyzed, again.unchanged) == (0, 1)
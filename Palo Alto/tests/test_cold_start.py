@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_main_loads_no_ml_library():
+    # a meta-path hook records any attempt to import an ML library, whether or
+    # not it is installed in this environment
+    script = textwrap.dedent(
+        """
+        import sys
+        from services.model_registry import HEAVY_MODULES
+
+        attempted = []
+
+        class Guard:
+            def find_spec(self, name, path=None, target=None):
+                if name.split(".")[0] in HEAVY_MODULES:
+                    attempted.append(name)
+                    raise ImportError(name)
+                return None
+
+        sys.meta_path.insert(0, Guard())
+        import main  # noqa: F401
+
+        print(",".join(sorted(set(attempted))))
+        """
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == ""
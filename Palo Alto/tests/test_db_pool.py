@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture()
+def pool(tmp_path):
+    from db_pool import ConnectionPool
+
+    p = ConnectionPool(str(tmp_path / "pool.db"), size=2, max_overflow=1, timeout=0.2)
+    yield p
+    p.close_all()
+
+
+def test_close_returns_connection_and_applies_pragmas(pool):
+    c1 = pool.acquire()
+    assert c1.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    assert c1.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    c1.close()
+    c1.close()  # double close is harmless
+
+    c2 = pool.acquire()
+    assert c2 is c1  # same thread gets its warm connection back
+    c2.close()
+
+    s = pool.stats()
+    assert s["misses"] == 1 and s["affinity_hits"] == 1 and s["in_use"] == 0
+
+
+def test_release_rolls_back_open_transaction(pool):
+    c = pool.acquire()
+    c.execute("CREATE TABLE t (x INTEGER)")
+    c.commit()
+    c.execute("INSERT INTO t VALUES (1)")
+    c.close()  # never committed
+
+    c = pool.acquire()
+    assert not c.in_transaction
+    assert c.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    c.close()
+
+
+def test_overflow_then_timeout(pool):
+    from dao.exceptions import ConnectionError as DBConnectionError
+
+    held = [pool.acquire() for _ in range(3)]  # size 2 + 1 overflow
+    with pytest.raises(DBConnectionError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    for c in held:
+        c.close()
+    s = pool.stats()
+    assert s["open"] == 2 and s["idle"] == 2  # overflow connection was closed
+
+
+def test_waiter_gets_released_connection(pool):
+    held = [pool.acquire() for _ in range(3)]
+    got = []
+
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    time.sleep(0.05)  # let the thread block first
+    held[0].close()
+    t.join(1)
+
+    assert got and pool.stats()["waits"] == 1
+    for c in held[1:] + got:
+        c.close()
@@ -11,6 +11,42 @@ def test_entry_list_by_user(entry_dao, user_dao, make_user, make_entry):
     assert len(entry_dao.list_by_user(u.id)) == 2
 
 
+def test_entry_page_by_user_walks_all_pages(
+    entry_dao, user_dao, make_user, make_entry
+):
+    import pytest
+
+    u = user_dao.create(make_user())
+    other = user_dao.create(make_user(username="other", email="other@ex.com"))
+    # three share a timestamp: the id breaks the tie, nothing is skipped or repeated
+    stamps = ["2024-01-01 09:00:00"] * 3 + ["2024-01-02 09:00:00", "2024-01-03 09:00:00"]
+    ids = [
+        entry_dao.create(make_entry(user_id=u.id, created_at=ts)).id for ts in stamps
+    ]
+    entry_dao.create(make_entry(user_id=other.id, created_at="2024-01-02 10:00:00"))
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = entry_dao.page_by_user(u.id, limit=2, cursor=cursor)
+        seen += [e.id for e in page]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+    assert pages == 3
+
+    with pytest.raises(ValueError):
+        entry_dao.page_by_user(u.id, cursor="not-a-cursor")
+
+
+def test_entry_page_by_user_text_chars(entry_dao, user_dao, make_user, make_entry):
+    u = user_dao.create(make_user())
+    entry_dao.create(make_entry(user_id=u.id, text="x" * 1000))
+    page, _ = entry_dao.page_by_user(u.id, text_chars=10)
+    assert page[0].text == "x" * 10
+    assert entry_dao.page_by_user(u.id)[0][0].text == "x" * 1000
+
+
 def test_entry_update_full(entry_dao, user_dao, make_user, make_entry):
     u = user_dao.create(make_user())
     e = entry_dao.create(make_entry(user_id=u.id, title="Old", text="old"))
@@ -31,3 +67,28 @@ def test_entry_delete(entry_dao, user_dao, make_user, make_entry):
     e = entry_dao.create(make_entry(user_id=u.id))
     entry_dao.delete(e.id)
     assert entry_dao.find_by_id(e.id) is None
+
+
+def test_entry_search_text_ranks_and_filters(
+    entry_dao, user_dao, make_user, make_entry
+):
+    u = user_dao.create(make_user())
+    other = user_dao.create(make_user(username="other", email="other@ex.com"))
+    a = entry_dao.create(make_entry(user_id=u.id, title="Hiking", text="long hike, sore legs"))
+    b = entry_dao.create(make_entry(user_id=u.id, title="Work", text="meeting then a short hike"))
+    entry_dao.create(make_entry(user_id=other.id, title="Hiking", text="hike"))
+
+    hits = entry_dao.search_text(u.id, "hik")  # prefix match on the last term
+    assert [e.id for e, _, _ in hits] == [a.id, b.id]  # title match ranks first
+    assert "<mark>hike</mark>" in hits[0][2]
+
+    # triggers keep the index in sync with updates and deletes
+    entry_dao.update_partial(b.id, text="meeting only")
+    assert [e.id for e, _, _ in entry_dao.search_text(u.id, "meeting")] == [b.id]
+    assert [e.id for e, _, _ in entry_dao.search_text(u.id, "hike")] == [a.id]
+    entry_dao.delete(a.id)
+    assert entry_dao.search_text(u.id, "hike") == []
+
+    # FTS syntax in user input is treated as plain words
+    assert entry_dao.search_text(u.id, 'meeting" OR NEAR(') == []
+    assert entry_dao.search_text(u.id, "***") == []
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_entry_service_crud(entry_service, user_service, make_user, make_entry):
     # need a user
     u = user_service.register(make_user(username="writer", email="w@ex.com"))
@@ -44,3 +47,145 @@ def test_entry_service_validations(entry_service, make_entry):
         assert False
     except ValueError:
         pass
+
+
+def test_entry_service_skips_reanalysis_of_unchanged_text(
+    entry_service, user_service, insight_dao, make_user, make_entry, fake_ai
+):
+    u = user_service.register(make_user())
+    e = entry_service.create(make_entry(user_id=u.id, text="A good day"))
+    assert fake_ai.calls == 1
+    assert insight_dao.find_by_entry(e.id).content_hash
+
+    entry_service.update_partial(e.id, title="Renamed")  # title is not analyzed
+    entry_service.update_partial(e.id, text="A good day")  # autosave, same text
+    entry_service.update_partial(e.id, text="  A good\n day ")  # whitespace only
+    e.text = "A good day"
+    entry_service.update_full(e)
+    assert fake_ai.calls == 1
+
+    entry_service.update_partial(e.id, text="A bad day")
+    assert fake_ai.calls == 2
+    assert insight_dao.find_by_entry(e.id).sentiment == -0.5
+
+    entry_service.reanalyze(e.id)  # explicit request always runs
+    assert fake_ai.calls == 3
+
+
+@pytest.fixture()
+def file_db(tmp_path, monkeypatch):
+    """A file database behind connection.get_connection(), so units of work own their connections."""
+    import connection
+    from dao.schema import ensure_schema
+    from tests.conftest import SCHEMA_SQL
+
+    monkeypatch.setattr(connection, "DB_NAME", str(tmp_path / "journal.db"))
+    c = connection.get_connection()
+    c.executescript(SCHEMA_SQL)
+    ensure_schema(c)
+    c.close()
+    yield connection.get_connection
+    connection.close_pools()
+
+
+def test_entry_service_create_is_one_transaction(
+    file_db, fake_ai, make_user, make_entry, monkeypatch
+):
+    from dao.analysis_job_dao import AnalysisJobDAO
+    from dao.entry_dao import EntryDAO
+    from dao.exceptions import DAOError
+    from dao.insight_dao import InsightDAO
+    from dao.user_dao import UserDAO
+    from services.entry_service import EntryService
+    from services.event_buffer import EventBuffer
+    from services.unit_of_work import UnitOfWork
+
+    commits = []
+
+    class CountingUoW(UnitOfWork):
+        def commit(self):
+            commits.append(1)
+            super().commit()
+
+    entry_dao, insight_dao, user_dao = EntryDAO(), InsightDAO(), UserDAO()
+    svc = EntryService(
+        entry_dao, insight_dao=insight_dao,
+        ai=fake_ai, job_dao=AnalysisJobDAO(), async_analysis=False,
+        uow_factory=lambda: CountingUoW(events=EventBuffer(mode="sync")),
+    )
+    u = user_dao.create(make_user())
+
+    e = svc.create(make_entry(user_id=u.id, text="A good day"))
+    assert commits == [1]  # entry + streak + insight + 3 events
+    assert insight_dao.find_by_entry(e.id) is not None
+    assert user_dao.find_by_id(u.id).current_streak == 1
+    conn = file_db()
+    types = [r["type"] for r in conn.execute("SELECT type FROM events ORDER BY id")]
+    assert types == ["streak.updated", "entry.created", "entry.analyzed"]
+
+    # a failing step rolls the whole flow back
+    def broken(self, user_id, **fields):
+        raise DAOError("disk full")
+
+    monkeypatch.setattr(UserDAO, "update_partial", broken)
+    conn.execute("UPDATE users SET last_entry_date = NULL WHERE id = ?", (u.id,))
+    conn.commit()
+    conn.close()
+    with pytest.raises(DAOError):
+        svc.create(make_entry(user_id=u.id, title="Lost"))
+    assert [x.title for x in entry_dao.list_by_user(u.id)] == [e.title]
+
+
+def test_unit_of_work_leaves_injected_connection_to_caller(
+    conn, user_dao, make_user, make_entry
+):
+    from services.unit_of_work import UnitOfWork
+
+    u = user_dao.create(make_user())  # caller's own, uncommitted write
+    with UnitOfWork(conn) as uow:
+        uow.entries.create(make_entry(user_id=u.id, title="Kept"))
+    assert conn.in_transaction  # nothing committed on the caller's behalf
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(conn) as uow:
+            uow.entries.create(make_entry(user_id=u.id, title="Undone"))
+            raise RuntimeError("boom")
+    # only the failed unit's work is undone
+    assert conn.in_transaction
+    titles = [r["title"] for r in conn.execute("SELECT title FROM entries")]
+    assert titles == ["Kept"] and user_dao.find_by_id(u.id) is not None
+
+
+def test_analyze_endpoint_reuses_current_insight(
+    file_db, fake_ai, make_user, make_entry, monkeypatch
+):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.deps import get_current_user
+    from api.routers import ai as ai_router
+    from dao.entry_dao import EntryDAO
+    from dao.user_dao import UserDAO
+    from services.entry_service import EntryService
+    from services.event_buffer import EventBuffer
+    from services.unit_of_work import UnitOfWork
+
+    svc = EntryService(
+        EntryDAO(), ai=fake_ai, async_analysis=False,
+        uow_factory=lambda: UnitOfWork(events=EventBuffer(mode="sync")),
+    )
+    monkeypatch.setattr(ai_router, "_entry_service", svc)
+    owner = UserDAO().create(make_user())
+    e = svc.create(make_entry(user_id=owner.id, text="A good day"))
+    assert fake_ai.calls == 1
+
+    app = FastAPI()
+    app.include_router(ai_router.router)
+    app.dependency_overrides[get_current_user] = lambda: owner
+    client = TestClient(app)
+
+    r = client.post(f"/ai/entries/{e.id}/analyze")
+    assert r.status_code == 200 and r.json()["cached"] is True
+    assert r.json()["sentiment"] == 0.5 and fake_ai.calls == 1  # no second model pass
+
+    r = client.post(f"/ai/entries/{e.id}/analyze", params={"force": True})
+    assert r.json()["cached"] is False and fake_ai.calls == 2
@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class RecordingDAO:
+    """Stands in for EventDAO(); the flusher thread cannot use the in-memory conn."""
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def create_many(self, rows):
+        with self.lock:
+            self.batches.append(list(rows))
+        return len(rows)
+
+    def rows(self):
+        with self.lock:
+            return [r for b in self.batches for r in b]
+
+
+def _buffer(dao, **kw):
+    from services.event_buffer import EventBuffer
+
+    kw.setdefault("flush_interval", 10)
+    return EventBuffer(dao_factory=lambda: dao, **kw)
+
+
+def test_event_dao_create_many(conn, user_dao, event_dao, make_user):
+    u = user_dao.create(make_user())
+    n = event_dao.create_many(
+        [(u.id, "a", "{}", "2024-01-01 10:00:00"), (u.id, "b", '{"x":1}', None)]
+    )
+    assert n == 2
+    rows = conn.execute("SELECT type, created_at FROM events ORDER BY id").fetchall()
+    assert [r["type"] for r in rows] == ["a", "b"]
+    assert rows[0]["created_at"] == "2024-01-01 10:00:00" and rows[1]["created_at"]
+
+
+def test_buffer_flushes_full_batches_and_on_close():
+    dao = RecordingDAO()
+    buf = _buffer(dao, batch_size=3)
+    for i in range(4):
+        buf.create(1, "entry.created", {"entry_id": i})
+
+    deadline = time.monotonic() + 2
+    while not dao.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [len(b) for b in dao.batches] == [3]  # one executemany, 4th still buffered
+    assert buf.stats()["pending"] == 1
+
+    buf.close()
+    assert [r[2] for r in dao.rows()] == [f'{{"entry_id": {i}}}' for i in range(4)]
+    buf.create(1, "late")  # after close: written at once
+    stats = buf.stats()
+    assert stats["written"] == 5 and stats["pending"] == 0 and stats["dropped"] == 0
+
+
+def test_full_buffer_drops_and_counts():
+    dao = RecordingDAO()
+    lossy = _buffer(dao, mode="best_effort", batch_size=100, max_pending=2)
+    lossy.add_many([(1, "e", None)] * 5)
+    assert lossy.stats()["dropped"] == 3 and lossy.stats()["blocked"] == 0
+
+    # buffered: the producer waits for the flusher instead of dropping
+    waiting = _buffer(dao, batch_size=100, max_pending=2, block_timeout=2)
+    waiting.add_many([(1, "e", None)] * 5)
+    stats = waiting.stats()
+    assert stats["blocked"] >= 1 and stats["dropped"] == 0
+    assert stats["enqueued"] == 5
+
+    lossy.close()
+    waiting.close()
+
+
+def test_sync_mode_writes_through():
+    dao = RecordingDAO()
+    buf = _buffer(dao, mode="sync")
+    buf.create(1, "streak.updated", {"current": 2})
+    assert len(dao.batches) == 1 and buf.stats()["pending"] == 0
+
+
+def test_unit_of_work_hands_events_over_only_after_commit():
+    from services.event_buffer import DeferredEvents
+
+    dao = RecordingDAO()
+    buf = _buffer(dao, mode="sync")
+
+    class FakeUoW:
+        def __init__(self):
+            self.callbacks = []
+
+        def after_commit(self, fn):
+            self.callbacks.append(fn)
+
+    committed, rolled_back = FakeUoW(), FakeUoW()
+    for uow in (committed, rolled_back):
+        events = DeferredEvents(uow, buf)
+        events.create(1, "entry.created", {"entry_id": 1})
+    assert dao.batches == []
+    for fn in committed.callbacks:  # rolled_back's callbacks never run
+        fn()
+    assert [r[1] for r in dao.rows()] == ["entry.created"]
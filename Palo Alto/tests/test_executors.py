@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+
+def test_bounded_executor_runs_off_loop_and_sheds_excess():
+    from services.executors import BoundedExecutor, ExecutorBusy
+
+    ex = BoundedExecutor("test", workers=1, max_pending=2)
+    gate = threading.Event()
+
+    async def main():
+        loop_thread = threading.get_ident()
+        first = ex.run(lambda: (gate.wait(5), threading.get_ident())[1])
+        second = ex.run(lambda: "queued")
+        with pytest.raises(ExecutorBusy):
+            ex.run(lambda: "rejected")  # refused up front, before any await
+        assert ex.stats()["pending"] == 2
+        gate.set()
+        worker_thread = await first
+        assert worker_thread != loop_thread
+        assert await second == "queued"
+
+    asyncio.run(main())
+    stats = ex.stats()
+    assert stats["completed"] == 2 and stats["rejected"] == 1
+    assert stats["pending"] == 0 and stats["peak_pending"] == 2
+    ex.shutdown()
+
+
+def test_executor_propagates_exceptions():
+    from services.executors import BoundedExecutor
+
+    ex = BoundedExecutor("test", workers=1, max_pending=4)
+
+    def boom():
+        raise ValueError("nope")
+
+    async def main():
+        with pytest.raises(ValueError, match="nope"):
+            await ex.run(boom)
+
+    asyncio.run(main())
+    assert ex.stats()["pending"] == 0
+    ex.shutdown()
+
+
+def test_cancelled_jobs_release_their_slots():
+    from services.executors import BoundedExecutor
+
+    ex = BoundedExecutor("test", workers=1, max_pending=2)
+    gate = threading.Event()
+
+    async def main():
+        first = ex.run(gate.wait, 5)
+        queued = ex.run(lambda: "never runs")
+        queued.cancel()  # the awaiting request went away before it started
+        await asyncio.sleep(0)
+        gate.set()
+        await first
+        assert ex.stats()["pending"] == 0
+        assert await ex.run(lambda: "slot free") == "slot free"
+
+        gate.clear()
+        ex.run(gate.wait, 5)
+        ex.run(lambda: "dropped at shutdown")
+        ex.shutdown(wait=False)  # cancels the queued job
+        gate.set()
+
+    asyncio.run(main())
+    ex._pool.shutdown(wait=True)
+    stats = ex.stats()
+    assert stats["pending"] == 0 and stats["completed"] == 3
+
+
+def test_auth_service_async_runs_on_auth_executor(make_user):
+    from services.auth_service import AuthService
+
+    class MemoryUserDAO:
+        def __init__(self):
+            self.users = {}
+            self.threads = []
+
+        def create(self, user):
+            self.threads.append(threading.current_thread().name)
+            user.id = len(self.users) + 1
+            self.users[user.email] = user
+            return user
+
+        def find_by_email(self, email):
+            self.threads.append(threading.current_thread().name)
+            return self.users.get(email)
+
+    dao = MemoryUserDAO()
+    auth = AuthService(dao)
+
+    async def main():
+        saved = await auth.register_async(make_user(password="s3cret"))
+        ok = await auth.login_async(saved.email, "s3cret")
+        bad = await auth.login_async(saved.email, "wrong")
+        return saved, ok, bad
+
+    saved, ok, bad = asyncio.run(main())
+    assert saved.password.startswith("$2") and isinstance(ok, str) and bad is None
+    # bcrypt and the lookups both ran on the auth pool, off the event loop
+    assert all(name.startswith("auth-exec") for name in dao.threads)
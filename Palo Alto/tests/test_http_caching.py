@@ -0,0 +1,61 @@
+def test_user_versions_bumped_by_triggers(
+    conn, user_dao, entry_dao, insight_dao, make_user, make_entry, make_insight
+):
+    from dao.version_dao import VersionDAO
+
+    versions = VersionDAO(conn)
+    u = user_dao.create(make_user())
+    other = user_dao.create(make_user(username="other", email="other@ex.com"))
+    assert versions.get(u.id) == (0, 0)
+
+    e = entry_dao.create(make_entry(user_id=u.id))
+    assert versions.get(u.id) == (1, 0)
+    insight_dao.upsert_for_entry(make_insight(entry_id=e.id))
+    entries_v, insights_v = versions.get(u.id)
+    assert entries_v == 1 and insights_v >= 1
+
+    entry_dao.update_partial(e.id, text="changed")
+    assert versions.get(u.id)[0] == 2
+    entry_dao.delete(e.id)
+    assert versions.get(u.id)[0] == 3
+    assert versions.get(other.id) == (0, 0)  # other users' tags stay valid
+
+
+def test_etag_matching():
+    from api.etag import etag_matches, make_etag
+
+    tag = make_etag(1, 2, "-", "/entries")
+    assert tag.startswith('W/"') and tag != make_etag(1, 3, "-", "/entries")
+    assert etag_matches(tag, tag)
+    assert etag_matches(f'"x", {tag.removeprefix("W/")}', tag)  # weak comparison
+    assert etag_matches("*", tag)
+    assert not etag_matches(None, tag) and not etag_matches('"x"', tag)
+
+
+def test_compression_middleware():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.compression import CompressionMiddleware, accepts
+
+    assert accepts("gzip, br;q=0.5", "br") and not accepts("br;q=0", "br")
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return {"text": "journal " * 200}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    client = TestClient(app)
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < 1600
+    assert r.json()["text"].startswith("journal")
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    r = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
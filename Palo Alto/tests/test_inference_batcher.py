@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+
+def test_batcher_merges_concurrent_calls():
+    from services.inference_batcher import MicroBatcher
+
+    seen_batches = []
+
+    def double(xs):
+        seen_batches.append(list(xs))
+        return [x * 2 for x in xs]
+
+    b = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+    results = {}
+    start = threading.Barrier(6)
+
+    def call(i):
+        start.wait()
+        results[i] = b(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: i * 2 for i in range(6)}
+    assert len(seen_batches) < 6  # at least some calls were merged
+    assert b.stats()["items"] == 6
+
+
+def test_batcher_map_preserves_order_and_respects_max_size():
+    from services.inference_batcher import MicroBatcher
+
+    sizes = []
+
+    def ident(xs):
+        sizes.append(len(xs))
+        return xs
+
+    b = MicroBatcher(ident, max_batch_size=4, max_wait_ms=5)
+    assert b.map(list(range(10))) == list(range(10))
+    assert max(sizes) <= 4
+
+
+def test_batcher_fans_out_errors():
+    from services.inference_batcher import MicroBatcher
+
+    def boom(xs):
+        raise RuntimeError("model failed")
+
+    b = MicroBatcher(boom, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        b("x")
+    assert b.stats()["errors"] == 1
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def server(tmp_path):
+    from services.inference_server import InferenceServer
+
+    def boom():
+        raise ValueError("bad input")
+
+    srv = InferenceServer(
+        str(tmp_path / "ai.sock"),
+        handlers={
+            "sentiment": lambda texts: [0.5 if "good" in t else -0.5 for t in texts],
+            "themes": lambda text, top_k=3, doc_embedding=None: ["work"][:top_k],
+            "boom": boom,
+            "count": lambda n: (i for i in range(n)),
+        },
+        authkey=b"test",
+    )
+    srv.start()
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.stop()
+
+
+def test_client_round_trips_and_reports_errors(server):
+    from services.inference_server import InferenceClient, InferenceError
+
+    client = InferenceClient(server.address, authkey=b"test", timeout=5)
+    assert client.call("sentiment", ["good day", "bad day"]) == [0.5, -0.5]
+    assert client.call("themes", "x", top_k=1, doc_embedding=[0.1]) == ["work"]
+
+    with pytest.raises(InferenceError, match="ValueError: bad input"):
+        client.call("boom")
+    with pytest.raises(InferenceError, match="unknown method"):
+        client.call("nope")
+
+    # concurrent callers share the pooled connections
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.call("sentiment", ["good"])))
+        for _ in range(8)
+    ]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert results == [[0.5]] * 8
+
+    stats = client.call("server_stats")
+    assert stats["calls"]["sentiment"] == 9 and stats["errors"] == 2
+    client.close()
+
+
+def test_client_streams_generator_handlers(server):
+    from services.inference_server import InferenceClient
+
+    client = InferenceClient(server.address, authkey=b"test", timeout=5)
+    assert list(client.stream("count", 4)) == [0, 1, 2, 3]
+
+    # abandoning a stream drops that connection; the client keeps working
+    it = client.stream("count", 1000)
+    assert next(it) == 0
+    it.close()
+    assert client.call("sentiment", ["good"]) == [0.5]
+    client.close()
+
+
+def test_client_fails_cleanly_without_server(tmp_path):
+    from services.inference_server import InferenceClient, InferenceError
+
+    client = InferenceClient(str(tmp_path / "missing.sock"), timeout=1)
+    with pytest.raises(InferenceError, match="unavailable"):
+        client.call("sentiment", ["x"])
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_insight_upsert_and_get(
     insight_dao, entry_dao, user_dao, make_user, make_entry, make_insight
 ):
@@ -27,3 +30,152 @@ def test_insight_delete(
     ins = insight_dao.upsert_for_entry(make_insight(entry_id=e.id))
     insight_dao.delete(ins.id)
     assert insight_dao.find_by_id(ins.id) is None
+
+
+def test_insight_embedding_blob_roundtrip(
+    conn, entry_dao, user_dao, make_user, make_entry, make_insight
+):
+    import numpy as np
+    from dao.insight_dao import InsightDAO
+
+    u = user_dao.create(make_user())
+    e1 = entry_dao.create(make_entry(user_id=u.id))
+    e2 = entry_dao.create(make_entry(user_id=u.id))
+
+    InsightDAO(conn, embedding_format="f32").upsert_for_entry(
+        make_insight(entry_id=e1.id, embedding=[0.5, -0.25, 1.0])
+    )
+    InsightDAO(conn, embedding_format="f16").upsert_for_entry(
+        make_insight(entry_id=e2.id, embedding=[0.5, 0.25, 0.0])
+    )
+    raw = conn.execute(
+        "SELECT embedding, embedding_format FROM insights WHERE entry_id = ?", (e1.id,)
+    ).fetchone()
+    assert isinstance(raw[0], bytes) and raw[1] == "f32"
+
+    dao = InsightDAO(conn)
+    assert dao.find_by_entry(e1.id).embedding == [0.5, -0.25, 1.0]
+
+    ids, mat = dao.embeddings_for_user(u.id)
+    assert list(ids) == [e1.id, e2.id]
+    assert mat.dtype == np.float32 and mat.shape == (2, 3)
+    assert np.allclose(mat[1], [0.5, 0.25, 0.0])
+
+
+def test_insight_convert_legacy_json_embeddings(
+    conn, entry_dao, user_dao, make_user, make_entry, make_insight
+):
+    from dao.insight_dao import InsightDAO
+
+    u = user_dao.create(make_user())
+    e = entry_dao.create(make_entry(user_id=u.id))
+    InsightDAO(conn, embedding_format="json").upsert_for_entry(
+        make_insight(entry_id=e.id, embedding=[0.1, 0.2])
+    )
+
+    assert InsightDAO(conn, embedding_format="f32").convert_embeddings() == 1
+    fmt = conn.execute("SELECT embedding_format FROM insights").fetchone()[0]
+    assert fmt == "f32"
+    got = InsightDAO(conn).find_by_entry(e.id).embedding
+    assert abs(got[0] - 0.1) < 1e-6 and abs(got[1] - 0.2) < 1e-6
+
+
+def test_insight_get_for_user_batch_fields_and_paging(
+    insight_dao, entry_dao, user_dao, make_user, make_entry, make_insight
+):
+    u = user_dao.create(make_user())
+    other = user_dao.create(make_user(username="other", email="other@ex.com"))
+    es = [
+        entry_dao.create(
+            make_entry(user_id=u.id, created_at=f"2024-01-0{i + 1} 10:00:00")
+        )
+        for i in range(3)
+    ]
+    for e in es[:2]:
+        insight_dao.upsert_for_entry(make_insight(entry_id=e.id))
+    foreign = entry_dao.create(make_entry(user_id=other.id))
+    insight_dao.upsert_for_entry(make_insight(entry_id=foreign.id))
+
+    rows = insight_dao.get_for_user(
+        u.id,
+        entry_ids=[es[0].id, es[2].id, foreign.id],
+        fields=["sentiment"],
+        analyzed_only=True,
+    )
+    assert rows == [{"entry_id": es[0].id, "sentiment": rows[0]["sentiment"]}]
+
+    page = insight_dao.get_for_user(
+        u.id, limit=1, offset=1, fields=["created_at"], analyzed_only=True
+    )
+    assert [r["entry_id"] for r in page] == [es[0].id]  # newest first
+
+    with pytest.raises(ValueError):
+        insight_dao.get_for_user(u.id, fields=["password"])
+
+
+def test_insight_page_for_user_cursor(
+    insight_dao, entry_dao, user_dao, make_user, make_entry, make_insight
+):
+    u = user_dao.create(make_user())
+    es = [
+        entry_dao.create(
+            make_entry(user_id=u.id, created_at=f"2024-01-0{i + 1} 10:00:00")
+        )
+        for i in range(3)
+    ]
+    for e in es:
+        insight_dao.upsert_for_entry(make_insight(entry_id=e.id))
+
+    first, cursor = insight_dao.page_for_user(u.id, limit=2, fields=["sentiment"])
+    assert [r["entry_id"] for r in first] == [es[2].id, es[1].id]
+    assert "created_at" not in first[0]  # read for the cursor only
+    rest, cursor = insight_dao.page_for_user(
+        u.id, limit=2, cursor=cursor, fields=["sentiment"]
+    )
+    assert [r["entry_id"] for r in rest] == [es[0].id]
+    assert cursor is None
+
+    recent, cursor = insight_dao.page_recent(limit=2)
+    older, end = insight_dao.page_recent(limit=2, cursor=cursor)
+    assert len(recent) == 2 and end is None
+    assert sorted(i.entry_id for i in recent + older) == sorted(e.id for e in es)
+
+
+def test_page_recent_orders_mixed_timestamp_formats(
+    conn, insight_dao, entry_dao, user_dao, make_user, make_entry, make_insight
+):
+    from datetime import datetime
+    from dao.schema import ensure_schema
+
+    u = user_dao.create(make_user())
+    es = [entry_dao.create(make_entry(user_id=u.id)) for _ in range(4)]
+    # one legacy ISO row, as upserts stored them before normalization
+    conn.execute(
+        "INSERT INTO insights (entry_id, sentiment, themes, embedding, created_at)"
+        " VALUES (?, 0.1, '[]', '[]', '2024-05-01T09:00:00.123456')",
+        (es[0].id,),
+    )
+    ensure_schema(conn)
+    # written through the DAO from a datetime and an ISO string
+    insight_dao.upsert_for_entry(
+        make_insight(entry_id=es[1].id, created_at=datetime(2024, 5, 1, 10, 0, 0, 5))
+    )
+    insight_dao.upsert_for_entry(
+        make_insight(entry_id=es[2].id, created_at="2024-05-01T11:00:00")
+    )
+    # DB default (CURRENT_TIMESTAMP format), same day
+    conn.execute(
+        "INSERT INTO insights (entry_id, sentiment, themes, embedding, created_at)"
+        " VALUES (?, 0.1, '[]', '[]', '2024-05-01 09:30:00')",
+        (es[3].id,),
+    )
+    stored = [r[0] for r in conn.execute("SELECT created_at FROM insights")]
+    assert not any("T" in t for t in stored)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = insight_dao.page_recent(limit=1, cursor=cursor)
+        seen += [i.entry_id for i in page]
+        if cursor is None:
+            break
+    assert seen == [es[2].id, es[1].id, es[3].id, es[0].id]
@@ -34,3 +34,58 @@ def test_insight_service_validations(insight_service, make_insight):
         assert False, "expected ValueError"
     except ValueError:
         pass
+
+
+def test_insight_routes_reject_other_users_entries(
+    make_user, make_entry, make_insight, monkeypatch
+):
+    import sqlite3
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.deps import get_current_user
+    from api.routers import insights as router_mod
+    from dao.entry_dao import EntryDAO
+    from dao.insight_dao import InsightDAO
+    from dao.schema import ensure_schema
+    from dao.user_dao import UserDAO
+    from services.insight_service import InsightService
+    from tests.conftest import SCHEMA_SQL
+
+    # the app runs on other threads than the test
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_SQL)
+    ensure_schema(conn)
+    users, entries, insights = UserDAO(conn), EntryDAO(conn), InsightDAO(conn)
+
+    owner = users.create(make_user())
+    intruder = users.create(make_user(username="mallory", email="m@ex.com"))
+    e = entries.create(make_entry(user_id=owner.id))
+    insights.upsert_for_entry(make_insight(entry_id=e.id))
+
+    async def no_etag(*args, **kwargs):
+        return None
+
+    upserts = []
+    monkeypatch.setattr(router_mod, "conditional_get", no_etag)
+    monkeypatch.setattr(router_mod, "EntryDAO", lambda: entries)
+    monkeypatch.setattr(
+        router_mod.vector_indexes, "on_upsert", lambda *a: upserts.append(a)
+    )
+
+    app = FastAPI()
+    app.include_router(router_mod.router, prefix="/insights")
+    app.dependency_overrides[get_current_user] = lambda: intruder
+    app.dependency_overrides[router_mod.get_insight_service] = lambda: InsightService(
+        insights
+    )
+    client = TestClient(app)
+
+    patch = {"embedding": [0.1, 0.2]}
+    assert client.patch(f"/insights/by-entry/{e.id}", json=patch).status_code == 404
+    assert client.get(f"/insights/by-entry/{e.id}").status_code == 404
+    assert upserts == []
+
+    app.dependency_overrides[get_current_user] = lambda: owner
+    assert client.patch(f"/insights/by-entry/{e.id}", json=patch).status_code == 200
+    assert [u[:2] for u in upserts] == [(owner.id, e.id)]
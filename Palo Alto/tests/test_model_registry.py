@@ -0,0 +1,102 @@
+import threading
+
+
+def test_registry_loads_once_across_threads():
+    from services.model_registry import ModelRegistry
+
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    reg = ModelRegistry()
+    reg.register("m", loader)
+
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(reg.get("m"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(g is got[0] for g in got)
+    assert reg.is_loaded("m")
+
+
+def test_registry_warmup_status_and_unload():
+    from services.model_registry import ModelRegistry
+
+    reg = ModelRegistry()
+    reg.register("a", lambda: "A")
+    reg.register("b", lambda: "B")
+
+    status = {s["name"]: s for s in reg.warmup(["a"])}
+    assert status["a"]["loaded"] and not status["b"]["loaded"]
+
+    assert reg.unload("a") is True
+    assert reg.unload("a") is False
+    assert not reg.is_loaded("a")
+
+
+def test_registry_max_loaded_evicts_lru_but_not_pinned():
+    from services.model_registry import ModelRegistry
+
+    reg = ModelRegistry(max_loaded=2)
+    reg.register("pinned", lambda: "P", pinned=True)
+    reg.register("x", lambda: "X")
+    reg.register("y", lambda: "Y")
+
+    reg.get("pinned")
+    reg.get("x")
+    reg.get("y")  # over budget -> x is the oldest unpinned model
+
+    assert reg.is_loaded("pinned")
+    assert reg.is_loaded("y")
+    assert not reg.is_loaded("x")
+
+
+def test_registry_evict_idle():
+    import time
+    from services.model_registry import ModelRegistry
+
+    reg = ModelRegistry(idle_ttl=5)
+    reg.register("m", lambda: "M")
+    reg.get("m")
+
+    assert reg.evict_idle(now=time.monotonic() + 1) == []
+    assert reg.evict_idle(now=time.monotonic() + 10) == ["m"]
+    assert not reg.is_loaded("m")
+
+
+def test_ort_sentence_encoder_mean_pools_over_mask():
+    import numpy as np
+    from types import SimpleNamespace
+
+    from services.inference_backends import OrtSentenceEncoder
+
+    class Tok:
+        def __call__(self, texts, **kw):
+            n = max(len(t.split()) for t in texts)
+            mask = np.array(
+                [[1] * len(t.split()) + [0] * (n - len(t.split())) for t in texts]
+            )
+            return {"input_ids": mask.copy(), "attention_mask": mask}
+
+    class Model:
+        def __call__(self, input_ids, attention_mask):
+            # token j of every row -> [j + 1, 1]; padding gets huge values
+            b, n = input_ids.shape
+            h = np.stack([np.arange(1, n + 1), np.ones(n)], axis=-1)
+            h = np.broadcast_to(h, (b, n, 2)).copy()
+            h[attention_mask == 0] = 1e6
+            return SimpleNamespace(last_hidden_state=h)
+
+    enc = OrtSentenceEncoder(Model(), Tok())
+    out = enc.encode(["a b c", "a"], batch_size=1)
+    assert out.shape == (2, 2) and out.dtype == np.float32
+    assert np.allclose(out[0], [2.0, 1.0]) and np.allclose(out[1], [1.0, 1.0])
+
+    unit = enc.encode("a b c", normalize_embeddings=True)
+    assert unit.shape == (2,) and np.isclose(np.linalg.norm(unit), 1.0)
@@ -0,0 +1,99 @@
+import threading
+
+WORDS = [
+    "sleep", "work", "family", "exercise", "music", "cooking", "friends",
+    "money", "reading", "nature", "travel", "school", "health", "rest",
+    "art", "garden", "coffee", "weather", "pets", "movies", "coding",
+    "writing", "running", "dreams",
+]
+
+
+def _cache(**kw):
+    from services.prompt_cache import PromptCache
+
+    calls = []
+    lock = threading.Lock()
+
+    def gen(user_id, goal):
+        with lock:
+            n = len(calls)
+            calls.append((user_id, goal))
+        # distinct vocabulary per call so _jaccard never merges them
+        words = [WORDS[(n * 8 + i) % len(WORDS)] for i in range(8)]
+        return [f"{a} {b}?" for a, b in zip(words[::2], words[1::2])] + [
+            "What small win are you grateful for today?"
+        ]
+
+    kw.setdefault("pool_size", 8)
+    return PromptCache(generator=gen, **kw), calls
+
+
+def _drain(cache):
+    cache._executor.submit(lambda: None).result(timeout=5)
+
+
+def test_cold_miss_generates_inline_then_serves_from_pool():
+    cache, calls = _cache()
+    first = cache.get(1, k=3)
+    assert len(first) == 3 and len(calls) >= 1
+    _drain(cache)
+
+    n = len(calls)
+    second = cache.get(1, k=3)
+    assert len(second) == 3 and not set(first) & set(second)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    # pools are per user and per goal hint
+    cache.get(2, k=3)
+    cache.get(1, k=3, goal_hint="Sleep better")
+    assert {c[0] for c in calls[n:]} >= {2}
+
+
+def test_try_take_never_generates():
+    cache, calls = _cache()
+    assert cache.try_take(1, k=3) is None and calls == []  # cold: caller must fill()
+    first = cache.fill(1, k=3)
+    _drain(cache)
+    n = len(calls)
+    warm = cache.try_take(1, k=3)
+    assert len(warm) == 3 and not set(first) & set(warm)
+    assert len(calls) == n  # served from the pool, no model run on this call
+
+
+def test_pool_deduplicates_against_pool_and_served():
+    cache, _ = _cache(pool_size=20)
+    cache.get(1, k=3)
+    _drain(cache)
+    pool = cache._pools[(1, "")]
+    everything = pool.prompts + list(pool.served)
+    # the repeated "grateful" line is pooled at most once across refills
+    assert sum("grateful" in p for p in everything) == 1
+
+
+def test_invalidate_drops_pool_and_refills_in_background():
+    cache, calls = _cache()
+    cache.get(1, k=3)
+    _drain(cache)
+    n = len(calls)
+
+    cache.invalidate(1)
+    assert (1, "") not in cache._pools or len(calls) > n
+    _drain(cache)
+    assert len(calls) > n and cache._pools[(1, "")].prompts
+
+    # users without a pool are not refilled on write
+    cache.invalidate(99)
+    _drain(cache)
+    assert all(c[0] != 99 for c in calls)
+
+
+def test_ttl_expires_pool():
+    cache, calls = _cache(ttl=0.01)
+    cache.get(1, k=3)
+    _drain(cache)
+    import time
+
+    time.sleep(0.02)
+    n = len(calls)
+    cache.get(1, k=3)
+    assert len(calls) > n  # expired -> regenerated
+    assert cache.stats()["misses"] == 2
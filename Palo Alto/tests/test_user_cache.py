@@ -0,0 +1,54 @@
+import time
+
+
+def _user(i, name="u"):
+    from models.user import User
+
+    return User(i, f"{name}{i}", f"{name}{i}@ex.com", "h", 30, "x")
+
+
+def test_lru_ttl_and_copies():
+    from dao.user_cache import UserCache
+
+    cache = UserCache(max_size=2, ttl=0.05)
+    cache.put(_user(1))
+    cache.put(_user(2))
+    assert cache.get(1).username == "u1"  # 1 is now most recent
+    cache.put(_user(3))  # evicts 2
+    assert cache.get(2) is None and cache.get(3) is not None
+
+    got = cache.get(1)
+    got.username = "mutated"
+    assert cache.get(1).username == "u1"
+
+    time.sleep(0.06)
+    assert cache.get(1) is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["expired"] == 1
+    assert 0 < stats["hit_rate"] < 1
+
+
+def test_put_after_invalidation_is_dropped():
+    from dao.user_cache import UserCache
+
+    cache = UserCache()
+    gen = cache.generation()
+    cache.invalidate(1)  # an update lands while a read is in flight
+    cache.put(_user(1), gen)
+    assert cache.get(1) is None
+
+    cache.put(_user(1), cache.generation())
+    assert cache.get(1) is not None
+
+
+def test_user_dao_writes_invalidate(user_dao, make_user):
+    from dao.user_cache import user_cache
+
+    u = user_dao.create(make_user())
+    user_cache.put(u)
+    user_dao.update_partial(u.id, current_streak=5)
+    assert user_cache.get(u.id) is None
+
+    user_cache.put(user_dao.find_by_id(u.id))
+    user_dao.delete(u.id)
+    assert user_cache.get(u.id) is None
@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def test_exact_search_upsert_and_remove():
+    from services.vector_index import UserVectorIndex
+
+    idx = UserVectorIndex()
+    idx.upsert(1, [1.0, 0.0, 0.0])
+    idx.upsert(2, [0.0, 1.0, 0.0])
+    idx.upsert(3, [0.7, 0.7, 0.0])
+
+    hits = idx.search([1.0, 0.1, 0.0], k=2, mode="exact")
+    assert [h[0] for h in hits] == [1, 3]
+
+    # update moves entry 2 next to the query
+    idx.upsert(2, [1.0, 0.05, 0.0])
+    assert idx.search([1.0, 0.05, 0.0], k=1, mode="exact")[0][0] == 2
+
+    assert idx.remove(1) is True
+    assert 1 not in idx and len(idx) == 2
+    assert all(h[0] != 1 for h in idx.search([1.0, 0.0, 0.0], k=5, mode="exact"))
+
+
+def test_ivf_search_finds_near_duplicates():
+    from services.vector_index import UserVectorIndex
+
+    rng = np.random.default_rng(1)
+    mat = rng.normal(size=(2000, 32)).astype(np.float32)
+    idx = UserVectorIndex(np.arange(2000), mat)
+    idx.build_ivf(nlist=20)
+
+    hits = 0
+    for i in range(0, 2000, 100):
+        q = mat[i] + rng.normal(scale=0.01, size=32)
+        hits += idx.search(q, k=1, mode="approx", nprobe=4)[0][0] == i
+    assert hits >= 18  # high recall on near-duplicate queries
+
+    # incremental updates keep the IVF lists consistent
+    idx.remove(0)
+    idx.upsert(5000, mat[0])
+    assert idx.search(mat[0], k=1, mode="approx")[0][0] == 5000
+
+
+def test_manager_loads_lazily_and_applies_hooks():
+    from services.vector_index import VectorIndexManager
+
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        return np.array([10, 11]), np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+    mgr = VectorIndexManager(loader=loader, max_users=1)
+    mgr.on_upsert(7, 99, [1.0, 0.0])  # not resident -> ignored, no load
+    assert loads == []
+
+    assert mgr.search(7, [0.0, 1.0], k=1)[0][0] == 11
+    mgr.on_upsert(7, 12, [0.0, 1.0])
+    mgr.on_delete(11)
+    assert mgr.search(7, [0.0, 1.0], k=1)[0][0] == 12
+    assert loads == [7]
+
+    mgr.search(8, [1.0, 0.0])  # evicts user 7 (max_users=1)
+    assert mgr.stats()["resident_users"] == 1
+
+
+def test_search_service_semantic(entry_dao, user_dao, make_user, make_entry, fake_ai):
+    from services.search_service import SearchService
+    from services.vector_index import VectorIndexManager
+
+    u = user_dao.create(make_user())
+    e1 = entry_dao.create(make_entry(user_id=u.id, text="short"))
+    e2 = entry_dao.create(make_entry(user_id=u.id, text="a much longer entry"))
+
+    vecs = {e1.id: [1.0, 0.0], e2.id: [0.0, 1.0]}
+    mgr = VectorIndexManager(
+        loader=lambda uid: (
+            np.array(list(vecs)),
+            np.array(list(vecs.values()), dtype=np.float32),
+        )
+    )
+    fake_ai.embed_query = lambda q: [0.1, 1.0]
+    svc = SearchService(entry_dao, ai=fake_ai, indexes=mgr)
+
+    hits = svc.semantic(u.id, "longer", k=2)
+    assert [e.id for e, _ in hits] == [e2.id, e1.id]
+    assert hits[0][1] > hits[1][1]
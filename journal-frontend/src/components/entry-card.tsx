@@ -1,7 +1,7 @@
 import { Link } from "react-router-dom"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 
-export function EntryCard({ id, title, created_at, text }: { id: number, title: string, created_at: string, text: string }) {
+export function EntryCard({ id, title, created_at, text, preview }: { id: number, title: string, created_at: string, text?: string, preview?: string }) {
   return (
     <Link to={`/entries/${id}`}>
       <Card className="hover:shadow-md transition-shadow h-full">
@@ -10,7 +10,7 @@ export function EntryCard({ id, title, created_at, text }: { id: number, title:
           <p className="text-xs text-muted-foreground">{new Date(created_at).toLocaleString()}</p>
         </CardHeader>
         <CardContent>
-          <p className="text-sm line-clamp-3">{text}</p>
+          <p className="text-sm line-clamp-3">{preview ?? text}</p>
         </CardContent>
       </Card>
     </Link>
@@ -1,8 +1,7 @@
 import { useEffect, useMemo, useState } from "react"
 import {
-  getMyEntries,
-  getInsightByEntry,
-  type Entry,
+  getEntryActivity,
+  getSentimentTimeseries,
   getWeeklySummary,
   type WeeklySummary,
 } from "@/services/api"
@@ -10,6 +9,17 @@ import { SentimentChart } from "@/components/sentiment-chart"
 import { ActivityHeatmap } from "@/components/activity-heatmap"
 import { Badge } from "@/components/ui/badge"
 
+// "YYYY-MM-DD" <-> local calendar day (new Date("YYYY-MM-DD") would be UTC midnight)
+function fromDay(day: string) {
+  const [y, m, d] = day.split("-").map(Number)
+  return new Date(y, m - 1, d)
+}
+
+function toDay(d: Date) {
+  const pad = (n: number) => String(n).padStart(2, "0")
+  return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`
+}
+
 export default function Analytics() {
   const [data, setData] = useState<{ date: string; sentiment: number }[]>([])
   const [heat, setHeat] = useState<{ date: string; count: number }[]>([])
@@ -21,32 +31,26 @@ export default function Analytics() {
     ; (async () => {
       try {
         setLoading(true)
-        const entries = await getMyEntries()
-
-        // Heatmap data: count entries per day
-        const byDate = new Map<string, number>()
-        entries.forEach((e: Entry) => {
-          const d = new Date(e.created_at)
-          const key = new Date(d.getFullYear(), d.getMonth(), d.getDate()).toISOString()
-          byDate.set(key, (byDate.get(key) || 0) + 1)
-        })
-        setHeat(Array.from(byDate.entries()).map(([date, count]) => ({ date, count })))
-
-        // Sentiment series
-        const enriched = await Promise.all(
-          entries.map(async (e: Entry) => {
-            try {
-              const ins = await getInsightByEntry(e.id)
-              return {
-                date: new Date(e.created_at).toLocaleDateString(),
-                sentiment: ins.sentiment,
-              }
-            } catch {
-              return null
-            }
-          })
+        const yearAgo = new Date()
+        yearAgo.setFullYear(yearAgo.getFullYear() - 1)
+        const [activity, series] = await Promise.all([
+          getEntryActivity().catch(() => null), // default range covers the heatmap's ~12 weeks
+          getSentimentTimeseries({ start: toDay(yearAgo) }).catch(() => null),
+        ])
+
+        // Heatmap data: entries per day, counted by the server
+        setHeat(
+          activity
+            ? activity.dates.map((d, i) => ({ date: fromDay(d).toISOString(), count: activity.count[i] }))
+            : []
+        )
+
+        // Sentiment series: daily mean sentiment
+        setData(
+          series
+            ? series.dates.map((d, i) => ({ date: fromDay(d).toLocaleDateString(), sentiment: series.mean[i] }))
+            : []
         )
-        setData((enriched.filter(Boolean) as any) ?? [])
 
         // Weekly summary
         try {
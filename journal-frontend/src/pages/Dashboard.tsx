@@ -2,15 +2,14 @@ import { useEffect, useMemo, useState, useCallback } from "react"
 import { useAuth } from "@/hooks/useAuth"
 import {
   createEntry,
-  getMyEntries,
+  getMyEntriesPage,
   getMe,
-  type Entry,
+  searchEntries,
+  type EntrySummary,
   type User,
-  getAIPrompts,
-  type PromptResponse,
+  streamAIPrompts,
   getWeeklySummary,
   type WeeklySummary,
-  analyzeEntryAI,
 } from "@/services/api"
 import { EntryCard } from "@/components/entry-card"
 import { Button } from "@/components/ui/button"
@@ -25,10 +24,13 @@ const PAGE_SIZE = 6
 
 export default function Dashboard() {
   const { user } = useAuth()
-  const [entries, setEntries] = useState<Entry[]>([])
+  const [entries, setEntries] = useState<EntrySummary[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingOlder, setLoadingOlder] = useState(false)
   const [title, setTitle] = useState(localStorage.getItem("draft_title") || "")
   const [text, setText] = useState(localStorage.getItem("draft_text") || "")
   const [search, setSearch] = useState("")
+  const [hits, setHits] = useState<EntrySummary[] | null>(null)
   const [me, setMe] = useState<User | null>(null)
   const { toast } = useToast()
 
@@ -45,8 +47,9 @@ export default function Dashboard() {
 
   useEffect(() => {
     ; (async () => {
-      const rows = await getMyEntries()
-      setEntries(rows)
+      const page = await getMyEntriesPage()
+      setEntries(page.items)
+      setNextCursor(page.nextCursor)
       try {
         const profile = await getMe()
         setMe(profile)
@@ -62,19 +65,54 @@ export default function Dashboard() {
     localStorage.setItem("draft_text", text)
   }, [text])
 
+  async function loadOlder() {
+    if (!nextCursor) return
+    setLoadingOlder(true)
+    try {
+      const page = await getMyEntriesPage(nextCursor)
+      setEntries((prev) => [...prev, ...page.items])
+      setNextCursor(page.nextCursor)
+      setShowAll(true)
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
   const onUsePrompt = useCallback((p: string) => {
     setText((t) => (t ? `${t}\n\n${p}` : p))
   }, [])
 
-  const filtered = useMemo(() => {
-    if (!search) return entries
-    const q = search.toLowerCase()
-    return entries.filter(
-      (e) =>
-        (e.title || "").toLowerCase().includes(q) ||
-        (e.text || "").toLowerCase().includes(q)
-    )
-  }, [entries, search])
+  // Server-side full-text search: list items only carry a preview, so
+  // filtering them here would miss anything past the first few lines.
+  useEffect(() => {
+    const q = search.trim()
+    if (!q) {
+      setHits(null)
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const found = await searchEntries(q, "keyword", 50)
+        if (!cancelled) {
+          setHits(found.map((h) => ({
+            id: h.id,
+            title: h.title,
+            created_at: h.created_at,
+            preview: h.snippet ? h.snippet.replace(/<\/?mark>/g, "") : h.text,
+          })))
+        }
+      } catch (err: any) {
+        console.warn("Search failed:", err?.message)
+      }
+    }, 250)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [search])
+
+  const filtered = hits ?? entries
 
   // Reset "showAll" when search changes
   useEffect(() => {
@@ -104,12 +142,7 @@ export default function Dashboard() {
     localStorage.removeItem("draft_text")
     toast("Entry saved", "Your journal entry has been created.")
 
-    try {
-      await analyzeEntryAI(saved.id)
-    } catch (err: any) {
-      console.warn("AI analyze failed:", err?.message)
-    }
-
+    // POST /entries analyzes the entry (or queues it) itself
     try {
       const after = await getMe()
       setMe(after)
@@ -139,8 +172,8 @@ export default function Dashboard() {
     setAiBusy(true)
     setAiErr(null)
     try {
-      const res: PromptResponse = await getAIPrompts("daily reflection", 5)
-      setAiPrompts(res.prompts ?? [])
+      setAiPrompts([])
+      await streamAIPrompts("daily reflection", 5, (q) => setAiPrompts((prev) => [...prev, q]))
     } catch (e: any) {
       setAiErr(e?.message || "Failed to fetch AI prompts")
     } finally {
@@ -223,12 +256,23 @@ export default function Dashboard() {
           {empty && (
             <div className="text-sm text-muted-foreground">No entries yet.</div>
           )}
+          {!empty && hits?.length === 0 && (
+            <div className="text-sm text-muted-foreground">No matching entries.</div>
+          )}
 
           <div className="grid md:grid-cols-2 gap-4">
             {visibleEntries.map((e) => (
               <EntryCard key={e.id} {...e} />
             ))}
           </div>
+
+          {nextCursor && !hits && (showAll || filtered.length <= PAGE_SIZE) && (
+            <div className="flex justify-center">
+              <Button variant="outline" size="sm" onClick={loadOlder} disabled={loadingOlder}>
+                {loadingOlder ? "Loading..." : "Load older entries"}
+              </Button>
+            </div>
+          )}
         </section>
       </div>
 
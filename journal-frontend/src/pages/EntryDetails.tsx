@@ -8,8 +8,7 @@ import {
   type Entry,
   type Insight,
   analyzeEntryAI,
-  getAIPrompts,
-  type PromptResponse,
+  streamAIPrompts,
 } from "@/services/api"
 import { Button } from "@/components/ui/button"
 import { Input } from "@/components/ui/input"
@@ -93,8 +92,8 @@ export default function EntryDetails() {
     try {
       setAiErr(null)
       setAiBusy(true)
-      const res: PromptResponse = await getAIPrompts("reflect on this entry", 5)
-      setAiPrompts(res.prompts ?? [])
+      setAiPrompts([])
+      await streamAIPrompts("reflect on this entry", 5, (q) => setAiPrompts((prev) => [...prev, q]))
     } catch (e: any) {
       setAiErr(e?.message || "Failed to fetch prompts")
       toast("AI failed", e?.message || "Could not fetch prompts")
@@ -20,11 +20,13 @@ api.interceptors.request.use((config) => {
 })
 
 export type Entry = { id: number, user_id: number, title: string, text: string, created_at: string }
+// GET /entries item: a server-side preview instead of the full text
+export type EntrySummary = { id: number, title: string, created_at: string, preview?: string, truncated?: boolean, text?: string }
 export type User = {
   id: number, username: string, email: string, age: number, gender: string,
   last_entry_date?: string | null, current_streak?: number, longest_streak?: number
 }
-export type Insight = { id: number, entry_id: number, sentiment: number, themes: string[], embedding: number[], created_at: string }
+export type Insight = { id: number, entry_id: number, sentiment: number, themes: string[], embedding?: number[], created_at: string }
 
 export async function login(email: string, password: string) {
   const { data } = await api.post(`${AUTH_BASE}/login`, { email, password })
@@ -50,9 +52,14 @@ export async function updateMe(body: Partial<{ username: string; age: number | n
   return data
 }
 
-export async function getMyEntries(): Promise<Entry[]> {
-  const { data } = await api.get(`${ENTRIES_BASE}`)
-  return data
+export type EntryPage = { items: EntrySummary[], nextCursor: string | null }
+
+// One page, newest first; pass nextCursor back for the next (older) page.
+export async function getMyEntriesPage(cursor?: string | null, limit = 100): Promise<EntryPage> {
+  const params: Record<string, string | number> = { limit }
+  if (cursor) params.cursor = cursor
+  const res = await api.get(`${ENTRIES_BASE}`, { params })
+  return { items: res.data, nextCursor: res.headers["x-next-cursor"] ?? null }
 }
 
 export async function createEntry(payload: { user_id: number, title: string, text: string }): Promise<Entry> {
@@ -75,11 +82,58 @@ export async function deleteEntry(id: number): Promise<{ ok: boolean }> {
   return data
 }
 
+export type SearchMode = "keyword" | "auto" | "exact" | "approx"
+export type EntrySearchHit = Entry & { score: number; snippet?: string | null }
+
+// keyword = full-text (snippet has <mark> highlights); others = semantic search
+export async function searchEntries(q: string, mode: SearchMode = "keyword", k = 20): Promise<EntrySearchHit[]> {
+  const { data } = await api.get(`${ENTRIES_BASE}/search`, { params: { q, mode, k } })
+  return data
+}
+
+// Columnar aggregates: index i of every array describes dates[i] (YYYY-MM-DD, bucket start)
+export type Bucket = "day" | "week"
+export type RangeParams = { start?: string; end?: string; bucket?: Bucket }
+export type EntryActivity = { bucket: Bucket; start: string; end: string; dates: string[]; count: number[] }
+export type SentimentSeries = EntryActivity & { mean: number[]; min: number[]; max: number[] }
+
+export async function getEntryActivity(params: RangeParams = {}): Promise<EntryActivity> {
+  const { data } = await api.get(`${ENTRIES_BASE}/activity`, { params })
+  return data
+}
+
+export async function getSentimentTimeseries(params: RangeParams = {}): Promise<SentimentSeries> {
+  const { data } = await api.get(`${INSIGHTS_BASE}/timeseries`, { params })
+  return data
+}
+
 export async function getInsightByEntry(entryId: number): Promise<Insight> {
   const { data } = await api.get(`${INSIGHTS_BASE}/by-entry/${entryId}`)
   return data
 }
 
+// Entry + insight rows; only the requested fields are present
+export type InsightRow = Partial<Omit<Insight, "id" | "created_at">> & {
+  entry_id: number
+  title?: string
+  text?: string
+  created_at?: string   // entry date
+  insight_id?: number
+  analyzed_at?: string
+}
+export type InsightPage = { items: InsightRow[]; limit: number; offset: number; has_more: boolean }
+
+export async function getInsightsBatch(entryIds: number[], fields = "entry_id,created_at,sentiment,themes"): Promise<InsightRow[]> {
+  if (!entryIds.length) return []
+  const { data } = await api.get(`${INSIGHTS_BASE}/batch`, { params: { entry_ids: entryIds.join(","), fields } })
+  return data
+}
+
+export async function getMyInsights(opts: { limit?: number; offset?: number; fields?: string } = {}): Promise<InsightPage> {
+  const { data } = await api.get(`${INSIGHTS_BASE}/mine`, { params: opts })
+  return data
+}
+
 export async function patchInsightByEntry(entryId: number, patch: Partial<Pick<Insight, "sentiment" | "themes" | "embedding">>): Promise<Insight> {
   const { data } = await api.patch(`${INSIGHTS_BASE}/by-entry/${entryId}`, patch)
   return data
@@ -95,6 +149,7 @@ export type AnalyzeEntryResponse = {
   entry_id: number;
   sentiment: number;
   themes: string[];
+  cached?: boolean;   // stored insight was current, no model run
 };
 
 export type WeeklySummary = {
@@ -109,8 +164,52 @@ export async function getAIPrompts(goal = "daily reflection", k_context = 5): Pr
   return data;
 }
 
-export async function analyzeEntryAI(entryId: number): Promise<AnalyzeEntryResponse> {
-  const { data } = await api.post(`/ai/entries/${entryId}/analyze`);
+// Streams fresh prompts (Server-Sent Events over POST); onPrompt fires per question.
+export async function streamAIPrompts(
+  goal: string,
+  k_context: number,
+  onPrompt: (text: string) => void,
+  signal?: AbortSignal,
+): Promise<number> {
+  const token = localStorage.getItem("token")
+  const res = await fetch(`${API_BASE}/ai/prompt/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify({ goal, k_context }),
+    signal,
+  })
+  if (!res.ok || !res.body) throw new Error(`Prompt stream failed (${res.status})`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buf = ""
+  let count = 0
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buf += decoder.decode(value, { stream: true })
+    let sep: number
+    while ((sep = buf.indexOf("\n\n")) >= 0) {
+      const block = buf.slice(0, sep)
+      buf = buf.slice(sep + 2)
+      const event = /^event: (.*)$/m.exec(block)?.[1]
+      const data = JSON.parse(/^data: (.*)$/m.exec(block)?.[1] ?? "null")
+      if (event === "prompt") {
+        onPrompt(data.text)
+        count++
+      } else if (event === "error") {
+        throw new Error(data?.detail || "Prompt generation failed")
+      }
+    }
+  }
+  return count
+}
+
+export async function analyzeEntryAI(entryId: number, force = false): Promise<AnalyzeEntryResponse> {
+  const { data } = await api.post(`/ai/entries/${entryId}/analyze`, null, { params: force ? { force } : {} });
   return data;
 }
 